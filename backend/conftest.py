@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_settings(settings, tmp_path):
+    """الميديا في مجلد مؤقت، الكاش و channels في الذاكرة، والشغل اللي في الخلفية بيتنده من الـ test نفسه."""
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+    settings.MEDIA_BLOB_ROOT = str(tmp_path / "media" / ".blobs")
+    # الكاش فاضي لكل test (الـ ids بتتكرر بين الـ tests بعد الـ rollback)
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                                   "LOCATION": "tests", "KEY_PREFIX": "test"}}
+    settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    settings.EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+    settings.IMPORT_JOBS_RUNNER = "command"
+    settings.EMAIL_OUTBOX_RUNNER = "command"
+    settings.IMAGE_DERIVATIVE_SYNC = True
+
+    import channels.layers
+    from django.core.cache import cache
+    channels.layers.channel_layers.backends.clear()
+    cache.clear()
+    yield
+    cache.clear()
+    channels.layers.channel_layers.backends.clear()
@@ -0,0 +1,9 @@
+# core/api_urls.py
+from django.urls import path
+from .views import ImportJobDetailAPIView, ImportJobListAPIView, cache_metrics_view
+
+urlpatterns = [
+    path("cache/metrics/", cache_metrics_view, name="core-cache-metrics"),
+    path("import-jobs/", ImportJobListAPIView.as_view(), name="core-import-jobs"),
+    path("import-jobs/<uuid:job_id>/", ImportJobDetailAPIView.as_view(), name="core-import-job-detail"),
+]
@@ -4,3 +4,50 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.apps import apps
+        from django.db.models.signals import post_save
+
+        from .models import BaseCompany, BasePerson
+
+        # sender لكل model فعلي (مش receiver على كل post_save في السيستم)
+        for model in apps.get_models():
+            if issubclass(model, (BasePerson, BaseCompany)):
+                post_save.connect(
+                    _image_derivatives, sender=model,
+                    dispatch_uid=f"core.image_derivatives.{model._meta.label_lower}",
+                )
+
+        # links للميديا اتعملت في request اتعمله rollback (core.storage)
+        from django.core.signals import request_finished
+
+        from .storage import discard_rolled_back
+
+        request_finished.connect(
+            lambda sender, **kwargs: discard_rolled_back(), weak=False, dispatch_uid="core.storage_rollback"
+        )
+
+        # الشغل اللي في الخلفية (runner = thread) بعد restart: sweep مع أول request
+        from django.core.signals import request_started
+
+        request_started.connect(_start_sweeps, dispatch_uid="core.background_sweeps")
+
+
+def _image_derivatives(sender, instance, raw=False, **kwargs):
+    # الصورة الشخصية / اللوجو / الختم → thumbnails في الخلفية بعد الـ commit
+    if not raw:
+        from . import images
+
+        images.schedule_for_instance(instance)
+
+
+def _start_sweeps(sender, **kwargs):
+    from django.conf import settings
+
+    from . import jobs, outbox, sweeper
+
+    if jobs.runner() == "thread":
+        sweeper.start("import-jobs", int(getattr(settings, "IMPORT_JOB_SWEEP_INTERVAL", 60)), jobs.sweep)
+    if outbox.runner() == "thread":
+        sweeper.start("outbox", int(getattr(settings, "EMAIL_OUTBOX_SWEEP_INTERVAL", 60)), outbox.sweep)
@@ -0,0 +1,176 @@
+# core/cache.py
+"""
+طبقة كاش موحّدة للمشروع فوق django.core.cache.
+
+- build_key(namespace, *parts, tags=[...]): مفتاح (hash) فيه نسخة (version) كل tag؛
+  invalidate_tags() بيزوّد النسخة فكل المفاتيح القديمة بتتجاهل وتنتهي بالـ TTL.
+- get_or_set(key, compute, timeout): يرجّع (value, hit) ويسجّل hit/miss.
+- invalidate_on_change(Model, *tags): يربط post_save/post_delete بإبطال الـ tags
+  بعد الـ commit (علشان محدش يعيد ملء الكاش بداتا قديمة قبل ما الـ transaction تخلص).
+- metrics.snapshot(): عدّادات hit/miss/set/invalidate لكل namespace (per-process).
+
+الـ backend بيتحدد من CACHES في settings (Redis أو locmem/file كبديل محلي).
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+TAG_KEY = "tag:{}"
+
+
+def get_cache():
+    return caches[getattr(settings, "APP_CACHE_ALIAS", "default")]
+
+
+def default_timeout():
+    return getattr(settings, "APP_CACHE_DEFAULT_TIMEOUT", 300)
+
+
+# ======================== Metrics ========================
+class CacheMetrics:
+    """عدّادات بسيطة thread-safe لكل namespace."""
+
+    FIELDS = ("hits", "misses", "sets", "invalidations")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+
+    def incr(self, namespace, field, amount=1):
+        with self._lock:
+            self._counts[namespace][field] += amount
+
+    def snapshot(self):
+        with self._lock:
+            data = {ns: dict(c) for ns, c in self._counts.items()}
+        totals = dict.fromkeys(self.FIELDS, 0)
+        for counts in data.values():
+            for field in self.FIELDS:
+                totals[field] += counts[field]
+        lookups = totals["hits"] + totals["misses"]
+        totals["hit_ratio"] = round(totals["hits"] / lookups, 4) if lookups else None
+        return {"namespaces": data, "totals": totals}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+metrics = CacheMetrics()
+
+
+# ======================== Keys / tags ========================
+def _namespace_of(key):
+    return key.split(":", 1)[0]
+
+
+def _seed_version():
+    """
+    نسخة tag جديدة = time.time_ns(): لو الـ tag اتشال من الكاش (eviction/restart للـ cache)
+    النسخة الجديدة أكبر من أي نسخة اتستخدمت قبل كده، فالمفاتيح القديمة متصحاش تاني.
+    """
+    return time.time_ns()
+
+
+def tag_versions(tags):
+    """نسخة كل tag (get_many واحد)؛ الـ tag الجديد (أو اللي اتشال) بيبدأ من _seed_version()."""
+    if not tags:
+        return {}
+    cache = get_cache()
+    keys = {TAG_KEY.format(t): t for t in tags}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, tag in keys.items():
+        version = found.get(key)
+        if version is None:
+            seed = _seed_version()
+            cache.add(key, seed, None)
+            version = cache.get(key) or seed
+        versions[tag] = version
+    return versions
+
+
+_tag_namespaces = defaultdict(set)  # tag → الـ namespaces اللي بنت مفاتيح بيه (للـ metrics)
+
+
+def build_key(namespace, *parts, tags=()):
+    """
+    namespace:sha1(نسخ الـ tags + parts) — الطول ثابت مهما كان عدد الـ tags
+    (memcached بيرفض أكتر من 250 حرف و locmem/file بيطلّعوا CacheKeyWarning).
+    """
+    versions = tag_versions(sorted(set(tags)))
+    for tag in versions:
+        _tag_namespaces[tag].add(namespace)
+    raw = json.dumps([versions, parts], sort_keys=True, default=str, separators=(",", ":"))
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def invalidate_tags(*tags):
+    cache = get_cache()
+    for tag in set(tags):
+        key = TAG_KEY.format(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # مش موجود (أول مرة أو اتشال): نسخة جديدة أكبر من أي نسخة قديمة
+            cache.set(key, _seed_version(), None)
+        # الـ invalidation بيتحسب على كل namespace بيستخدم الـ tag؛ tag محدش استخدمه في الـ process ده → "tag:<name>"
+        for namespace in _tag_namespaces.get(tag) or (key,):
+            metrics.incr(namespace, "invalidations")
+    logger.debug("cache: invalidated tags %s", sorted(set(tags)))
+
+
+# ======================== Get / set ========================
+def get_or_set(key, compute, timeout=None, refresh=False):
+    """
+    يرجّع (value, hit). الـ None بيتخزن عادي (مش بيعتبر miss).
+    refresh=True: يحسب من جديد ويكتب فوق القيمة الموجودة.
+    """
+    cache = get_cache()
+    namespace = _namespace_of(key)
+    value = _MISSING if refresh else cache.get(key, _MISSING)
+    if value is not _MISSING:
+        metrics.incr(namespace, "hits")
+        return value, True
+
+    metrics.incr(namespace, "misses")
+    value = compute()
+    cache.set(key, value, default_timeout() if timeout is None else timeout)
+    metrics.incr(namespace, "sets")
+    return value, False
+
+
+def cached(namespace, *parts, compute, tags=(), timeout=None, refresh=False):
+    """اختصار: build_key + get_or_set."""
+    return get_or_set(build_key(namespace, *parts, tags=tags), compute, timeout, refresh)
+
+
+# ======================== Model signals ========================
+_registered = set()
+
+
+def invalidate_on_change(model, *tags):
+    """يتنده من AppConfig.ready(): أي save/delete للموديل يبطل الـ tags بعد الـ commit."""
+    for tag in tags:
+        if (model, tag) in _registered:
+            continue
+        _registered.add((model, tag))
+
+        def _handler(sender, _tag=tag, **kwargs):
+            transaction.on_commit(lambda: invalidate_tags(_tag))
+
+        uid = f"core.cache:{model._meta.label}:{tag}"
+        post_save.connect(_handler, sender=model, weak=False, dispatch_uid=uid + ":save")
+        post_delete.connect(_handler, sender=model, weak=False, dispatch_uid=uid + ":delete")
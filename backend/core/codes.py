@@ -0,0 +1,254 @@
+# core/codes.py
+"""
+Allocator للأكواد المتسلسلة (بدل uuid + exists() لكل محاولة).
+
+- CounterBackend: جدول core_code_counter — UPDATE value = value + n (صف لكل اسم).
+- SequenceBackend: PostgreSQL sequence لكل اسم؛ nextval مش بيرجع مع الـ rollback
+  فحجز blocks آمن حتى جوّه transaction.
+- BlockAllocator: بيحجز block أرقام مرة واحدة ويوزّع منها من الذاكرة
+  (الأرقام اللي متوزعتش بتضيع لما الـ process يقفل — gaps مقبولة).
+
+الإعدادات:
+    CODE_ALLOCATOR = "auto" | "counter" | "sequence"   (auto = sequence على PostgreSQL)
+    CODE_ALLOCATOR_BLOCK_SIZE = 20                      (1 = من غير حجز blocks)
+
+تغيير الوضع (counter ↔ sequence): كل backend بيتزامن مع التاني أول مرة يستخدم الاسم في الـ process
+(الـ sequence بتتقدم لبعد العدّاد، والعدّاد لبعد آخر قيمة في الـ sequence)، فمفيش أكواد بتتكرر.
+الشرط: كل الـ workers يتحولوا مع بعض (restart) — وضعين شغالين في نفس الوقت مش مدعوم.
+"""
+import re
+import threading
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import IntegrityError, ProgrammingError, connections, router, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+CODE_WIDTH = 7  # الأكواد القديمة hex من 6 حروف؛ 7 أرقام عمرها ما تتعارض معاها
+
+
+class CounterBackend:
+    """
+    عدّاد في جدول — آمن على أي داتابيز.
+    model: أي موديل فيه name (unique) + value (الافتراضي core.CodeCounter).
+    floor(name, using) → آخر رقم اتوزع من برّه العدّاد (sequence قديمة)؛ العدّاد بيتقدم لبعده مرة في الـ process.
+    """
+
+    # العدّاد بيرجع مع rollback لو الحجز حصل جوّه transaction، فالـ block يتخزن بس في autocommit
+    survives_rollback = False
+
+    def __init__(self, model=None, floor=None):
+        self.model = model
+        self.floor = floor
+        self._synced = set()  # (db alias, name)
+
+    def get_model(self):
+        if self.model is None:
+            from core.models import CodeCounter
+            return CodeCounter
+        return self.model
+
+    def current(self, name, using):
+        return (
+            self.get_model().objects.using(using)
+            .filter(name=name).values_list("value", flat=True).first()
+        ) or 0
+
+    def sync(self, name, using):
+        """value = max(value, floor) — أول حجز للاسم بعد التحويل من sequence."""
+        low = int(self.floor(name, using) or 0) if self.floor else 0
+        if low:
+            model = self.get_model()
+            qs = model.objects.using(using).filter(name=name)
+            if not qs.update(value=Greatest(F("value"), low)):
+                try:
+                    with transaction.atomic(using=using):
+                        model.objects.using(using).create(name=name, value=low)
+                except IntegrityError:
+                    qs.update(value=Greatest(F("value"), low))
+        # لو الحجز اتعمله rollback التقديم بيرجع معاه — يتعاد في الحجز الجاي
+        transaction.on_commit(lambda: self._synced.add((using, name)), using=using)
+
+    def reserve(self, name, count, using):
+        model = self.get_model()
+        with transaction.atomic(using=using):
+            if (using, name) not in self._synced:
+                self.sync(name, using)
+            qs = model.objects.using(using).filter(name=name)
+            if not qs.update(value=F("value") + count):
+                try:
+                    with transaction.atomic(using=using):
+                        model.objects.using(using).create(name=name, value=count)
+                except IntegrityError:
+                    qs.update(value=F("value") + count)
+            end = qs.values_list("value", flat=True).get()
+        return list(range(end - count + 1, end + 1))
+
+
+class SequenceBackend:
+    """
+    PostgreSQL sequence لكل اسم.
+    start(name, using) → أول رقم متاح (مثلاً بعد آخر قيمة في عدّاد قديم): الـ sequence بتتعمل منه،
+    ولو كانت موجودة من قبل ومتأخرة عنه بتتقدم له (setval) — مرة في الـ process.
+    """
+
+    survives_rollback = True
+
+    def __init__(self, prefix="core_code_seq_", start=None):
+        self.prefix = prefix
+        self.start = start
+        self._ensured = set()  # (db alias, sequence) اللي اتعملت من الـ process ده
+
+    def sequence_name(self, name):
+        return self.prefix + re.sub(r"[^a-z0-9_]", "_", name.lower())
+
+    def create(self, name, seq, using):
+        start = max(int(self.start(name, using)) if self.start else 1, 1)
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS "{seq}" START WITH {start}')
+            if start > 1:
+                # sequence قديمة (قبل فترة الـ counter): آخر رقم اتوزع لازم يبقى ≥ start - 1
+                cursor.execute(
+                    f'SELECT setval(\'"{seq}"\', %s) FROM "{seq}" '
+                    f"WHERE (CASE WHEN is_called THEN last_value ELSE last_value - 1 END) < %s",
+                    [start - 1, start - 1],
+                )
+        self._ensured.add((using, seq))
+
+    def last_value(self, name, using):
+        """آخر رقم اتوزع من الـ sequence (0 لو مش موجودة أو مش PostgreSQL) — floor للعدّاد."""
+        connection = connections[using]
+        if connection.vendor != "postgresql":
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT last_value FROM pg_sequences WHERE schemaname = current_schema() AND sequencename = %s",
+                [self.sequence_name(name)],
+            )
+            row = cursor.fetchone()
+        return (row and row[0]) or 0
+
+    def nextval(self, seq, count, using):
+        connection = connections[using]
+        # جوّه transaction: savepoint علشان لو الـ sequence مش موجودة الـ transaction متبوظش
+        with transaction.atomic(using=using) if connection.in_atomic_block else nullcontext():
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT nextval(\'"{seq}"\') FROM generate_series(1, %s)', [count])
+                return sorted(row[0] for row in cursor.fetchall())
+
+    def reserve(self, name, count, using):
+        """nextval بس — الـ sequence بتتعمل أول مرة في الـ process أو لو اتمسحت (undefined_table)."""
+        seq = self.sequence_name(name)
+        if (using, seq) not in self._ensured:
+            self.create(name, seq, using)
+        try:
+            return self.nextval(seq, count, using)
+        except ProgrammingError as e:
+            if not _undefined_table(e):
+                raise
+        self.create(name, seq, using)
+        return self.nextval(seq, count, using)
+
+
+def _undefined_table(error):
+    cause = error.__cause__
+    # psycopg2: pgcode / psycopg 3: sqlstate — 42P01 = undefined_table (ومنها sequence مش موجودة)
+    return (getattr(cause, "pgcode", None) or getattr(cause, "sqlstate", None)) == "42P01"
+
+
+class BlockAllocator:
+    def __init__(self, backend, block_size=1):
+        self.backend = backend
+        self.block_size = max(1, int(block_size))
+        self._pool = {}  # (db alias, name) → list أرقام محجوزة لسه متوزعتش
+        self._lock = threading.Lock()
+
+    def numbers(self, name, count=1, using="default"):
+        if count <= 0:
+            return []
+        key = (using, name)
+        can_pool = self.block_size > 1 and (
+            self.backend.survives_rollback or not connections[using].in_atomic_block
+        )
+        with self._lock:
+            pool = self._pool.setdefault(key, [])
+            taken, pool[:] = pool[:count], pool[count:]
+            missing = count - len(taken)
+            if missing:
+                reserve = max(missing, self.block_size) if can_pool else missing
+                fresh = self.backend.reserve(name, reserve, using)
+                taken += fresh[:missing]
+                if can_pool:
+                    pool.extend(fresh[missing:])
+        return taken
+
+    def reset(self):
+        with self._lock:
+            self._pool.clear()
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def build_allocator(mode="auto", block_size=1, using="default", counter_model=None,
+                    sequence_prefix="core_code_seq_"):
+    """
+    mode: auto | counter | sequence (auto = sequence على PostgreSQL).
+    التحويل في الاتجاهين مش بيكرر أكواد: الـ sequence بتبدأ بعد العدّاد (counter_model)،
+    والعدّاد على PostgreSQL بيتقدم لبعد آخر قيمة في الـ sequence.
+    """
+    if mode == "auto":
+        mode = "sequence" if connections[using].vendor == "postgresql" else "counter"
+    counter = CounterBackend(counter_model)
+    sequence = SequenceBackend(sequence_prefix, start=lambda name, db: counter.current(name, db) + 1)
+    if mode == "sequence":
+        return BlockAllocator(sequence, block_size)
+    if connections[using].vendor == "postgresql":
+        counter.floor = sequence.last_value
+    return BlockAllocator(counter, block_size)
+
+
+def _build_allocator(using="default"):
+    return build_allocator(
+        getattr(settings, "CODE_ALLOCATOR", "auto"),
+        getattr(settings, "CODE_ALLOCATOR_BLOCK_SIZE", 20),
+        using=using,
+    )
+
+
+def get_allocator():
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = _build_allocator()
+    return _allocator
+
+
+def reset_allocator():
+    """للتستات/تغيير الإعدادات: يرمي الـ blocks المحجوزة في الذاكرة."""
+    global _allocator
+    with _allocator_lock:
+        _allocator = None
+
+
+def allocate_numbers(name, count=1, using="default"):
+    return get_allocator().numbers(name, count, using)
+
+
+def code_prefix(model):
+    return model.__name__.upper()[:3]
+
+
+def format_code(prefix, number):
+    return f"{prefix}-{number:0{CODE_WIDTH}d}"
+
+
+def allocate_codes(model, count=1):
+    """count كود جديد للموديل — استعلام واحد (أو صفر لو الـ block لسه فيه أرقام)."""
+    using = router.db_for_write(model)
+    prefix = code_prefix(model)
+    name = model._meta.concrete_model._meta.label_lower
+    return [format_code(prefix, n) for n in allocate_numbers(name, count, using)]
@@ -0,0 +1,123 @@
+# core/exports.py
+"""
+محرك تصدير XLSX (openpyxl write-only) مشترك بين المستندات والعملاء والموردين.
+
+- Workbook(write_only=True): كل صف بيتكتب ويتنسي — الـ workbook مش بيتبني في الذاكرة.
+- الناتج بيتحفظ في ملف مؤقت على الديسك وبيتبعت بـ FileResponse (بيتقرا على أجزاء،
+  والملف بيتمسح أول ما الـ response يقفله) — مفيش BytesIO ولا getvalue().
+- الـ rows من values_list(...).iterator(chunk_size) — مفيش model instances.
+- ExportSpec: الأعمدة المتاحة لكل model؛ الكلاينت يختار منها بـ ?columns=code,name_en,...
+"""
+import tempfile
+from datetime import datetime
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils import timezone
+from django_filters.filterset import filterset_factory
+from django_filters.rest_framework import FilterSet
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+from rest_framework.exceptions import ValidationError
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class ExportSpec:
+    """
+    columns: [(key, عنوان العمود, lookup في values_list)] — default = الأعمدة لو مفيش اختيار.
+    filters: أسماء حقول (زي filterset_fields في الـ ViewSet) أو FilterSet class —
+    الـ params بتتعمل parse بـ django-filter زي الـ list endpoint بالظبط.
+    """
+
+    def __init__(self, sheet_title, columns, default=None, filters=()):
+        self.sheet_title = sheet_title
+        self.columns = {key: (title, lookup) for key, title, lookup in columns}
+        self.default = list(default or self.columns)
+        self.filters = filters if isinstance(filters, type) else tuple(filters)
+
+    def select(self, keys=None):
+        """[(key, title, lookup)] بالترتيب المطلوب؛ ValidationError لو فيه مفتاح مش معروف."""
+        keys = keys or self.default
+        unknown = [k for k in keys if k not in self.columns]
+        if unknown:
+            raise ValidationError({"columns": [f"Unknown column(s): {', '.join(unknown)}."],
+                                   "available": list(self.columns)})
+        return [(k, *self.columns[k]) for k in dict.fromkeys(keys)]
+
+    def select_from_request(self, request):
+        raw = request.GET.get("columns", "")
+        return self.select([k.strip() for k in raw.split(",") if k.strip()])
+
+    def filterset_class(self, model):
+        if isinstance(self.filters, type):
+            return self.filters
+        # نفس الـ FilterSet اللي DjangoFilterBackend بيبنيه من filterset_fields (is_active=true|1 ...)
+        return filterset_factory(model, filterset=FilterSet, fields=list(self.filters))
+
+    def filter_from_request(self, qs, request):
+        if not self.filters:
+            return qs
+        filterset = self.filterset_class(qs.model)(request.GET, queryset=qs, request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filterset.qs
+
+
+def chunk_size():
+    return int(getattr(settings, "EXPORT_CHUNK_SIZE", 2000))
+
+
+def iter_rows(qs, columns):
+    return qs.values_list(*[lookup for _, _, lookup in columns]).iterator(chunk_size=chunk_size())
+
+
+def _cell_value(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        # Excel مفيهوش timezones
+        return timezone.localtime(value).replace(tzinfo=None)
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    return value
+
+
+def write_xlsx(fh, sheet_title, header, rows, widths=None):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title[:31])
+    for idx, width in enumerate(widths or [], start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    ws.freeze_panes = "A2"
+    bold = Font(bold=True)
+    header_cells = []
+    for title in header:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = bold
+        header_cells.append(cell)
+    ws.append(header_cells)
+    for row in rows:
+        ws.append([_cell_value(v) for v in row])
+    wb.save(fh)
+
+
+def xlsx_response(filename, sheet_title, header, rows, widths=None):
+    # TemporaryFile: مالوش اسم على الديسك وبيتمسح لما FileResponse يقفله
+    fh = tempfile.TemporaryFile(dir=getattr(settings, "EXPORT_TMP_DIR", None))
+    try:
+        write_xlsx(fh, sheet_title, header, rows, widths)
+    except BaseException:
+        fh.close()
+        raise
+    fh.seek(0)
+    return FileResponse(fh, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+def export_response(spec, qs, request, filename):
+    """?columns=...&<spec.filters> → XLSX للـ queryset ده."""
+    qs = spec.filter_from_request(qs, request)
+    columns = spec.select_from_request(request)
+    header = [title for _, title, _ in columns]
+    widths = [max(12, min(len(title) + 4, 50)) for title in header]
+    return xlsx_response(filename, spec.sheet_title, header, iter_rows(qs, columns), widths)
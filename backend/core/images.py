@@ -0,0 +1,172 @@
+# core/images.py
+"""
+نسخ مصغّرة (thumbnails) للصور الشخصية واللوجوهات والأختام.
+
+- الصورة الأصلية ممكن تبقى MBs؛ الليستات محتاجة بس صورة صغيرة.
+- كل صورة ليها derivative لكل مقاس في IMAGE_DERIVATIVE_SIZES، متخزن على الديسك في:
+  MEDIA_ROOT/derivatives/<size>/<اسم الأصل>.<webp|jpg>
+- الـ derivative بياخد نفس الـ mtime بتاع الأصل؛ لو الأصل اتغير (mtime مختلف) بيتعمل من جديد.
+- التوليد في الخلفية: post_save → on_commit → ThreadPoolExecutor (مش جوّه الـ request).
+  الـ serializer بيقرا الموجود بس: null للمقاس اللي لسه مجهزش (مفيش توليد ولا مقارنة mtime).
+- build_image_derivatives (management command) للـ backfill.
+
+الإعدادات: IMAGE_DERIVATIVE_SIZES = {"sm": 64, "md": 160, "lg": 480}،
+IMAGE_DERIVATIVE_FORMAT = "webp" | "jpeg"، IMAGE_DERIVATIVE_QUALITY، IMAGE_DERIVATIVE_WORKERS.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = "derivatives"
+DEFAULT_SIZES = {"sm": 64, "md": 160, "lg": 480}
+
+# الحقول اللي ليها derivatives (على BasePerson / BaseCompany)
+IMAGE_FIELDS = ("personal_image_attachment", "logo_attachment", "stamp_attachment")
+
+
+def sizes():
+    return getattr(settings, "IMAGE_DERIVATIVE_SIZES", DEFAULT_SIZES)
+
+
+def image_format():
+    fmt = getattr(settings, "IMAGE_DERIVATIVE_FORMAT", "webp").lower()
+    if fmt == "webp":
+        from PIL import features
+
+        if not features.check("webp"):
+            return "jpeg"
+    return "jpeg" if fmt in ("jpg", "jpeg") else fmt
+
+
+def derivative_name(name, size):
+    ext = "jpg" if image_format() == "jpeg" else image_format()
+    return f"{DERIVATIVES_DIR}/{size}/{name}.{ext}"
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def is_fresh(name, size) -> bool:
+    source = _mtime_ns(default_storage.path(name))
+    return source is not None and _mtime_ns(default_storage.path(derivative_name(name, size))) == source
+
+
+# ======================== Generate ========================
+def render(name, size):
+    """يعمل الـ derivative لمقاس واحد (synchronous). يرجّع اسمه أو None لو الملف مش صورة."""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    source = default_storage.path(name)
+    fmt = image_format()
+    target = default_storage.path(derivative_name(name, size))
+    tmp = f"{target}.{threading.get_ident()}.tmp"
+    try:
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((sizes()[size],) * 2, Image.LANCZOS)
+            if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+                # JPEG مفيهوش شفافية → خلفية بيضا (الأختام/اللوجوهات غالبًا PNG شفاف)
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.convert("RGBA").getchannel("A"))
+                img = background
+            elif img.mode not in ("RGB", "RGBA", "L", "LA"):
+                img = img.convert("RGBA")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            img.save(tmp, format=fmt.upper(), quality=getattr(settings, "IMAGE_DERIVATIVE_QUALITY", 80))
+    except (UnidentifiedImageError, OSError) as exc:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        logger.warning("Derivative %s/%s failed: %s", name, size, exc)
+        return None
+    stat = os.stat(source)
+    os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp, target)
+    return derivative_name(name, size)
+
+
+def build_derivatives(name, force=False) -> int:
+    """كل المقاسات للصورة دي؛ يرجّع عدد اللي اتعمل."""
+    built = 0
+    for size in sizes():
+        if force or not is_fresh(name, size):
+            built += render(name, size) is not None
+    return built
+
+
+def delete_derivatives(name):
+    for size in sizes():
+        try:
+            os.remove(default_storage.path(derivative_name(name, size)))
+        except FileNotFoundError:
+            pass
+
+
+# ======================== Background ========================
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "IMAGE_DERIVATIVE_WORKERS", 2), thread_name_prefix="derivatives"
+        )
+    return _executor
+
+
+def _run(name):
+    try:
+        build_derivatives(name)
+    except Exception:  # noqa: BLE001 — thread في الخلفية؛ ميوقعش الـ worker
+        logger.exception("Derivatives for %s failed", name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def schedule(name):
+    """يطلب التوليد في الخلفية (مرة واحدة لكل اسم في نفس الوقت)."""
+    if not name:
+        return
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    if getattr(settings, "IMAGE_DERIVATIVE_SYNC", False):
+        _run(name)
+    else:
+        _get_executor().submit(_run, name)
+
+
+def schedule_for_instance(instance):
+    names = [getattr(instance, f).name for f in IMAGE_FIELDS if getattr(instance, f, None)]
+    if names:
+        transaction.on_commit(lambda: [schedule(n) for n in names])
+
+
+def urls_for(fieldfile, request=None):
+    """{size: url|None} — None = لسه متعملش (الـ post_save أو الـ command هو اللي بيولّد)."""
+    if not fieldfile:
+        return None
+    out = {}
+    for size in sizes():
+        name = derivative_name(fieldfile.name, size)
+        if default_storage.exists(name):
+            url = default_storage.url(name)
+            out[size] = request.build_absolute_uri(url) if request is not None else url
+        else:
+            out[size] = None
+    return out
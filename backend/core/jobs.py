@@ -0,0 +1,291 @@
+# core/jobs.py
+"""
+Import jobs في الخلفية — الـ request بيرفع الملف ويرجّع job_id فورًا.
+
+- enqueue(kind, file, user, options): ImportJob (queued) + الملف في الـ storage.
+- الـ worker (من غير broker):
+    IMPORT_JOBS_RUNNER = "thread"  → ThreadPoolExecutor في نفس الـ process (بعد الـ commit)؛
+                                     sweep() كل IMPORT_JOB_SWEEP_INTERVAL ثانية بيلم اللي فضل بعد restart.
+    IMPORT_JOBS_RUNNER = "command" → `python manage.py run_import_jobs` (loop منفصل؛ ممكن أكتر من واحد).
+  الـ claim بـ UPDATE ... WHERE status='queued' فمفيش job بيتنفذ مرتين.
+- الـ importer نفسه (IMPORTERS: kind → dotted path) بياخد (job, file_obj, progress)
+  ويرجّع report زي الاستيراد العادي ({"total_rows", "imported", "errors", ...}).
+- progress(stage, processed, total, imported): بيتكتب على الـ row (كل IMPORT_JOB_PROGRESS_INTERVAL ثانية
+  على الأكتر) + heartbeat + push على group الإشعارات بتاع صاحب الـ job (notifications_<user_id>)،
+  ولو الـ job اتلغى بيرفع JobCancelled.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ImportJob, ImportJobStatus
+
+logger = logging.getLogger(__name__)
+
+# kind → "module.function(job, file_obj, progress) -> report"
+IMPORTERS = {
+    "files.documents": "files.importers.run_import_job",
+    "customers": "customers.importers.run_import_job",
+}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def importers():
+    return {**IMPORTERS, **getattr(settings, "IMPORT_JOB_KINDS", {})}
+
+
+def runner():
+    return getattr(settings, "IMPORT_JOBS_RUNNER", "thread")
+
+
+def max_errors():
+    return int(getattr(settings, "IMPORT_JOB_MAX_ERRORS", 1000))
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+# ======================== Representation / push ========================
+def job_payload(job) -> dict:
+    return {
+        "job_id": str(job.job_id),
+        "kind": job.kind,
+        "status": job.status,
+        "filename": job.filename,
+        "stage": job.stage,
+        "total_rows": job.total_rows,
+        "processed_rows": job.processed_rows,
+        "imported": job.imported,
+        "error_count": job.error_count,
+        "message": job.message,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def push(job):
+    """WebSocket: نفس group الإشعارات (notifications.consumers → import_progress)."""
+    if not job.created_by_id:
+        return
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(
+            f"notifications_{job.created_by_id}", {"type": "import_progress", "job": job_payload(job)}
+        )
+    except Exception as e:  # noqa: BLE001 — الـ push اختياري؛ الحالة متسجلة في الـ DB
+        logger.warning(f"Import job push failed: {e}")
+
+
+# ======================== Enqueue ========================
+def enqueue(kind, file_obj, user=None, options=None) -> ImportJob:
+    if kind not in importers():
+        raise ValueError(f"Unknown import kind '{kind}'.")
+    job = ImportJob(
+        kind=kind, options=options or {}, filename=os.path.basename(getattr(file_obj, "name", "") or ""),
+        created_by=user if getattr(user, "is_authenticated", False) else None,
+    )
+    job.file.save(job.filename or "upload", file_obj, save=False)
+    job.save()
+    if runner() == "thread":
+        pk = job.pk
+        transaction.on_commit(lambda: _submit(pk))
+    return job
+
+
+_executor = None
+_submitted = set()
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=int(getattr(settings, "IMPORT_JOBS_WORKERS", 1)), thread_name_prefix="import-jobs"
+        )
+    return _executor
+
+
+def _submit(pk):
+    with _lock:
+        if pk in _submitted:
+            return
+        _submitted.add(pk)
+    _get_executor().submit(_run, pk)
+
+
+def _run(pk):
+    try:
+        run_job(pk)
+    finally:
+        with _lock:
+            _submitted.discard(pk)
+
+
+def sweep():
+    """
+    thread runner (core.sweeper): jobs فضلت من قبل restart للـ process —
+    running من غير heartbeat → failed، والـ queued ترجع للـ executor.
+    """
+    stale = fail_stale()
+    queued = list(ImportJob.objects.filter(status=ImportJobStatus.QUEUED)
+                  .order_by("created_at", "id").values_list("pk", flat=True))
+    for pk in queued:
+        _submit(pk)
+    return stale, len(queued)
+
+
+def cancel(job) -> bool:
+    """queued → cancelled فورًا؛ running → الـ worker بيوقف عند أول progress."""
+    updated = ImportJob.objects.filter(
+        pk=job.pk, status__in=[ImportJobStatus.QUEUED, ImportJobStatus.RUNNING]
+    ).update(status=ImportJobStatus.CANCELLED, finished_at=timezone.now())
+    if updated:
+        job.refresh_from_db()
+        if job.started_at is None and job.file:
+            # ملحقش يبدأ — الملف مش هيتقري خلاص
+            job.file.delete(save=False)
+            ImportJob.objects.filter(pk=job.pk).update(file=None)
+        push(job)
+    return bool(updated)
+
+
+# ======================== Worker ========================
+def claim(pk=None, worker=None):
+    """يحجز job واحد (الـ pk ده أو أقدم واحد queued). يرجّع ImportJob أو None."""
+    qs = ImportJob.objects.filter(status=ImportJobStatus.QUEUED)
+    candidates = [pk] if pk is not None else list(qs.order_by("created_at", "id").values_list("pk", flat=True)[:5])
+    now = timezone.now()
+    for candidate in candidates:
+        if qs.filter(pk=candidate).update(
+            status=ImportJobStatus.RUNNING, worker=worker or worker_name(), started_at=now, heartbeat_at=now,
+        ):
+            return ImportJob.objects.get(pk=candidate)
+    return None
+
+
+class Progress:
+    def __init__(self, job, interval=None):
+        self.job = job
+        self.interval = interval if interval is not None else float(
+            getattr(settings, "IMPORT_JOB_PROGRESS_INTERVAL", 0.5))
+        self._last = 0.0
+
+    def __call__(self, stage, processed=None, total=None, imported=None, force=False):
+        job = self.job
+        values = {
+            "stage": stage,
+            "processed_rows": job.processed_rows if processed is None else processed,
+            "total_rows": job.total_rows if total is None else total,
+            "imported": job.imported if imported is None else imported,
+        }
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            self._apply(values)
+            return
+        self._last = now
+        heartbeat_at = timezone.now()
+        updated = ImportJob.objects.filter(pk=job.pk, status=ImportJobStatus.RUNNING).update(
+            heartbeat_at=heartbeat_at, **values
+        )
+        if not updated:
+            # الدفعة اللي نادت progress هتتعملها rollback — العدادات اللي في الذاكرة تفضل زي ما هي
+            raise JobCancelled()
+        job.heartbeat_at = heartbeat_at
+        self._apply(values)
+        push(job)
+
+    def _apply(self, values):
+        for field, value in values.items():
+            setattr(self.job, field, value)
+
+
+def _finish(job, status, report=None, message=""):
+    report = dict(report or {})
+    errors = report.pop("errors", []) or []
+    report.pop("created", None)  # ممكن يبقى عشرات الآلاف من الـ ids
+    job.status = status
+    job.message = message
+    job.result = report
+    job.error_count = len(errors)
+    job.errors = errors[:max_errors()]
+    if "total_rows" in report:
+        job.total_rows = report["total_rows"]
+        job.processed_rows = report["total_rows"]
+    if "imported" in report:
+        job.imported = report["imported"]
+    job.finished_at = timezone.now()
+    fields = ["status", "message", "result", "error_count", "errors", "total_rows", "processed_rows",
+              "imported", "finished_at"]
+    qs = ImportJob.objects.filter(pk=job.pk)
+    if status != ImportJobStatus.CANCELLED:
+        # cancel() ممكن يكون سبقنا بعد آخر progress — done/failed مايكتبش فوق cancelled
+        if qs.filter(status=ImportJobStatus.RUNNING).update(**{f: getattr(job, f) for f in fields}):
+            fields = []
+        else:
+            job.status, job.message = ImportJobStatus.CANCELLED, "Cancelled."
+    if fields:
+        # cancel() كتب الحالة بالفعل؛ نسجل بس اللي اتعمل لحد ما وقفنا
+        fields.remove("status")
+        qs.update(**{f: getattr(job, f) for f in fields})
+    if job.file:
+        job.file.delete(save=False)
+        ImportJob.objects.filter(pk=job.pk).update(file=None)
+    push(job)
+
+
+def run_job(pk=None, worker=None):
+    """ينفذ job واحد (الـ pk ده أو التالي في الطابور). يرجّع الـ job أو None لو مفيش."""
+    try:
+        job = claim(pk, worker)
+        if job is None:
+            return None
+        progress = Progress(job)
+        push(job)
+        try:
+            func = import_string(importers()[job.kind])
+            with job.file.open("rb") as fh:
+                report = func(job, fh, progress)
+        except JobCancelled:
+            _finish(job, ImportJobStatus.CANCELLED, {"imported": job.imported}, "Cancelled.")
+        except Exception as e:  # noqa: BLE001 — الخطأ بيتسجل على الـ job
+            logger.exception("Import job %s failed", job.job_id)
+            # extra: تفاصيل أخطاء الملف نفسه (زي expected/got للهيدر)
+            _finish(job, ImportJobStatus.FAILED, {"imported": job.imported, **getattr(e, "extra", {})},
+                    str(e) or e.__class__.__name__)
+        else:
+            _finish(job, ImportJobStatus.DONE, report)
+        return job
+    finally:
+        if runner() == "thread" or worker is not None:
+            close_old_connections()
+
+
+def fail_stale(older_than=None) -> int:
+    """
+    jobs في running من غير heartbeat (الـ worker وقع) → failed.
+    مش بنرجّعها للطابور: الدفعات اللي اتسجلت قبل الوقوع كانت هتتكرر.
+    """
+    older_than = older_than or timedelta(seconds=int(getattr(settings, "IMPORT_JOB_STALE_SECONDS", 600)))
+    return ImportJob.objects.filter(
+        status=ImportJobStatus.RUNNING, heartbeat_at__lt=timezone.now() - older_than
+    ).update(status=ImportJobStatus.FAILED, message="Worker stopped responding.", finished_at=timezone.now())
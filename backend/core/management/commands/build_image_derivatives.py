@@ -0,0 +1,28 @@
+# core/management/commands/build_image_derivatives.py
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.images import IMAGE_FIELDS, build_derivatives
+from core.models import BaseCompany, BasePerson
+
+
+class Command(BaseCommand):
+    help = "Generate missing/stale thumbnails for personal images, logos and stamps"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild even if the thumbnails are fresh")
+
+    def handle(self, *args, **opts):
+        images = built = 0
+        for model in apps.get_models():
+            if not issubclass(model, (BasePerson, BaseCompany)):
+                continue
+            fields = [f.name for f in model._meta.get_fields() if f.name in IMAGE_FIELDS]
+            # all_objects لو موجود علشان المحذوف soft-delete كمان
+            manager = getattr(model, "all_objects", model._default_manager)
+            for row in manager.values_list(*fields).iterator():
+                for name in filter(None, row):
+                    images += 1
+                    built += build_derivatives(name, force=opts["force"])
+            self.stdout.write(f"{model._meta.label}: done")
+        self.stdout.write(self.style.SUCCESS(f"Images: {images}  Thumbnails built: {built}"))
@@ -0,0 +1,37 @@
+# core/management/commands/dispatch_outbox.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import worker_name
+from core.outbox import drain, release_stale
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails (EMAIL_OUTBOX_RUNNER=command); batches share one SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Send what is due now and exit")
+        parser.add_argument("--poll", type=float, default=5.0, help="Seconds between outbox checks when idle")
+
+    def handle(self, *args, **opts):
+        worker = worker_name()
+        totals = {"sent": 0, "retry": 0, "failed": 0}
+        last_sweep = 0.0
+        while True:
+            if time.monotonic() - last_sweep > 60:
+                stale = release_stale()
+                if stale:
+                    self.stdout.write(self.style.WARNING(f"Re-queued {stale} stale email(s)"))
+                last_sweep = time.monotonic()
+            result = drain(worker=worker)
+            for key, value in result.items():
+                totals[key] += value
+            if any(result.values()):
+                self.stdout.write(f"sent={result['sent']} retry={result['retry']} failed={result['failed']}")
+            if opts["once"]:
+                break
+            time.sleep(opts["poll"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent: {totals['sent']} | Retry later: {totals['retry']} | Failed: {totals['failed']}"
+        ))
@@ -0,0 +1,51 @@
+# core/management/commands/media_dedupe.py
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.storage import ContentAddressedStorage, sha256_of_path
+
+SKIP_DIRS = {".blobs", "chunked_uploads", "derivatives"}
+
+
+class Command(BaseCommand):
+    help = "Move existing MEDIA_ROOT files into the content-addressed blob store (one copy per content)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only count files and duplicate bytes")
+
+    def handle(self, *args, **opts):
+        storage = default_storage
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError("DEFAULT_FILE_STORAGE is not core.storage.ContentAddressedStorage (MEDIA_DEDUP=0?)")
+
+        root = str(settings.MEDIA_ROOT)
+        blob_root = os.path.realpath(storage.blob_location)
+        files = adopted = saved = 0
+        seen = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [
+                d for d in dirnames
+                if d not in SKIP_DIRS and os.path.realpath(os.path.join(dirpath, d)) != blob_root
+            ]
+            for filename in filenames:
+                name = os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, "/")
+                files += 1
+                if opts["dry_run"]:
+                    if storage.blob_sha_of(name) or os.path.islink(storage.path(name)):
+                        continue
+                    sha256 = sha256_of_path(storage.path(name))
+                    if sha256 in seen or os.path.exists(storage.blob_path(sha256)):
+                        saved += os.path.getsize(storage.path(name))
+                    seen.add(sha256)
+                    adopted += 1
+                    continue
+                sha256, freed = storage.adopt(name)
+                if sha256:
+                    adopted += 1
+                    saved += freed
+
+        verb = "Would adopt" if opts["dry_run"] else "Adopted"
+        self.stdout.write(self.style.SUCCESS(f"Files: {files}  {verb}: {adopted}  Bytes saved: {saved}"))
@@ -0,0 +1,34 @@
+# core/management/commands/run_import_jobs.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import fail_stale, run_job, worker_name
+
+
+class Command(BaseCommand):
+    help = "Process queued import jobs (IMPORT_JOBS_RUNNER=command); run one or more of these next to the web workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+        parser.add_argument("--poll", type=float, default=2.0, help="Seconds between queue checks when idle")
+
+    def handle(self, *args, **opts):
+        worker = worker_name()
+        done = 0
+        last_sweep = 0.0
+        while True:
+            if time.monotonic() - last_sweep > 60:
+                stale = fail_stale()
+                if stale:
+                    self.stdout.write(self.style.WARNING(f"Marked {stale} stale job(s) as failed"))
+                last_sweep = time.monotonic()
+            job = run_job(worker=worker)
+            if job is not None:
+                done += 1
+                self.stdout.write(f"{job.kind} {job.job_id}: {job.status}")
+                continue
+            if opts["once"]:
+                break
+            time.sleep(opts["poll"])
+        self.stdout.write(self.style.SUCCESS(f"Processed: {done}"))
@@ -1,7 +1,123 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-import uuid
+
+
+class CodeCounter(models.Model):
+    """عدّاد الأكواد لكل موديل (core.codes.CounterBackend)."""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "core_code_counter"
+        verbose_name = "Code Counter"
+        verbose_name_plural = "Code Counters"
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class StoredBlob(models.Model):
+    """blob واحد في الـ storage (core.storage.ContentAddressedStorage) + عدد الملفات اللي بتشاور عليه."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "core_stored_blob"
+        verbose_name = "Stored Blob"
+        verbose_name_plural = "Stored Blobs"
+
+    def __str__(self):
+        return f"{self.sha256[:12]}… ×{self.refcount}"
+
+
+class ImportJobStatus(models.TextChoices):
+    QUEUED = "queued", "Queued"
+    RUNNING = "running", "Running"
+    DONE = "done", "Done"
+    FAILED = "failed", "Failed"
+    CANCELLED = "cancelled", "Cancelled"
+
+
+class ImportJob(models.Model):
+    """استيراد في الخلفية (core.jobs): الملف بيترفع والـ job بيتعمل، والـ worker بيشتغل عليه على دفعات."""
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    kind = models.CharField(max_length=64)  # مفتاح في core.jobs.IMPORTERS (files.documents، customers، ...)
+    status = models.CharField(max_length=12, choices=ImportJobStatus.choices, default=ImportJobStatus.QUEUED)
+    file = models.FileField(upload_to="import_jobs/", blank=True, null=True)
+    filename = models.CharField(max_length=255, blank=True, default="")
+    options = models.JSONField(default=dict, blank=True)
+
+    stage = models.CharField(max_length=32, blank=True, default="")  # parsing / saving / ...
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    imported = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)  # أول IMPORT_JOB_MAX_ERRORS خطأ بس
+    result = models.JSONField(default=dict, blank=True)
+    message = models.TextField(blank=True, default="")
+
+    worker = models.CharField(max_length=100, blank=True, default="")
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "core_import_job"
+        ordering = ["-created_at", "-id"]
+        indexes = [models.Index(fields=["status", "created_at"], name="core_import_job_queue_idx")]
+        verbose_name = "Import Job"
+        verbose_name_plural = "Import Jobs"
+
+    def __str__(self):
+        return f"{self.kind} {self.job_id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (ImportJobStatus.DONE, ImportJobStatus.FAILED, ImportJobStatus.CANCELLED)
+
+
+class OutboxStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    SENDING = "sending", "Sending"
+    SENT = "sent", "Sent"
+    FAILED = "failed", "Failed"
+
+
+class OutboxEmail(models.Model):
+    """إيميل مستني يتبعت (core.outbox): الـ request بيكتب الـ row بس، والـ dispatcher بيبعت في الخلفية."""
+    subject = models.TextField()
+    body = models.TextField(blank=True, default="")
+    from_email = models.CharField(max_length=254, blank=True, default="")
+    to = models.JSONField(default=list)
+    ref = models.CharField(max_length=100, blank=True, default="")  # مصدر الإيميل (files.Document:12 مثلًا)
+
+    status = models.CharField(max_length=12, choices=OutboxStatus.choices, default=OutboxStatus.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    worker = models.CharField(max_length=100, blank=True, default="")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "core_outbox_email"
+        ordering = ["-created_at", "-id"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"], name="core_outbox_queue_idx")]
+        verbose_name = "Outbox Email"
+        verbose_name_plural = "Outbox Emails"
+
+    def __str__(self):
+        return f"{self.subject[:50]} → {', '.join(self.to)} ({self.status})"
 
 
 class ActiveManager(models.Manager):
@@ -22,17 +138,24 @@ class NameCodeBase(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.code:
-            prefix = self.__class__.__name__.upper()[:3]  # use model class as prefix
-            for _ in range(10):
-                unique_part = uuid.uuid4().hex[:6].upper()
-                generated_code = f"{prefix}-{unique_part}"
-                if not self.__class__.objects.filter(code=generated_code).exists():
-                    self.code = generated_code
-                    break
-            else:
-                raise ValueError("\u274c Failed to generate unique code after 10 attempts")
+            # كود متسلسل من الـ allocator (core.codes) — من غير exists() قبل الحفظ
+            self.code = self.generate_codes(1)[0]
         super().save(*args, **kwargs)
 
+    @classmethod
+    def generate_codes(cls, count):
+        """count كود جديد (PREFIX-0000001) — نفس اللي save() بيستخدمه."""
+        from core.codes import allocate_codes
+        return allocate_codes(cls, count)
+
+    @classmethod
+    def assign_codes(cls, objs):
+        """لـ bulk_create (save() مش بيتنده): يدّي كود لكل obj من غير كود ويرجّع نفس الليستة."""
+        missing = [obj for obj in objs if not obj.code]
+        for obj, code in zip(missing, cls.generate_codes(len(missing)) if missing else []):
+            obj.code = code
+        return objs
+
 class TrackableBase(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,234 @@
+# core/outbox.py
+"""
+Outbox للإيميلات — مفيش SMTP جوّه الـ request.
+
+- enqueue / enqueue_many: بيكتبوا OutboxEmail (pending) في نفس الـ transaction بتاعة التعديل
+  (لو الـ save اتعمله rollback الإيميل بيتلغي معاه) — مفيش network I/O.
+- الـ dispatcher (من غير broker):
+    EMAIL_OUTBOX_RUNNER = "thread"  → ThreadPoolExecutor في نفس الـ process (بعد الـ commit).
+    EMAIL_OUTBOX_RUNNER = "command" → `python manage.py dispatch_outbox` (loop منفصل).
+  بياخد دفعة (EMAIL_OUTBOX_BATCH_SIZE) بـ UPDATE ... WHERE status='pending' وبيبعتها على اتصال SMTP واحد.
+- الفشل: attempts + 1 والمحاولة الجاية بعد EMAIL_OUTBOX_RETRY_BASE * 2^(attempts-1) ثانية
+  (لحد EMAIL_OUTBOX_RETRY_MAX)؛ بعد EMAIL_OUTBOX_MAX_ATTEMPTS → failed والخطأ متسجل في last_error.
+- rows فضلت sending (الـ worker وقع في النص) بترجع pending بعد EMAIL_OUTBOX_STALE_SECONDS
+  (dispatch_outbox، أو sweep() كل EMAIL_OUTBOX_SWEEP_INTERVAL ثانية في الـ thread runner — وده كمان
+  اللي بيبعت الـ pending اللي فضلت من قبل restart).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .jobs import worker_name
+from .models import OutboxEmail, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+
+def runner():
+    return getattr(settings, "EMAIL_OUTBOX_RUNNER", "thread")
+
+
+def batch_size():
+    return int(getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 100))
+
+
+def max_attempts():
+    return int(getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5))
+
+
+def retry_delay(attempts) -> timedelta:
+    base = float(getattr(settings, "EMAIL_OUTBOX_RETRY_BASE", 60))
+    cap = float(getattr(settings, "EMAIL_OUTBOX_RETRY_MAX", 3600))
+    return timedelta(seconds=min(cap, base * 2 ** max(attempts - 1, 0)))
+
+
+# ======================== Enqueue ========================
+def _build(subject, body, to, from_email=None, ref=""):
+    return OutboxEmail(
+        subject=subject, body=body, to=list(to), ref=ref,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def enqueue(subject, body, to, from_email=None, ref="") -> OutboxEmail:
+    email = _build(subject, body, to, from_email, ref)
+    email.save()
+    kick()
+    return email
+
+
+def enqueue_many(messages) -> int:
+    """messages: [{"subject", "body", "to", "from_email"?, "ref"?}] — INSERT واحد (على دفعات)."""
+    emails = OutboxEmail.objects.bulk_create([_build(**m) for m in messages], batch_size=500)
+    if emails:
+        kick()
+    return len(emails)
+
+
+# ======================== Background ========================
+_executor = None
+_lock = threading.Lock()
+_scheduled = False
+_timer = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # worker واحد: الدفعات بتتبعت ورا بعض على اتصال واحد
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+    return _executor
+
+
+def kick():
+    """بعد الـ commit: يصحّي الـ dispatcher (thread) — مرة واحدة مهما اتنده."""
+    if runner() == "thread":
+        transaction.on_commit(_submit)
+
+
+def _submit():
+    global _scheduled
+    with _lock:
+        if _scheduled:
+            return
+        _scheduled = True
+    _get_executor().submit(_run)
+
+
+def _run():
+    global _scheduled
+    with _lock:
+        # أي enqueue من هنا ورايح هيعمل submit جديد (مفيش إيميل يتنسي)
+        _scheduled = False
+    try:
+        drain()
+        _schedule_retry()
+    except Exception:  # noqa: BLE001 — thread في الخلفية؛ ميوقعش الـ worker
+        logger.exception("Outbox dispatch failed")
+    finally:
+        close_old_connections()
+
+
+def _schedule_retry():
+    """الـ thread runner مفيهوش polling: timer لحد أقرب محاولة متأجلة."""
+    global _timer
+    next_at = OutboxEmail.objects.filter(status=OutboxStatus.PENDING).aggregate(at=Min("next_attempt_at"))["at"]
+    if next_at is None:
+        return
+    with _lock:
+        if _timer is not None:
+            _timer.cancel()
+        _timer = threading.Timer(max((next_at - timezone.now()).total_seconds(), 0) + 1, _submit)
+        _timer.daemon = True
+        _timer.start()
+
+
+def sweep():
+    """
+    thread runner (core.sweeper): بعد restart مفيش enqueue يعمل kick —
+    الـ sending اللي فضلت من process وقع ترجع pending، والـ pending كلها تتبعت.
+    """
+    released = release_stale()
+    if OutboxEmail.objects.filter(status=OutboxStatus.PENDING, next_attempt_at__lte=timezone.now()).exists():
+        _submit()
+    return released
+
+
+# ======================== Dispatch ========================
+def claim(limit=None, worker=None):
+    """يحجز دفعة pending اللي معادها جه. يرجّع (worker, [OutboxEmail])."""
+    worker = worker or worker_name()
+    now = timezone.now()
+    ids = list(
+        OutboxEmail.objects.filter(status=OutboxStatus.PENDING, next_attempt_at__lte=now)
+        .order_by("next_attempt_at", "id").values_list("pk", flat=True)[:limit or batch_size()]
+    )
+    if not ids:
+        return worker, []
+    OutboxEmail.objects.filter(pk__in=ids, status=OutboxStatus.PENDING).update(
+        status=OutboxStatus.SENDING, worker=worker, claimed_at=now,
+    )
+    # اللي اتحجز لـ worker تاني في نفس اللحظة مش هيرجع هنا
+    return worker, list(OutboxEmail.objects.filter(pk__in=ids, status=OutboxStatus.SENDING, worker=worker))
+
+
+def _failed(email, error, now):
+    email.attempts += 1
+    email.last_error = error
+    if email.attempts >= max_attempts():
+        email.status = OutboxStatus.FAILED
+    else:
+        email.status = OutboxStatus.PENDING
+        email.next_attempt_at = now + retry_delay(email.attempts)
+    return email
+
+
+def dispatch(limit=None, worker=None) -> dict:
+    """دفعة واحدة على اتصال SMTP واحد. يرجّع {"sent", "retry", "failed"}."""
+    worker, batch = claim(limit, worker)
+    result = {"sent": 0, "retry": 0, "failed": 0}
+    if not batch:
+        return result
+
+    sent, failed = [], []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:  # noqa: BLE001 — السيرفر مش متاح: الدفعة كلها تتأجل
+        logger.warning(f"Outbox: could not connect to mail server: {e}")
+        failed = [(email, f"connect: {e}") for email in batch]
+    else:
+        try:
+            for email in batch:
+                message = EmailMessage(email.subject, email.body, email.from_email, email.to, connection=connection)
+                try:
+                    message.send()
+                except Exception as e:  # noqa: BLE001 — رسالة واحدة (عنوان مرفوض مثلًا) متوقفش الباقي
+                    failed.append((email, str(e) or e.__class__.__name__))
+                else:
+                    sent.append(email.pk)
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    if sent:
+        OutboxEmail.objects.filter(pk__in=sent).update(
+            status=OutboxStatus.SENT, sent_at=now, last_error="", worker="", claimed_at=None,
+        )
+    if failed:
+        rows = [_failed(email, error, now) for email, error in failed]
+        for email in rows:
+            email.worker, email.claimed_at = "", None
+        OutboxEmail.objects.bulk_update(
+            rows, ["status", "attempts", "last_error", "next_attempt_at", "worker", "claimed_at"]
+        )
+    result["sent"] = len(sent)
+    for email, _ in failed:
+        result["failed" if email.status == OutboxStatus.FAILED else "retry"] += 1
+    return result
+
+
+def drain(worker=None) -> dict:
+    """dispatch لحد ما مفيش حاجة معادها جه."""
+    total = {"sent": 0, "retry": 0, "failed": 0}
+    while True:
+        result = dispatch(worker=worker)
+        for key, value in result.items():
+            total[key] += value
+        if not any(result.values()):
+            return total
+
+
+def release_stale(older_than=None) -> int:
+    """sending من غير ما يخلص (الـ worker وقع) → pending تاني (ممكن الإيميل يتبعت مرتين؛ أحسن من إنه يضيع)."""
+    older_than = older_than or timedelta(seconds=int(getattr(settings, "EMAIL_OUTBOX_STALE_SECONDS", 600)))
+    return OutboxEmail.objects.filter(
+        status=OutboxStatus.SENDING, claimed_at__lt=timezone.now() - older_than
+    ).update(status=OutboxStatus.PENDING, worker="", claimed_at=None)
@@ -0,0 +1,169 @@
+# core/pagination.py
+"""
+Keyset (cursor) pagination — بدون COUNT(*) وبدون OFFSET.
+
+الصفحة الجاية بتتحدد من آخر صف في الصفحة الحالية (WHERE (a, b) > (x, y))،
+فعمق الصفحة مش بيأثر على سرعة الاستعلام طالما فيه index على أعمدة الترتيب.
+"""
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    orderings: اسم الترتيب → tuple أعمدة (آخر عمود لازم يكون unique زي id/code).
+    الاتجاه بيتحدد بعلامة "-" على أول عمود، وكل الأعمدة لازم تكون في نفس الاتجاه.
+    """
+    orderings = {
+        "created": ("-created_at", "-id"),
+    }
+    default_ordering = "created"
+    ordering_query_param = "order"
+    cursor_query_param = "cursor"
+    page_size = 25
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    invalid_cursor_message = "Invalid cursor"
+
+    # -------- helpers --------
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                size = int(raw)
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (TypeError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering_key(self, request):
+        key = request.query_params.get(self.ordering_query_param) or self.default_ordering
+        return key if key in self.orderings else self.default_ordering
+
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def _decode_value(self, queryset, field, raw):
+        if raw is None:
+            return None
+        internal = queryset.model._meta.get_field(field).get_internal_type()
+        if internal == "DateTimeField":
+            return parse_datetime(raw)
+        if internal == "DateField":
+            return parse_date(raw)
+        return raw
+
+    def encode_cursor(self, ordering_key, values):
+        payload = json.dumps({"o": ordering_key, "v": [self._encode_value(v) for v in values]},
+                             separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            padded = raw + "=" * (-len(raw) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+            return data["o"], list(data["v"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _seek_filter(self, queryset, fields, values):
+        """(a, b, c) بعد (x, y, z) = a>x OR (a=x AND b>y) OR (a=x AND b=y AND c>z)."""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(fields, values):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            value = self._decode_value(queryset, field, value)
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+        return condition
+
+    # -------- DRF API --------
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.ordering_key = self.get_ordering_key(request)
+        fields = self.orderings[self.ordering_key]
+
+        queryset = queryset.order_by(*fields)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            cursor_ordering, values = cursor
+            if cursor_ordering != self.ordering_key or len(values) != len(fields):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                queryset = queryset.filter(self._seek_filter(queryset, fields, values))
+            except (TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # صف زيادة علشان نعرف فيه صفحة بعدها ولا لأ (بدل COUNT)
+        rows = list(queryset[:self.page_size_value + 1])
+        self.has_next = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+
+        self.next_cursor = None
+        if self.has_next and rows:
+            last = rows[-1]
+            self.next_cursor = self.encode_cursor(
+                self.ordering_key,
+                [getattr(last, f.lstrip("-")) for f in fields],
+            )
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.ordering_query_param, self.ordering_key)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("next_cursor", self.next_cursor),
+            ("page_size", self.page_size_value),
+            ("ordering", self.ordering_key),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "next_cursor": {"type": "string", "nullable": True},
+                "page_size": {"type": "integer"},
+                "ordering": {"type": "string", "enum": list(self.orderings)},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {"name": self.cursor_query_param, "required": False, "in": "query",
+             "description": "Opaque cursor returned as next_cursor.", "schema": {"type": "string"}},
+            {"name": self.ordering_query_param, "required": False, "in": "query",
+             "description": "Keyset ordering.", "schema": {"type": "string", "enum": list(self.orderings)}},
+            {"name": self.page_size_query_param, "required": False, "in": "query",
+             "description": "Rows per page.", "schema": {"type": "integer"}},
+        ]
@@ -4,5 +4,6 @@ from .base_fields import (
     TrackableFieldsMixinSerializer,
     BankAccountFieldsMixinSerializer,
     BasePersonFieldsMixinSerializer,
-    BaseCompanyFieldsMixinSerializer
+    BaseCompanyFieldsMixinSerializer,
+    ImageDerivativesField,
 )
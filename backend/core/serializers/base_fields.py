@@ -1,7 +1,20 @@
 from rest_framework import serializers
+from core.images import urls_for
 from shared.serializers import CountrySerializer, CitySerializer, ClassificationSerializer, GenderSerializer, NationalitySerializer, BankSerializer
 
 
+# ========== Image Derivatives ==========
+class ImageDerivativesField(serializers.Field):
+    """{"sm": url, "md": url, "lg": url} للصورة (null للمقاس اللي لسه متعملش) — بيقرا بس، core.images."""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return urls_for(value, self.context.get("request"))
+
+
 # ========== Name & Code Base ==========
 class NameCodeFieldsMixinSerializer(serializers.Serializer):
     name_ar = serializers.CharField()
@@ -94,6 +107,7 @@ class BasePersonFieldsMixinSerializer(serializers.Serializer):
 
     signature_attachment = serializers.FileField(required=False)
     personal_image_attachment = serializers.ImageField(required=False)
+    personal_image_thumbnails = ImageDerivativesField(source="personal_image_attachment")
 
 
 # ========== Base Company ==========
@@ -104,6 +118,8 @@ class BaseCompanyFieldsMixinSerializer(serializers.Serializer):
 
     stamp_attachment = serializers.ImageField(required=False)
     logo_attachment = serializers.ImageField(required=False)
+    stamp_thumbnails = ImageDerivativesField(source="stamp_attachment")
+    logo_thumbnails = ImageDerivativesField(source="logo_attachment")
 
     classification = ClassificationSerializer(read_only=True)
     classification_id = serializers.PrimaryKeyRelatedField(
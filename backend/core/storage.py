@@ -0,0 +1,313 @@
+# core/storage.py
+"""
+Storage بيخزن المحتوى مرة واحدة (content-addressed) لكل الـ FileFields.
+
+- المحتوى بيتخزن في blob واحد: MEDIA_BLOB_ROOT/ab/cd/<sha256>.
+- الاسم العادي (upload_to زي national_ids/… أو tenders/<code>/…) بيبقى hard link للـ blob
+  (أو symlink لو الـ hard link مش ممكن، وآخر حل نسخة عادية) — فالـ URLs والـ MEDIA serving زي ما هم.
+- نفس الملف مرفوع 3 مرات = blob واحد على الديسك؛ الرفع التاني مش بيكتب حاجة (بس link).
+- core.StoredBlob.refcount بيتزوّد مع كل save ويقل مع كل delete؛ لما يوصل 0 الـ blob بيتمسح.
+  الـ link/unlink والـ refcount تحت select_for_update على نفس الـ row؛ الـ delete جوّه transaction
+  بيستنى الـ commit، والـ links اللي اتعملت في transaction اتعملها rollback بتتشال (discard_rolled_back).
+
+الإعدادات:
+    MEDIA_DEDUP = True/False                   (settings → DEFAULT_FILE_STORAGE)
+    MEDIA_BLOB_ROOT = MEDIA_ROOT/.blobs
+    MEDIA_DEDUP_LINK = "hardlink" | "symlink"
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 64 * 1024
+
+
+def sha256_of_path(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def __init__(self, location=None, base_url=None, file_permissions_mode=None,
+                 directory_permissions_mode=None, blob_location=None, link_mode=None):
+        super().__init__(location, base_url, file_permissions_mode, directory_permissions_mode)
+        self._blob_location = blob_location
+        self._link_mode = link_mode
+
+    # -------- blobs --------
+    @property
+    def blob_location(self):
+        return os.path.abspath(str(
+            self._blob_location
+            or getattr(settings, "MEDIA_BLOB_ROOT", None)
+            or os.path.join(self.location, ".blobs")
+        ))
+
+    @property
+    def link_mode(self):
+        return self._link_mode or getattr(settings, "MEDIA_DEDUP_LINK", "hardlink")
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blob_location, sha256[:2], sha256[2:4], sha256)
+
+    def _ingest(self, content):
+        """
+        يرجّع (sha256, size, tmp_path) — tmp_path ملف مؤقت جنب الـ blobs (نفس الـ filesystem
+        علشان os.replace تبقى atomic). هل الـ blob موجود ولا لأ بيتقرر بعدين تحت الـ lock (_place).
+        """
+        os.makedirs(self.blob_location, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.blob_location, suffix=".tmp")
+        if hasattr(content, "temporary_file_path"):
+            # ملف على الديسك بالفعل (TemporaryUploadedFile / staging): hash بالقراءة ونقل بدل نسخ
+            os.close(fd)
+            source = content.temporary_file_path()
+            sha256 = getattr(content, "sha256", None) or sha256_of_path(source)
+            size = os.path.getsize(source)
+            file_move_safe(source, tmp, allow_overwrite=True)
+            return sha256, size, tmp
+
+        digest, size = hashlib.sha256(), 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        return digest.hexdigest(), size, tmp
+
+    def _place(self, sha256, tmp):
+        """تحت الـ lock: الـ blob لو مش موجود ييجي من tmp، ولو موجود tmp يتشال."""
+        blob = self.blob_path(sha256)
+        if os.path.exists(blob):
+            os.remove(tmp)
+            return blob
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        os.replace(tmp, blob)
+        if self.file_permissions_mode is not None:
+            os.chmod(blob, self.file_permissions_mode)
+        return blob
+
+    def _link(self, blob, full_path):
+        """hard link → symlink → نسخة. FileExistsError لو الاسم اتاخد (الـ caller يجرب اسم تاني)."""
+        if self.link_mode == "hardlink":
+            try:
+                os.link(blob, full_path)
+                return
+            except FileExistsError:
+                raise
+            except OSError:
+                pass  # filesystem مختلف / مش مدعوم
+        try:
+            os.symlink(blob, full_path)
+            return
+        except FileExistsError:
+            raise
+        except OSError:
+            pass
+        fd = os.open(full_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+        with os.fdopen(fd, "wb") as out, open(blob, "rb") as src:
+            for block in iter(lambda: src.read(READ_SIZE), b""):
+                out.write(block)
+
+    # -------- refcount --------
+    # الـ link والـ blob على الديسك بيتعملوا/يتمسحوا تحت select_for_update على الـ StoredBlob row،
+    # فـ _save و _release لنفس المحتوى مبيتداخلوش (الـ lock بيفضل لحد commit الـ transaction الخارجية).
+    def _locked(self, sha256, size=0):
+        from core.models import StoredBlob
+
+        blob, _ = StoredBlob.objects.select_for_update().get_or_create(
+            sha256=sha256, defaults={"size": size, "refcount": 0}
+        )
+        return blob
+
+    def _acquire(self, blob):
+        from core.models import StoredBlob
+
+        StoredBlob.objects.filter(pk=blob.pk).update(refcount=F("refcount") + 1)
+
+    def _release(self, sha256):
+        """refcount - 1؛ لو وصل 0 الـ row والـ blob بيتمسحوا تحت نفس الـ lock."""
+        from core.models import StoredBlob
+
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is None:
+                return
+            if blob.refcount > 1:
+                StoredBlob.objects.filter(pk=blob.pk).update(refcount=F("refcount") - 1)
+                return
+            blob.delete()
+            self._remove_blob(sha256)
+
+    def _remove_blob(self, sha256):
+        try:
+            os.remove(self.blob_path(sha256))
+        except FileNotFoundError:
+            pass
+
+    def _points_to(self, full_path, sha256):
+        blob = self.blob_path(sha256)
+        try:
+            if os.path.islink(full_path):
+                return os.path.realpath(full_path) == os.path.realpath(blob)
+            return os.path.samefile(full_path, blob)
+        except FileNotFoundError:
+            return False
+
+    def _track(self, name, sha256):
+        """
+        الـ link اتعمل جوّه transaction: لو اتعملها rollback الـ refcount بيرجع لكن الـ link
+        بيفضل على الديسك → discard_rolled_back() بيشيله (on_commit هو اللي بيأكد إنه اتسجل).
+        """
+        entry = {"storage": self, "name": name, "sha256": sha256, "committed": False}
+        _pending_links().append(entry)
+        transaction.on_commit(lambda: entry.update(committed=True))
+
+    def _discard(self, name, sha256):
+        with transaction.atomic():
+            # get_or_create مش filter: لو save تاني لسه مكملش لنفس المحتوى بنستنى الـ commit بتاعه
+            blob = self._locked(sha256)
+            full_path = self.path(name)
+            if self._points_to(full_path, sha256):
+                os.remove(full_path)
+            if blob.refcount == 0:
+                blob.delete()
+                self._remove_blob(sha256)
+
+    def blob_sha_of(self, name):
+        """الـ sha256 للاسم ده لو مربوط بـ blob (symlink → من الهدف، hard link → بالـ hash)، وإلا None."""
+        full_path = self.path(name)
+        if os.path.islink(full_path):
+            target = os.path.realpath(full_path)
+            if os.path.dirname(os.path.dirname(os.path.dirname(target))) == os.path.realpath(self.blob_location):
+                return os.path.basename(target)
+            return None
+        try:
+            st = os.stat(full_path)
+        except FileNotFoundError:
+            return None
+        if st.st_nlink < 2:
+            return None
+        sha256 = sha256_of_path(full_path)
+        return sha256 if os.path.exists(self.blob_path(sha256)) else None
+
+    # -------- Storage API --------
+    def _save(self, name, content):
+        discard_rolled_back()
+        sha256, size, tmp = self._ingest(content)
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        try:
+            with transaction.atomic():
+                row = self._locked(sha256, size)
+                blob = self._place(sha256, tmp)
+                tmp = None
+                while True:
+                    try:
+                        self._link(blob, full_path)
+                        break
+                    except FileExistsError:
+                        # الاسم اتاخد بين get_available_name والـ link (نفس سلوك FileSystemStorage)
+                        name = self.get_available_name(name)
+                        full_path = self.path(name)
+                self._track(name, sha256)
+                self._acquire(row)
+        finally:
+            if tmp is not None:
+                os.remove(tmp)
+        return str(name).replace("\\", "/")
+
+    def delete(self, name):
+        """جوّه transaction: المسح (الاسم + الـ refcount) بيستنى الـ commit — الـ rollback بيسيب الملف زي ما هو."""
+        if not name:
+            raise ValueError("The name must be given to delete().")
+        transaction.on_commit(lambda: self._delete_now(name))
+
+    def _delete_now(self, name):
+        discard_rolled_back()
+        sha256 = self.blob_sha_of(name)
+        super().delete(name)
+        if sha256:
+            self._release(sha256)
+
+    def adopt(self, name):
+        """
+        ملف قديم (نسخة عادية) → blob + hard link (للـ backfill: media_dedupe).
+        يرجّع (sha256, saved_bytes).
+        """
+        full_path = self.path(name)
+        if os.path.islink(full_path) or self.blob_sha_of(name):
+            return None, 0
+        sha256 = sha256_of_path(full_path)
+        size = os.path.getsize(full_path)
+        blob = self.blob_path(sha256)
+        with transaction.atomic():
+            row = self._locked(sha256, size)
+            saved = 0
+            if os.path.exists(blob):
+                saved = size
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                # الملف نفسه يبقى الـ blob (link قبل ما نشيل الاسم القديم)
+                try:
+                    os.link(full_path, blob)
+                except OSError:
+                    with open(full_path, "rb") as src, open(blob, "wb") as out:
+                        for block in iter(lambda: src.read(READ_SIZE), b""):
+                            out.write(block)
+            tmp = full_path + ".dedupe"
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+            self._link(blob, tmp)
+            os.replace(tmp, full_path)
+            self._acquire(row)
+        return sha256, saved
+
+
+# ======================== Rollback cleanup ========================
+_local = threading.local()
+
+
+def _pending_links():
+    if not hasattr(_local, "links"):
+        _local.links = []
+    return _local.links
+
+
+def discard_rolled_back():
+    """
+    links اتعملت في transaction خلصت من غير commit (on_commit ماتنفذش) → تتشال، والـ blob
+    لو مبقاش ليه refcount. بيتنده قبل أي save/delete برّه transaction وفي آخر كل request.
+    """
+    if transaction.get_connection().in_atomic_block:
+        return 0
+    links = _pending_links()
+    _local.links = []
+    discarded = 0
+    for entry in links:
+        if entry["committed"]:
+            continue
+        try:
+            entry["storage"]._discard(entry["name"], entry["sha256"])
+            discarded += 1
+        except Exception:  # noqa: BLE001 — cleanup؛ الـ request نفسه خلص خلاص
+            logger.exception("Could not discard rolled-back media link %s", entry["name"])
+    return discarded
@@ -0,0 +1,39 @@
+# core/sweeper.py
+"""
+sweeps دورية جوّه الـ web process (لما الـ runner = "thread" ومفيش worker منفصل).
+
+بعد restart للـ process مفيش enqueue جديد يصحّي الـ executor: الـ sweep هو اللي بيلم
+الشغل اللي فضل (queued / stale). بيبدأ مع أول request (مش في ready() علشان migrate/shell
+ميشغلوش threads) وبيتكرر كل interval ثانية في daemon thread.
+"""
+import logging
+import threading
+import time
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_started = set()
+_lock = threading.Lock()
+
+
+def start(name, interval, func):
+    """func() فورًا وبعدين كل interval ثانية — مرة واحدة لكل name في الـ process."""
+    with _lock:
+        if name in _started:
+            return False
+        _started.add(name)
+
+    def loop():
+        while True:
+            try:
+                func()
+            except Exception:  # noqa: BLE001 — الـ sweep الجاي هيحاول تاني
+                logger.exception("Sweep %s failed", name)
+            finally:
+                close_old_connections()
+            time.sleep(interval)
+
+    threading.Thread(target=loop, name=f"sweep-{name}", daemon=True).start()
+    return True
@@ -0,0 +1,76 @@
+import pytest
+
+from core import cache as app_cache
+from core.cache import TAG_KEY, build_key, cached, get_cache, invalidate_tags, metrics
+
+
+@pytest.fixture(autouse=True)
+def locmem(settings):
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                                   "LOCATION": "core-cache-tests"}}
+    get_cache().clear()
+    metrics.reset()
+    yield
+    get_cache().clear()
+
+
+def test_cached_hits_until_tag_is_invalidated():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cached("ns", 1, compute=compute, tags=["t"]) == (1, False)
+    assert cached("ns", 1, compute=compute, tags=["t"]) == (1, True)
+    invalidate_tags("t")
+    assert cached("ns", 1, compute=compute, tags=["t"]) == (2, False)
+    assert metrics.snapshot()["namespaces"]["ns"] == {"hits": 1, "misses": 2, "sets": 2, "invalidations": 1}
+
+
+def test_evicted_tag_never_reuses_an_old_version():
+    seen = {build_key("ns", 1, tags=["t"])}
+    invalidate_tags("t")
+    seen.add(build_key("ns", 1, tags=["t"]))
+
+    get_cache().delete(TAG_KEY.format("t"))  # eviction
+    fresh = build_key("ns", 1, tags=["t"])
+    assert fresh not in seen
+    seen.add(fresh)
+
+    get_cache().delete(TAG_KEY.format("t"))
+    invalidate_tags("t")  # invalidate بعد eviction
+    assert build_key("ns", 1, tags=["t"]) not in seen
+
+
+def test_new_versions_are_seeded_from_the_clock(monkeypatch):
+    monkeypatch.setattr(app_cache.time, "time_ns", lambda: 1_000)
+    assert app_cache.tag_versions(["a"]) == {"a": 1_000}
+    monkeypatch.setattr(app_cache.time, "time_ns", lambda: 5_000)
+    invalidate_tags("b")
+    assert app_cache.tag_versions(["a", "b"]) == {"a": 1_000, "b": 5_000}
+
+
+def test_key_length_does_not_grow_with_tags():
+    import warnings
+
+    from django.core.cache.backends.base import CacheKeyWarning
+
+    tags = [f"lookup:shared.table_{i}" for i in range(11)]
+    key = build_key("lookups-bootstrap", tags=tags)
+    assert len(key) == len(build_key("lookups-bootstrap")) < 100
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", CacheKeyWarning)
+        assert cached("lookups-bootstrap", compute=lambda: 1, tags=tags) == (1, False)
+
+
+def test_invalidations_are_counted_per_namespace():
+    cached("a", compute=lambda: 1, tags=["shared"])
+    cached("b", compute=lambda: 1, tags=["shared", "only-b"])
+    invalidate_tags("shared", "only-b", "unused")
+
+    namespaces = metrics.snapshot()["namespaces"]
+    assert namespaces["a"]["invalidations"] == 1
+    assert namespaces["b"]["invalidations"] == 2
+    assert namespaces[TAG_KEY.format("unused")]["invalidations"] == 1
+    assert "shared" not in namespaces
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.codes import BlockAllocator, CounterBackend, SequenceBackend, allocate_codes, build_allocator
+from core.models import CodeCounter
+from suppliers.models import Supplier
+
+postgres_only = pytest.mark.skipif(connection.vendor != "postgresql", reason="sequences need PostgreSQL")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_counter_blocks_hand_out_unique_numbers_with_one_query_per_block():
+    allocator = BlockAllocator(CounterBackend(), block_size=5)
+    with CaptureQueriesContext(connection) as ctx:
+        first = allocator.numbers("x", 3)
+    reserve_queries = len(ctx)
+    with CaptureQueriesContext(connection) as ctx:
+        second = allocator.numbers("x", 2)
+    assert len(ctx) == 0  # من الـ block اللي في الذاكرة
+
+    third = allocator.numbers("x", 4)
+    assert first + second + third == list(range(1, 10))
+    assert reserve_queries and CodeCounter.objects.get(name="x").value == 10
+
+
+@pytest.mark.django_db(transaction=True)
+def test_counter_does_not_pool_numbers_that_can_roll_back():
+    allocator = BlockAllocator(CounterBackend(), block_size=10)
+    with pytest.raises(RuntimeError), transaction.atomic():
+        assert allocator.numbers("x", 1) == [1]
+        raise RuntimeError
+    # الحجز رجع مع الـ rollback؛ مفيش block في الذاكرة يدي نفس الرقم مرتين
+    assert allocator.numbers("x", 2) == [1, 2]
+    assert allocator.numbers("x", 1) == [3]
+
+
+@pytest.mark.django_db
+def test_allocate_codes_follow_counter():
+    codes = allocate_codes(Supplier, 2)
+    assert codes == ["SUP-0000001", "SUP-0000002"]
+    s = Supplier.objects.create(name_ar="أ", name_en="A")
+    assert s.code.startswith("SUP-") and s.code not in codes
+
+
+@postgres_only
+@pytest.mark.django_db
+def test_sequence_is_created_once_per_process():
+    backend = SequenceBackend(prefix="test_code_seq_", start=lambda name, db: 41)
+    assert backend.reserve("x", 2, "default") == [41, 42]
+    with CaptureQueriesContext(connection) as ctx:
+        assert backend.reserve("x", 1, "default") == [43]
+    assert not any("CREATE SEQUENCE" in q["sql"] for q in ctx.captured_queries)
+
+
+@postgres_only
+@pytest.mark.django_db
+def test_dropped_sequence_is_recreated_inside_a_transaction():
+    backend = SequenceBackend(prefix="test_code_seq_", start=lambda name, db: 7)
+    backend.reserve("y", 1, "default")
+    with connection.cursor() as cursor:
+        cursor.execute('DROP SEQUENCE "test_code_seq_y"')
+    assert backend.reserve("y", 1, "default") == [7]
+
+
+@pytest.mark.django_db
+def test_auto_mode_uses_counter_off_postgres():
+    allocator = build_allocator("auto", 1)
+    expected = SequenceBackend if connection.vendor == "postgresql" else CounterBackend
+    assert isinstance(allocator.backend, expected)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_counter_catches_up_with_its_floor_once():
+    floor_calls = []
+
+    def floor(name, using):
+        floor_calls.append(name)
+        return 41
+
+    CodeCounter.objects.create(name="x", value=3)
+    backend = CounterBackend(floor=floor)
+    assert backend.reserve("x", 2, "default") == [42, 43]
+    assert backend.reserve("x", 1, "default") == [44]
+    assert floor_calls == ["x"]
+
+    # العدّاد سابق الـ floor أصلًا → مفيش رجوع لورا
+    assert CounterBackend(floor=lambda name, using: 10).reserve("x", 1, "default") == [45]
@@ -0,0 +1,67 @@
+import io
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+from rest_framework.test import APIRequestFactory
+
+from core import images
+from customers.models import Company, Customer
+from customers.serializers.customer import CustomerSerializer
+from suppliers.models import Supplier
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(images, "schedule_for_instance", calls.append)
+    return calls
+
+
+@pytest.mark.django_db
+def test_derivatives_receiver_only_runs_for_person_and_company_models(scheduled):
+    get_user_model().objects.create_user(username="u", password="x")
+    assert scheduled == []
+
+    supplier = Supplier.objects.create(name_ar="أ", name_en="A")
+    assert scheduled == [supplier]
+
+
+def _png(size=(800, 600)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buf, format="PNG")
+    return ContentFile(buf.getvalue(), name="logo.png")
+
+
+@pytest.mark.django_db
+def test_serializer_only_reads_existing_derivatives(monkeypatch):
+    customer = Customer.objects.create(name_ar="ع", name_en="C", customer_type="commercial")
+    # من غير on_commit: الأصل اتحفظ بس الـ thumbnails لسه متعملتش
+    company = Company.objects.create(customer=customer, logo_attachment=_png())
+    monkeypatch.setattr(images, "schedule", lambda name: pytest.fail("serializer scheduled generation"))
+
+    data = CustomerSerializer(customer).data["company"]
+
+    assert data["logo_thumbnails"] == {size: None for size in images.sizes()}
+    assert data["stamp_thumbnails"] is None
+    assert not any(default_storage.exists(images.derivative_name(company.logo_attachment.name, s))
+                   for s in images.sizes())
+
+
+@pytest.mark.django_db
+def test_post_save_builds_derivatives_and_serializer_returns_urls(django_capture_on_commit_callbacks):
+    customer = Customer.objects.create(name_ar="ع", name_en="C", customer_type="commercial")
+    with django_capture_on_commit_callbacks(execute=True):
+        company = Company.objects.create(customer=customer, logo_attachment=_png())
+
+    request = APIRequestFactory().get("/api/customers/")
+    thumbs = CustomerSerializer(customer, context={"request": request}).data["company"]["logo_thumbnails"]
+
+    assert set(thumbs) == set(images.sizes())
+    for size, px in images.sizes().items():
+        name = images.derivative_name(company.logo_attachment.name, size)
+        assert thumbs[size] == request.build_absolute_uri(default_storage.url(name))
+        with Image.open(default_storage.path(name)) as thumb:
+            assert max(thumb.size) == px
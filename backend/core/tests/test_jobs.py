@@ -0,0 +1,146 @@
+import datetime
+import io
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from openpyxl import Workbook
+from rest_framework.test import APIClient
+
+from core.jobs import cancel, enqueue, run_job
+from core.models import ImportJob, ImportJobStatus
+from files.models import Document
+
+HEADER = ["Title", "Category", "Expires On", "Owner Email", "Alert Window Days", "Notes"]
+
+
+def xlsx(rows, header=HEADER):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return SimpleUploadedFile("documents.xlsx", buf.getvalue())
+
+
+def cancel_in_second_batch(job, file_obj, progress):
+    imported = 0
+    for batch in range(3):
+        if batch == 1:
+            # المستخدم لغى الـ job والدفعة التانية شغالة
+            cancel(ImportJob.objects.get(pk=job.pk))
+        with transaction.atomic():
+            Document.objects.bulk_create([
+                Document(title=f"{batch}-{i}", expires_on=datetime.date(2031, 1, 1)) for i in range(10)
+            ])
+            imported += 10
+            progress("saving", processed=imported, imported=imported, force=True)
+    return {"imported": imported}
+
+
+def cancel_after_last_progress(job, file_obj, progress):
+    progress("saving", processed=1, total=1, imported=1, force=True)
+    cancel(ImportJob.objects.get(pk=job.pk))
+    return {"total_rows": 1, "imported": 1, "errors": []}
+
+
+@pytest.fixture
+def kinds(settings):
+    settings.IMPORT_JOB_KINDS = {
+        "test.cancel_in_batch": "core.tests.test_jobs.cancel_in_second_batch",
+        "test.cancel_after_progress": "core.tests.test_jobs.cancel_after_last_progress",
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_document_import_job(settings):
+    settings.IMPORT_JOB_PROGRESS_INTERVAL = 0
+    user = get_user_model().objects.create_user(username="u", password="x")
+    client = APIClient()
+    client.force_authenticate(user)
+    rows = [[f"d{i}", "C", datetime.date(2031, 1, 1), "", 7, ""] for i in range(30)] + [["", "C", None, None, None, None]]
+
+    r = client.post("/api/files/import/jobs/", {"file": xlsx(rows)}, format="multipart")
+    assert r.status_code == 202 and r.data["status"] == "queued"
+    assert run_job(worker="t").status == ImportJobStatus.DONE
+    data = client.get(f"/api/core/import-jobs/{r.data['job_id']}/").data
+    assert data["imported"] == 30 and data["error_count"] == 1 and data["errors"][0]["row"] == 32
+    assert Document.objects.count() == 30
+    assert not ImportJob.objects.get(job_id=r.data["job_id"]).file
+
+    client.post("/api/files/import/jobs/", {"file": xlsx(rows[:2], header=["x"])}, format="multipart")
+    job = run_job(worker="t")
+    job.refresh_from_db()
+    assert job.status == ImportJobStatus.FAILED and job.result["expected"] == HEADER
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cancel_queued_job():
+    job = enqueue("files.documents", xlsx([]))
+    assert cancel(job)
+    assert run_job(worker="t") is None
+    job.refresh_from_db()
+    assert job.status == ImportJobStatus.CANCELLED and not job.file
+    assert not cancel(job)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cancel_mid_batch_counts_only_committed_rows(kinds):
+    job = enqueue("test.cancel_in_batch", xlsx([]))
+    run_job(job.pk, worker="t")
+    job.refresh_from_db()
+    # الدفعة التانية اتعملها rollback لما progress لقى الـ job اتلغى
+    assert Document.objects.count() == 10
+    assert job.status == ImportJobStatus.CANCELLED and job.imported == 10
+
+
+@pytest.mark.django_db(transaction=True)
+def test_done_does_not_overwrite_cancelled(kinds):
+    job = enqueue("test.cancel_after_progress", xlsx([]))
+    run_job(job.pk, worker="t")
+    job.refresh_from_db()
+    assert job.status == ImportJobStatus.CANCELLED and job.imported == 1
+
+
+class _InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sweep_recovers_jobs_after_restart(settings, monkeypatch):
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from core import jobs
+
+    # اتعملوا قبل الـ restart: واحد فضل queued وواحد كان running والـ worker وقع
+    queued = enqueue("files.documents", xlsx([["a", "", datetime.date(2031, 1, 1), "", 7, ""]]))
+    crashed = enqueue("files.documents", xlsx([]))
+    ImportJob.objects.filter(pk=crashed.pk).update(
+        status=ImportJobStatus.RUNNING, heartbeat_at=timezone.now() - timedelta(hours=1)
+    )
+
+    settings.IMPORT_JOBS_RUNNER = "thread"
+    monkeypatch.setattr(jobs, "_get_executor", lambda: _InlineExecutor())
+    assert jobs.sweep() == (1, 1)
+    queued.refresh_from_db()
+    crashed.refresh_from_db()
+    assert queued.status == ImportJobStatus.DONE and queued.imported == 1
+    assert crashed.status == ImportJobStatus.FAILED
+
+
+@pytest.mark.django_db
+def test_job_list_limit_is_clamped():
+    user = get_user_model().objects.create_user(username="u", password="x")
+    for _ in range(3):
+        enqueue("files.documents", xlsx([]), user=user)
+    client = APIClient()
+    client.force_authenticate(user)
+    for limit, expected in (("abc", 3), ("-3", 3), ("0", 3), ("2", 2), ("999", 3)):
+        r = client.get("/api/core/import-jobs/", {"limit": limit})
+        assert r.status_code == 200 and len(r.data) == expected, limit
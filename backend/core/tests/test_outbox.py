@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from core import outbox
+from core.models import OutboxEmail, OutboxStatus
+from files.models import Document
+
+
+@pytest.fixture(autouse=True)
+def _empty_mailbox():
+    mail.outbox = []
+
+
+def _boom(self, messages):
+    raise OSError("mail server said no")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_document_save_only_enqueues():
+    doc = Document.objects.create(
+        title="Visa", expires_on=timezone.localdate() + timedelta(days=2), owner_email="a@x.com", alert_window_days=7,
+    )
+    assert mail.outbox == []
+    email = OutboxEmail.objects.get()
+    assert email.status == OutboxStatus.PENDING and email.to == ["a@x.com"] and email.ref == f"files.Document:{doc.pk}"
+
+    assert outbox.drain() == {"sent": 1, "retry": 0, "failed": 0}
+    assert len(mail.outbox) == 1 and "Visa" in mail.outbox[0].subject
+    email.refresh_from_db()
+    assert email.status == OutboxStatus.SENT and email.sent_at is not None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_shares_one_connection(monkeypatch):
+    opened = []
+    original = EmailBackend.open
+    monkeypatch.setattr(EmailBackend, "open", lambda self: opened.append(self) or original(self))
+    outbox.enqueue_many([{"subject": f"s{i}", "body": "b", "to": ["a@b.c"]} for i in range(5)])
+    assert outbox.dispatch()["sent"] == 5
+    assert len(mail.outbox) == 5 and len(opened) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_retry_with_backoff_then_fail(settings, monkeypatch):
+    settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 3
+    settings.EMAIL_OUTBOX_RETRY_BASE = 60
+    outbox.enqueue("s", "b", ["x@y.com"])
+    monkeypatch.setattr(EmailBackend, "send_messages", _boom)
+
+    before = timezone.now()
+    assert outbox.dispatch() == {"sent": 0, "retry": 1, "failed": 0}
+    email = OutboxEmail.objects.get()
+    assert email.attempts == 1 and "said no" in email.last_error
+    assert timedelta(seconds=59) < email.next_attempt_at - before < timedelta(seconds=70)
+    assert outbox.dispatch() == {"sent": 0, "retry": 0, "failed": 0}  # لسه معادها مجاش
+
+    OutboxEmail.objects.update(next_attempt_at=timezone.now())
+    before = timezone.now()
+    assert outbox.dispatch()["retry"] == 1
+    email.refresh_from_db()
+    assert timedelta(seconds=119) < email.next_attempt_at - before < timedelta(seconds=130)
+
+    OutboxEmail.objects.update(next_attempt_at=timezone.now())
+    assert outbox.dispatch()["failed"] == 1
+    email.refresh_from_db()
+    assert email.status == OutboxStatus.FAILED and email.attempts == 3
+
+    monkeypatch.undo()
+    assert outbox.drain()["sent"] == 0 and mail.outbox == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_dispatch_command_requeues_stale_sending():
+    email = outbox.enqueue("s", "b", ["x@y.com"])
+    OutboxEmail.objects.filter(pk=email.pk).update(
+        status=OutboxStatus.SENDING, claimed_at=timezone.now() - timedelta(hours=1)
+    )
+    call_command("dispatch_outbox", "--once")
+    assert len(mail.outbox) == 1
+
+
+class _InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sweep_sends_leftovers_after_restart(settings, monkeypatch):
+    # من قبل الـ restart: واحد pending محدش عمله kick، وواحد فضل sending
+    outbox.enqueue("pending", "b", ["x@y.com"])
+    stuck = outbox.enqueue("stuck", "b", ["x@y.com"])
+    OutboxEmail.objects.filter(pk=stuck.pk).update(
+        status=OutboxStatus.SENDING, claimed_at=timezone.now() - timedelta(hours=1)
+    )
+    settings.EMAIL_OUTBOX_RUNNER = "thread"
+    monkeypatch.setattr(outbox, "_get_executor", lambda: _InlineExecutor())
+    monkeypatch.setattr(outbox, "_schedule_retry", lambda: None)
+
+    assert outbox.sweep() == 1
+    assert sorted(m.subject for m in mail.outbox) == ["pending", "stuck"]
+    assert not OutboxEmail.objects.exclude(status=OutboxStatus.SENT).exists()
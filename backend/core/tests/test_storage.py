@@ -0,0 +1,92 @@
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import transaction
+
+from core.models import StoredBlob
+from core.storage import ContentAddressedStorage, discard_rolled_back
+
+DATA = b"hello" * 1000
+
+
+@pytest.fixture
+def storage(settings):
+    return ContentAddressedStorage()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_same_content_shares_one_blob(storage):
+    names = [storage.save(f"a/{i}.pdf", ContentFile(DATA)) for i in range(3)]
+    assert len(set(names)) == 3
+    blob = StoredBlob.objects.get()
+    assert blob.refcount == 3 and blob.size == len(DATA)
+    assert os.stat(storage.path(names[0])).st_nlink == 4
+    assert storage.open(names[1]).read() == DATA
+
+    storage.delete(names[0])
+    storage.delete(names[1])
+    assert StoredBlob.objects.get().refcount == 1
+    storage.delete(names[2])
+    assert not StoredBlob.objects.exists()
+    assert not os.path.exists(storage.blob_path(blob.sha256))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rolled_back_save_removes_link_and_blob(storage):
+    kept = storage.save("a/kept.pdf", ContentFile(DATA))
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            lost = storage.save("a/lost.pdf", ContentFile(DATA))
+            other = storage.save("a/other.pdf", ContentFile(b"only in the rolled back transaction"))
+            raise RuntimeError
+    assert discard_rolled_back() == 2
+    assert not os.path.lexists(storage.path(lost)) and not os.path.lexists(storage.path(other))
+    assert StoredBlob.objects.get().refcount == 1
+    assert len(os.listdir(os.path.dirname(storage.blob_path(StoredBlob.objects.get().sha256)))) == 1
+
+    # الـ refcount ماتلخبطش: مسح الوحيد الحقيقي بيمسح الـ blob
+    storage.delete(kept)
+    assert not StoredBlob.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_delete_waits_for_commit(storage):
+    name = storage.save("a/x.pdf", ContentFile(DATA))
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            storage.delete(name)
+            assert storage.exists(name)
+            raise RuntimeError
+    assert storage.exists(name) and StoredBlob.objects.get().refcount == 1
+
+    with transaction.atomic():
+        storage.delete(name)
+    assert not storage.exists(name) and not StoredBlob.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_symlink_mode_never_dangles(settings):
+    storage = ContentAddressedStorage(link_mode="symlink")
+    a = storage.save("a/1.pdf", ContentFile(DATA))
+    b = storage.save("a/2.pdf", ContentFile(DATA))
+    assert os.path.islink(storage.path(a))
+    storage.delete(a)
+    assert storage.open(b).read() == DATA
+
+
+@pytest.mark.django_db(transaction=True)
+def test_media_dedupe_backfill(settings, storage):
+    root = settings.MEDIA_ROOT
+    for i in range(2):
+        path = os.path.join(root, "old", f"{i}.bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(b"x" * 100)
+    call_command("media_dedupe", "--dry-run")
+    assert not StoredBlob.objects.exists()
+    call_command("media_dedupe")
+    assert StoredBlob.objects.get().refcount == 2
+    call_command("media_dedupe")
+    assert StoredBlob.objects.get().refcount == 2
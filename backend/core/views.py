@@ -1,5 +1,5 @@
 from django.utils import timezone
-from django.db.models import Count
+from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
@@ -10,12 +10,16 @@ from rest_framework.request import Request
 
 from approvals.models import DeleteClientRequest
 from approvals.serializers.approvals.delete_request import DeleteRequestSerializer
-from backend.customers.models.models import Customer
+from customers.models import Customer
+from customers.stats import cached_customer_counts, add_timing_headers
 
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
 from approvals.mixins import ApprovalMixin
+from core.cache import metrics as cache_metrics
+from core.jobs import cancel as cancel_import_job, job_payload
+from core.models import ImportJob
 
 import logging
 
@@ -108,24 +112,13 @@ def customers_dashboard_stats(request: Request) -> Response:
     """
     إحصائيات لوحة التحكم للعملاء
     """
-    total_customers = Customer.objects.filter(deleted_at__isnull=True).count()
-
-    counts_by_type = (
-        Customer.objects
-        .filter(deleted_at__isnull=True)
-        .values("customer_type")
-        .annotate(count=Count("id"))
+    # العدّادات في استعلام aggregate واحد (نفس helper بتاع customers) — هنا الحذف بـ deleted_at
+    counts, hit, elapsed_ms = cached_customer_counts(
+        namespace="core-customers-dashboard",
+        active=Q(is_deleted=False, deleted_at__isnull=True),
+        deleted=Q(deleted_at__isnull=False),
     )
 
-    counts_dict = {
-        "owner": 0,
-        "commercial": 0,
-        "consultant": 0
-    }
-    for item in counts_by_type:
-        ctype = item["customer_type"] or "unknown"
-        counts_dict[ctype] = item["count"]
-
     recently_added = list(
         Customer.objects.filter(deleted_at__isnull=True)
         .order_by("-created_at")[:5]
@@ -141,14 +134,14 @@ def customers_dashboard_stats(request: Request) -> Response:
     pending_delete_requests = DeleteClientRequest.objects.filter(status="pending").count()
 
     data = {
-        "total_customers": total_customers,
-        "counts_by_type": counts_dict,
+        "total_customers": counts["total_customers"],
+        "counts_by_type": counts["counts_by_type"],
         "recently_added": recently_added,
         "recently_deleted": recently_deleted,
         "pending_delete_requests": pending_delete_requests,
     }
 
-    return Response(data)
+    return add_timing_headers(Response(data), elapsed_ms, hit)
 
 
 @api_view(["GET"])
@@ -162,3 +155,73 @@ def get_customer_contenttype(request: Request) -> Response:
         return Response({"id": ct.id})
     except ContentType.DoesNotExist:
         return Response({"detail": "ContentType not found"}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(["GET", "DELETE"])
+@permission_classes([permissions.IsAdminUser])
+def cache_metrics_view(request: Request) -> Response:
+    """
+    عدّادات الكاش (hit/miss/set/invalidate) للـ process الحالي — DELETE يصفّرها
+    """
+    if request.method == "DELETE":
+        cache_metrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(cache_metrics.snapshot())
+
+
+# ======================== Import Jobs ========================
+def _own_jobs(request):
+    qs = ImportJob.objects.all()
+    if not request.user.is_staff:
+        qs = qs.filter(created_by=request.user)
+    return qs
+
+
+class ImportJobListAPIView(APIView):
+    """آخر import jobs بتاعة المستخدم (?kind=files.documents&status=running&limit=50)."""
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 50
+    max_limit = 200
+
+    def get(self, request):
+        qs = _own_jobs(request).defer("errors", "result")
+        for param in ("kind", "status"):
+            if request.query_params.get(param):
+                qs = qs.filter(**{param: request.query_params[param]})
+        return Response([job_payload(job) for job in qs[:self.get_limit(request)]])
+
+    def get_limit(self, request):
+        """?limit= بين 1 و max_limit؛ أي قيمة مش سليمة → default_limit (زي page_size في KeysetPagination)."""
+        try:
+            limit = int(request.query_params.get("limit", ""))
+        except (TypeError, ValueError):
+            return self.default_limit
+        return min(limit, self.max_limit) if limit > 0 else self.default_limit
+
+
+class ImportJobDetailAPIView(APIView):
+    """الحالة + التقدم + أخطاء الصفوف (?errors=0 من غيرها). DELETE = إلغاء."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self, request, job_id):
+        try:
+            return _own_jobs(request).get(job_id=job_id)
+        except ImportJob.DoesNotExist:
+            return None
+
+    def get(self, request, job_id):
+        job = self.get_object(request, job_id)
+        if job is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        data = {**job_payload(job), "result": job.result}
+        if request.query_params.get("errors") not in ("0", "false"):
+            data["errors"] = job.errors
+        return Response(data)
+
+    def delete(self, request, job_id):
+        job = self.get_object(request, job_id)
+        if job is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        if not cancel_import_job(job):
+            return Response({"detail": f"Job is already {job.status}."}, status=status.HTTP_409_CONFLICT)
+        return Response(job_payload(job), status=status.HTTP_202_ACCEPTED)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CustomersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'customers'
+
+    def ready(self):
+        # أي تعديل على العملاء يبطل الكاش المرتبط بيهم (dashboard stats, ...)
+        from core.cache import invalidate_on_change
+        from customers.models import Customer
+        invalidate_on_change(Customer, "customers")
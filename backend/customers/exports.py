@@ -0,0 +1,25 @@
+# customers/exports.py
+from core.exports import ExportSpec
+
+CUSTOMER_EXPORT = ExportSpec("Customers", [
+    ("code", "Code", "code"),
+    ("name_ar", "Name (AR)", "name_ar"),
+    ("name_en", "Name (EN)", "name_en"),
+    ("customer_type", "Type", "customer_type"),
+    ("status", "Status", "status"),
+    ("email", "Email", "email"),
+    ("telephone_number", "Telephone", "telephone_number"),
+    ("whatsapp_number", "WhatsApp", "whatsapp_number"),
+    ("country", "Country", "country__name_en"),
+    ("city", "City", "city__name_en"),
+    ("area", "Area", "area__name_en"),
+    ("bank", "Bank", "bank__name_en"),
+    ("account_holder_name", "Account Holder", "account_holder_name"),
+    ("account_number", "Account Number", "account_number"),
+    ("iban_number", "IBAN", "iban_number"),
+    ("notes", "Notes", "notes"),
+    ("created_at", "Created At", "created_at"),
+], default=[
+    "code", "name_ar", "name_en", "customer_type", "status", "email",
+    "telephone_number", "country", "city", "created_at",
+], filters=("customer_type", "status"))  # ?customer_type=owner&status=active
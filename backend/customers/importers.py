@@ -0,0 +1,375 @@
+# customers/importers.py
+"""
+Bulk import للعملاء (CSV / XLSX / JSON lines).
+
+- نفس المفاتيح المسطّحة اللي بيبعتها الفورم في CustomerSerializer.create
+  (person_*, company_*, legal_person_*, contact_people[i].*, authorized_people[i].*).
+- الـ lookups (bank/country/city/area/gender/...) بتتحل من map في الذاكرة
+  بتتبني مرة واحدة؛ تقبل id أو code أو name_en/name_ar.
+- كل موديل بيتكتب بـ bulk_create جوّه transaction واحدة، والأخطاء بترجع لكل صف.
+- المرفقات (files) مش مدعومة في الاستيراد.
+"""
+import csv
+import io
+import json
+import re
+
+from django.core.files import File
+from django.db import transaction
+from rest_framework import serializers
+
+from core.cache import invalidate_tags
+from customers.models import (
+    Customer, Person, Company,
+    AuthorizedPerson, ContactPerson, LegalPerson
+)
+from shared.models import (
+    Bank, Country, City, Area, Gender, Nationality, Classification
+)
+
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx", ".jsonl", ".ndjson")
+BATCH_SIZE = 500
+
+_NESTED_KEY = re.compile(r"^(contact_people|authorized_people)\[(\d+)\]\.(.+)$")
+
+
+class ImportFormatError(Exception):
+    """الملف نفسه مش مقروء (امتداد/هيدر/JSON) — مش خطأ صف."""
+
+
+# ======================== Row serializers (بدون أي DB queries) ========================
+class _BlankToNoneMixin:
+    """CSV/XLSX بيرجّع "" للخلايا الفاضية؛ نعاملها كأنها مش مبعوتة."""
+
+    def to_internal_value(self, data):
+        data = {k: v for k, v in data.items() if v not in ("", None)}
+        return super().to_internal_value(data)
+
+
+class CustomerImportSerializer(_BlankToNoneMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Customer
+        fields = [
+            "name_ar", "name_en", "email", "telephone_number", "whatsapp_number",
+            "notes", "account_holder_name", "account_number", "iban_number",
+            "customer_type", "status",
+        ]
+
+
+class PersonImportSerializer(_BlankToNoneMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Person
+        fields = [
+            "birth_date", "home_address",
+            "national_id_number", "national_id_expiry_date",
+            "passport_number", "passport_expiry_date",
+        ]
+
+
+class CompanyImportSerializer(_BlankToNoneMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Company
+        fields = [
+            "trade_license_number", "trade_license_expiry_date",
+            "postal_code", "landline_number", "office_address",
+            "map_location", "establishment_date", "company_fax",
+        ]
+
+
+class LegalPersonImportSerializer(_BlankToNoneMixin, serializers.ModelSerializer):
+    class Meta:
+        model = LegalPerson
+        fields = [
+            "name_ar", "name_en", "email", "telephone_number", "whatsapp_number",
+            "birth_date", "home_address",
+            "national_id_number", "national_id_expiry_date",
+            "passport_number", "passport_expiry_date",
+            "power_of_attorney_expiry_date",
+        ]
+
+
+class ContactPersonImportSerializer(_BlankToNoneMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ContactPerson
+        fields = [
+            "name_ar", "name_en", "email", "telephone_number", "whatsapp_number",
+            "job_title", "is_primary",
+        ]
+
+
+class AuthorizedPersonImportSerializer(_BlankToNoneMixin, serializers.ModelSerializer):
+    class Meta:
+        model = AuthorizedPerson
+        fields = [
+            "name_ar", "name_en", "email", "telephone_number", "whatsapp_number",
+            "birth_date", "home_address",
+            "national_id_number", "national_id_expiry_date",
+            "passport_number", "passport_expiry_date",
+            "power_of_attorney_expiry_date",
+        ]
+
+
+# ======================== Lookups ========================
+class LookupIndex:
+    """id/code/name → pk لموديل lookup واحد؛ استعلام واحد عند أول استخدام."""
+
+    def __init__(self, model):
+        self.model = model
+        self._map = None
+
+    def _build(self):
+        index = {}
+        rows = self.model.objects.values_list("id", "code", "name_en", "name_ar")
+        for pk, code, name_en, name_ar in rows:
+            for key in (name_ar, name_en, code, pk):
+                if key not in (None, ""):
+                    index[str(key).strip().lower()] = pk
+        return index
+
+    def resolve(self, value):
+        if self._map is None:
+            self._map = self._build()
+        return self._map.get(str(value).strip().lower())
+
+
+# field → lookup model (لكل جزء من الصف)
+CUSTOMER_LOOKUPS = {"bank": Bank, "country": Country, "city": City, "area": Area}
+PERSON_LOOKUPS = {"gender": Gender, "nationality": Nationality}
+COMPANY_LOOKUPS = {"classification": Classification}
+LEGAL_PERSON_LOOKUPS = {
+    "gender": Gender, "nationality": Nationality,
+    "country": Country, "city": City, "area": Area,
+}
+CONTACT_PERSON_LOOKUPS = {"country": Country, "city": City, "area": Area}
+AUTHORIZED_PERSON_LOOKUPS = LEGAL_PERSON_LOOKUPS
+
+
+# ======================== File readers ========================
+def _normalize_header(value):
+    return str(value or "").strip()
+
+
+def _blank(values):
+    return not any(v not in (None, "") for v in values)
+
+
+def read_rows(file_obj):
+    """
+    يرجّع list[(رقم الصف, dict)] من ملف CSV/XLSX/JSON lines حسب الامتداد.
+    رقم الصف = رقمه في الملف نفسه (الهيدر = 1) حتى لو فيه صفوف فاضية اتشالت قبله.
+    """
+    name = (getattr(file_obj, "name", "") or "").lower()
+    if not name.endswith(SUPPORTED_EXTENSIONS):
+        raise ImportFormatError(f"Unsupported file type. Use one of: {', '.join(SUPPORTED_EXTENSIONS)}")
+
+    if name.endswith(".csv"):
+        text = io.TextIOWrapper(file_obj, encoding="utf-8-sig", newline="")
+        reader = csv.DictReader(text)
+        reader.fieldnames = [_normalize_header(h) for h in (reader.fieldnames or [])]
+        # line_num = آخر سطر اتقرا (الخلية اللي فيها newline بتاخد أكتر من سطر)
+        return [(reader.line_num, dict(r)) for r in reader if not _blank(r.values())]
+
+    if name.endswith(".xlsx"):
+        from openpyxl import load_workbook
+        wb = load_workbook(file_obj, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = [_normalize_header(h) for h in next(rows, ())]
+            return [
+                (number, {h: v for h, v in zip(header, r) if h})
+                for number, r in enumerate(rows, start=2)
+                if r and not _blank(r)
+            ]
+        finally:
+            wb.close()
+
+    rows = []
+    for lineno, line in enumerate(io.TextIOWrapper(file_obj, encoding="utf-8-sig"), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError as e:
+            raise ImportFormatError(f"Invalid JSON on line {lineno}: {e}")
+        if not isinstance(obj, dict):
+            raise ImportFormatError(f"Line {lineno} must be a JSON object.")
+        rows.append((lineno, obj))
+    return rows
+
+
+def number_rows(rows):
+    """JSON body ({"rows": [...]}) → نفس شكل read_rows (الترقيم زي الشيت: أول صف = 2)."""
+    return list(enumerate(rows, start=2))
+
+
+# ======================== Importer ========================
+class CustomerBulkImporter:
+    """
+    importer = CustomerBulkImporter(user=request.user)
+    report = importer.run(rows, dry_run=False)
+    """
+
+    def __init__(self, user=None, batch_size=BATCH_SIZE):
+        self.user = user if getattr(user, "is_authenticated", False) else None
+        self.batch_size = batch_size
+        self._lookups = {}
+
+    # -------- parsing --------
+    @staticmethod
+    def _split_row(row):
+        """يفكّ المفاتيح المسطّحة لأجزاء: customer/person/company/legal_person/nested lists."""
+        parts = {"customer": {}, "person": {}, "company": {}, "legal_person": {}}
+        nested = {"contact_people": {}, "authorized_people": {}}
+        for raw_key, value in row.items():
+            key = str(raw_key).strip()
+            if isinstance(value, str):
+                value = value.strip()
+            m = _NESTED_KEY.match(key)
+            if m:
+                nested[m.group(1)].setdefault(int(m.group(2)), {})[m.group(3)] = value
+            elif key.startswith("legal_person_"):
+                parts["legal_person"][key[len("legal_person_"):]] = value
+            elif key.startswith("person_"):
+                parts["person"][key[len("person_"):]] = value
+            elif key.startswith("company_"):
+                parts["company"][key[len("company_"):]] = value
+            else:
+                parts["customer"][key] = value
+        for name, by_index in nested.items():
+            parts[name] = [by_index[i] for i in sorted(by_index) if any(v not in ("", None) for v in by_index[i].values())]
+        return parts
+
+    def _resolve_lookups(self, data, lookups, errors, prefix=""):
+        resolved = {}
+        for field, model in lookups.items():
+            value = data.get(field)
+            if value in ("", None):
+                continue
+            index = self._lookups.setdefault(model, LookupIndex(model))
+            pk = index.resolve(value)
+            if pk is None:
+                errors[f"{prefix}{field}"] = [f"Unknown {model._meta.verbose_name}: '{value}'."]
+            else:
+                resolved[f"{field}_id"] = pk
+        return resolved
+
+    def _validate_part(self, serializer_class, data, lookups, errors, prefix=""):
+        ser = serializer_class(data=data)
+        if not ser.is_valid():
+            for field, msgs in ser.errors.items():
+                errors[f"{prefix}{field}"] = [str(m) for m in msgs]
+        fk = self._resolve_lookups(data, lookups, errors, prefix)
+        return {**(ser.validated_data if not ser.errors else {}), **fk}
+
+    def validate_row(self, row):
+        """يرجّع (plan, errors). plan فيه kwargs جاهزة لكل موديل."""
+        parts = self._split_row(row)
+        errors = {}
+        plan = {
+            "customer": self._validate_part(CustomerImportSerializer, parts["customer"], CUSTOMER_LOOKUPS, errors),
+            "person": None, "company": None, "legal_person": None,
+            "contact_people": [], "authorized_people": [],
+        }
+        ctype = plan["customer"].get("customer_type")
+
+        if ctype == "owner":
+            plan["person"] = self._validate_part(
+                PersonImportSerializer, parts["person"], PERSON_LOOKUPS, errors, "person_")
+            for i, sub in enumerate(parts["authorized_people"]):
+                plan["authorized_people"].append(self._validate_part(
+                    AuthorizedPersonImportSerializer, sub, AUTHORIZED_PERSON_LOOKUPS,
+                    errors, f"authorized_people[{i}]."))
+            if parts["contact_people"]:
+                # زي فورم الإنشاء: الـ owner ليه authorized_people مش contact_people
+                errors["contact_people"] = ["Contact people are only allowed for commercial/consultant customers."]
+        elif ctype in ("commercial", "consultant"):
+            plan["company"] = self._validate_part(
+                CompanyImportSerializer, parts["company"], COMPANY_LOOKUPS, errors, "company_")
+            if any(v not in ("", None) for v in parts["legal_person"].values()):
+                plan["legal_person"] = self._validate_part(
+                    LegalPersonImportSerializer, parts["legal_person"], LEGAL_PERSON_LOOKUPS,
+                    errors, "legal_person_")
+        for i, sub in enumerate(parts["contact_people"] if ctype != "owner" else ()):
+            plan["contact_people"].append(self._validate_part(
+                ContactPersonImportSerializer, sub, CONTACT_PERSON_LOOKUPS,
+                errors, f"contact_people[{i}]."))
+        return plan, errors
+
+    # -------- writing --------
+    def _trackable(self):
+        return {"created_by": self.user, "updated_by": self.user} if self.user else {}
+
+    def _create_customers(self, plans):
+        customers = Customer.assign_codes([Customer(**p["customer"], **self._trackable()) for p in plans])
+        Customer.objects.bulk_create(customers, batch_size=self.batch_size)
+        if any(c.pk is None for c in customers):
+            # backends من غير RETURNING: نجيب الـ ids بالكود (استعلام واحد)
+            ids = dict(Customer.all_objects.filter(code__in=[c.code for c in customers]).values_list("code", "id"))
+            for c in customers:
+                c.pk = ids[c.code]
+        return customers
+
+    def _write(self, plans):
+        customers = self._create_customers(plans)
+
+        persons, companies, legals, contacts, authorized = [], [], [], [], []
+        for customer, plan in zip(customers, plans):
+            if plan["person"] is not None:
+                persons.append(Person(customer=customer, **plan["person"]))
+            if plan["company"] is not None:
+                companies.append(Company(customer=customer, **plan["company"]))
+            if plan["legal_person"] is not None:
+                legals.append(LegalPerson(customer=customer, **plan["legal_person"], **self._trackable()))
+            contacts += [ContactPerson(customer=customer, **c, **self._trackable()) for c in plan["contact_people"]]
+            authorized += [AuthorizedPerson(customer=customer, **a, **self._trackable()) for a in plan["authorized_people"]]
+
+        Person.objects.bulk_create(persons, batch_size=self.batch_size)
+        Company.objects.bulk_create(companies, batch_size=self.batch_size)
+        LegalPerson.objects.bulk_create(LegalPerson.assign_codes(legals), batch_size=self.batch_size)
+        ContactPerson.objects.bulk_create(ContactPerson.assign_codes(contacts), batch_size=self.batch_size)
+        AuthorizedPerson.objects.bulk_create(AuthorizedPerson.assign_codes(authorized), batch_size=self.batch_size)
+        return customers
+
+    def run(self, rows, dry_run=False, progress=None):
+        """
+        rows: [(رقم الصف, dict)] من read_rows / number_rows.
+        progress(stage, processed, total, imported): للـ import jobs (core.jobs).
+        """
+        progress = progress or (lambda *args, **kwargs: None)
+        plans, row_errors = [], []
+        for processed, (rownum, row) in enumerate(rows, start=1):
+            plan, errors = self.validate_row(row)
+            if errors:
+                row_errors.append({"row": rownum, "errors": errors})
+            else:
+                plans.append(plan)
+            if processed % self.batch_size == 0:
+                progress("validating", processed=processed, total=len(rows))
+        progress("validating", processed=len(rows), total=len(rows), force=True)
+
+        created = []
+        if plans and not dry_run:
+            with transaction.atomic():
+                created = self._write(plans)
+                # bulk_create مش بيشغّل post_save، فنبطل الكاش يدويًا
+                transaction.on_commit(lambda: invalidate_tags("customers"))
+
+        return {
+            "total_rows": len(rows),
+            "valid_rows": len(plans),
+            "imported": len(created),
+            "failed": len(row_errors),
+            "dry_run": dry_run,
+            "errors": row_errors,
+            "created": [{"id": c.pk, "code": c.code} for c in created],
+        }
+
+
+def run_import_job(job, file_obj, progress):
+    """core.jobs: kind = "customers" (نفس ملفات customer_bulk_import)."""
+    progress("parsing", force=True)
+    # read_rows بيختار الـ parser بامتداد الاسم الأصلي (مش اسم الملف في الـ storage)
+    rows = read_rows(File(file_obj.file, name=job.filename))
+    user = job.created_by
+    return CustomerBulkImporter(user=user).run(rows, dry_run=bool(job.options.get("dry_run")), progress=progress)
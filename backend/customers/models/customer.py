@@ -19,6 +19,10 @@ class Customer(NameCodeBase, TrackableBase, ContactInfoBase, BankAccountBase):
     class Meta:
         verbose_name = "Customer"
         verbose_name_plural = "Customers"
+        indexes = [
+            # keyset pagination: ?pagination=cursor&order=created
+            models.Index(fields=["created_at", "id"], name="customer_created_id_idx"),
+        ]
 
     def clean(self):
         from django.core.exceptions import ValidationError
@@ -41,7 +41,7 @@ class PersonSerializer(BasePersonFieldsMixinSerializer, serializers.ModelSeriali
             "gender", "gender_id", "nationality", "nationality_id",
             "national_id_number", "national_id_attachment", "national_id_expiry_date",
             "passport_number", "passport_attachment", "passport_expiry_date",
-            "signature_attachment", "personal_image_attachment", "customer"
+            "signature_attachment", "personal_image_attachment", "personal_image_thumbnails", "customer"
         ]
         read_only_fields = ["id", "customer"]
 
@@ -0,0 +1,66 @@
+# customers/stats.py
+"""
+إحصائيات العملاء للوحة التحكم — استعلام aggregate واحد بـ Count(filter=Q(...))
+بدل COUNT لكل رقم، مع كاش قصير اختياري (CUSTOMER_STATS_CACHE_TTL بالثواني، 0 = بدون كاش).
+الكاش بيتبطل مع أي save/delete لـ Customer (tag "customers" — شوف CustomersConfig.ready).
+"""
+from datetime import timedelta
+from time import perf_counter
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils.timezone import now
+
+from core import cache as app_cache
+from customers.models import Customer
+
+CUSTOMER_TYPES = [value for value, _ in Customer.CUSTOMER_TYPE_CHOICES]
+CACHE_TAG = "customers"
+RECENT_DAYS = 7
+
+
+def _cache_ttl():
+    return int(getattr(settings, "CUSTOMER_STATS_CACHE_TTL", 30))
+
+
+def customer_counts(active=Q(is_deleted=False), deleted=Q(is_deleted=True)):
+    """
+    كل العدّادات في رحلة واحدة للداتابيز.
+    active/deleted قابلين للتغيير لأن core بيعتمد على deleted_at بدل is_deleted.
+    """
+    since = now() - timedelta(days=RECENT_DAYS)
+    aggregates = {
+        "total": Count("id", filter=active),
+        "added_recently": Count("id", filter=active & Q(created_at__gte=since)),
+        "deleted_recently": Count("id", filter=deleted & Q(updated_at__gte=since)),
+    }
+    for ctype in CUSTOMER_TYPES:
+        aggregates[f"type_{ctype}"] = Count("id", filter=active & Q(customer_type=ctype))
+
+    # all_objects: ActiveManager بيشيل المحذوف، وإحنا محتاجينه في deleted_recently
+    row = Customer.all_objects.aggregate(**aggregates)
+    return {
+        "total_customers": row["total"],
+        "added_recently": row["added_recently"],
+        "deleted_recently": row["deleted_recently"],
+        "counts_by_type": {ctype: row[f"type_{ctype}"] for ctype in CUSTOMER_TYPES},
+    }
+
+
+def cached_customer_counts(namespace="customers-dashboard", fresh=False, **kwargs):
+    """يرجّع (data, hit, elapsed_ms)."""
+    ttl = _cache_ttl()
+    started = perf_counter()
+    if ttl > 0:
+        data, hit = app_cache.cached(
+            namespace, compute=lambda: customer_counts(**kwargs),
+            tags=[CACHE_TAG], timeout=ttl, refresh=fresh)
+    else:
+        data, hit = customer_counts(**kwargs), False
+    return data, hit, (perf_counter() - started) * 1000
+
+
+def add_timing_headers(response, elapsed_ms, hit):
+    response["Server-Timing"] = f'stats;dur={elapsed_ms:.2f};desc="{"cache hit" if hit else "db"}"'
+    response["X-Cache"] = "HIT" if hit else "MISS"
+    return response
@@ -0,0 +1,67 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from customers.importers import CustomerBulkImporter, read_rows
+from customers.models import ContactPerson, Customer
+
+HEADER = ["name_ar", "name_en", "customer_type", "contact_people[0].name_ar", "contact_people[0].name_en"]
+
+
+def csv_file(text):
+    f = io.BytesIO(text.encode("utf-8"))
+    f.name = "customers.csv"
+    return f
+
+
+def xlsx_file(rows):
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    f = io.BytesIO()
+    wb.save(f)
+    f.seek(0)
+    f.name = "customers.xlsx"
+    return f
+
+
+def error_rows(report):
+    return [e["row"] for e in report["errors"]]
+
+
+@pytest.mark.django_db
+def test_csv_errors_point_at_the_sheet_row_after_blank_lines():
+    rows = read_rows(csv_file(
+        ",".join(HEADER) + "\n"
+        "أ,A,commercial,ج,C\n"
+        "\n"
+        ",,,,\n"
+        "ب,B,nope,,\n"
+    ))
+    assert [n for n, _ in rows] == [2, 5]
+    report = CustomerBulkImporter().run(rows)
+    assert error_rows(report) == [5] and report["imported"] == 1
+
+
+@pytest.mark.django_db
+def test_xlsx_errors_point_at_the_sheet_row_after_blank_rows():
+    rows = read_rows(xlsx_file([HEADER, ["أ", "A", "commercial"], [None] * 5, [], ["ب", "B", "nope"]]))
+    assert [n for n, _ in rows] == [2, 5]
+    assert error_rows(CustomerBulkImporter().run(rows, dry_run=True)) == [5]
+
+
+@pytest.mark.django_db
+def test_contact_people_are_rejected_for_owners():
+    rows = read_rows(csv_file(
+        ",".join(HEADER) + "\n"
+        "أ,A,owner,ج,C\n"
+        "ب,B,consultant,د,D\n"
+    ))
+    report = CustomerBulkImporter().run(rows)
+
+    assert report["errors"] == [{"row": 2, "errors": {
+        "contact_people": ["Contact people are only allowed for commercial/consultant customers."],
+    }}]
+    assert list(Customer.objects.values_list("name_en", flat=True)) == ["B"]
+    assert list(ContactPerson.objects.values_list("name_en", flat=True)) == ["D"]
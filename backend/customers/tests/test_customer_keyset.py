@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from customers.models import Customer
+
+URL = "/api/customers/"
+
+
+@pytest.fixture
+def customers(db):
+    base = timezone.make_aware(datetime(2025, 1, 1, 9))
+    rows = []
+    for i in range(8):
+        c = Customer.objects.create(name_ar=f"ع{i}", name_en=f"C{i}", customer_type="commercial")
+        # أزواج بنفس created_at — الـ id هو اللي بيفصل بينهم
+        Customer.objects.filter(pk=c.pk).update(created_at=base + timedelta(minutes=i // 2))
+        rows.append(c.pk)
+    return rows
+
+
+def walk(client, **params):
+    params = {"pagination": "cursor", "page_size": 3, **params}
+    ids, pages = [], 0
+    response = client.get(URL, params)
+    while True:
+        assert response.status_code == 200, response.data
+        ids += [row["id"] for row in response.data["results"]]
+        pages += 1
+        if not response.data["next_cursor"]:
+            return ids, pages
+        response = client.get(URL, {**params, "cursor": response.data["next_cursor"]})
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("order, expected", [
+    ("created", lambda qs: qs.order_by("-created_at", "-id")),
+    ("created_asc", lambda qs: qs.order_by("created_at", "id")),
+    ("code", lambda qs: qs.order_by("code")),
+])
+def test_cursor_pages_cover_every_row_once(customers, order, expected):
+    ids, pages = walk(APIClient(), order=order)
+    assert ids == list(expected(Customer.objects.all()).values_list("id", flat=True))
+    assert pages == 3
+
+
+@pytest.mark.django_db
+def test_rows_added_meanwhile_do_not_shift_later_pages(customers):
+    client = APIClient()
+    first = client.get(URL, {"pagination": "cursor", "page_size": 3})
+    Customer.objects.create(name_ar="جديد", name_en="New", customer_type="owner")
+
+    second = client.get(URL, {"pagination": "cursor", "page_size": 3, "cursor": first.data["next_cursor"]})
+    seen = [r["id"] for r in first.data["results"]] + [r["id"] for r in second.data["results"]]
+    assert len(set(seen)) == 6
+    assert seen == list(Customer.objects.order_by("-created_at", "-id").values_list("id", flat=True)[1:7])
+
+
+@pytest.mark.django_db
+def test_bad_cursors_are_404(customers):
+    client = APIClient()
+    first = client.get(URL, {"pagination": "cursor", "page_size": 3})
+    other_order = client.get(URL, {"pagination": "cursor", "order": "code", "cursor": first.data["next_cursor"]})
+    assert other_order.status_code == 404
+    assert client.get(URL, {"pagination": "cursor", "cursor": "not-a-cursor"}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_page_size_is_clamped_and_default_paging_is_unchanged(customers):
+    client = APIClient()
+    assert client.get(URL, {"pagination": "cursor", "page_size": "abc"}).data["page_size"] == 25
+    assert client.get(URL, {"pagination": "cursor", "page_size": 10_000}).data["page_size"] == 200
+    assert client.get(URL).data["count"] == len(customers)
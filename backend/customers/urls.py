@@ -10,6 +10,9 @@ from customers.views import (
     ContactPersonViewSet,
     LegalPersonViewSet,
     customer_dashboard_stats,
+    customer_bulk_import,
+    customer_bulk_import_job,
+    customer_export_xlsx,
 )
 
 # Routers
@@ -27,6 +30,9 @@ customers_router.register(r'legal-persons', LegalPersonViewSet, basename='custom
 # Final urlpatterns
 urlpatterns = [
     path('customers/dashboard-stats/', customer_dashboard_stats),
+    path('customers/import/', customer_bulk_import, name='customers-bulk-import'),
+    path('customers/import/jobs/', customer_bulk_import_job, name='customers-bulk-import-job'),
+    path('customers/export/xlsx/', customer_export_xlsx, name='customers-export-xlsx'),
     path('', include(router.urls)),
     path('', include(customers_router.urls)),
 
@@ -1,13 +1,19 @@
 # apps/customers/views.py
 from rest_framework import viewsets, status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.decorators import api_view
-from django.utils.timezone import now
-from datetime import timedelta
-
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+
+from core.exports import export_response
+from core.jobs import enqueue, job_payload
+from core.pagination import KeysetPagination
+from customers.exports import CUSTOMER_EXPORT
+from customers.importers import (
+    SUPPORTED_EXTENSIONS, CustomerBulkImporter, ImportFormatError, number_rows, read_rows,
+)
+from customers.stats import cached_customer_counts, add_timing_headers
 from customers.models import (
     Customer, Person, Company,
     AuthorizedPerson, ContactPerson, LegalPerson
@@ -19,6 +25,15 @@ from customers.serializers import (
 
 
 # ======================== Customer ========================
+class CustomerKeysetPagination(KeysetPagination):
+    """?pagination=cursor — ترتيب ثابت بدون COUNT/OFFSET للصفحات العميقة."""
+    orderings = {
+        "created": ("-created_at", "-id"),
+        "created_asc": ("created_at", "id"),
+        "code": ("code",),
+    }
+
+
 class CustomerViewSet(viewsets.ModelViewSet):
     queryset = Customer.objects.filter(is_deleted=False).select_related(
         # شخص المالك
@@ -37,6 +52,18 @@ class CustomerViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["customer_type", "status"]
     parser_classes = [MultiPartParser, FormParser]  # مهم لـ FormData
+    keyset_pagination_class = CustomerKeysetPagination
+
+    @property
+    def paginator(self):
+        # الافتراضي PageNumberPagination؛ الـ keyset اختياري عن طريق ?pagination=cursor
+        if not hasattr(self, "_paginator"):
+            request = getattr(self, "request", None)
+            if request is not None and request.query_params.get("pagination") == "cursor":
+                self._paginator = self.keyset_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
 
     def create(self, request, *args, **kwargs):
         # تفضل زي ما هي
@@ -116,24 +143,74 @@ class LegalPersonViewSet(viewsets.ModelViewSet):
         return LegalPerson.objects.all()
 
 
-# ======================== Dashboard Stats Endpoint ========================
+# ======================== Bulk Import ========================
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser, JSONParser])
+def customer_bulk_import(request):
+    """
+    استيراد عملاء بالجملة.
+    - multipart: file = .csv / .xlsx / .jsonl (نفس مفاتيح فورم الإنشاء المسطّحة)
+    - JSON: {"rows": [{...}, ...]}
+    - ?dry_run=1 → تحقق فقط بدون كتابة
+    الصفوف السليمة بتتسجل، والصفوف اللي فيها أخطاء بترجع في errors برقم الصف.
+    """
+    dry_run = str(request.query_params.get("dry_run", "")).lower() in ("1", "true", "yes")
+
+    file_obj = request.FILES.get("file")
+    if file_obj:
+        try:
+            rows = read_rows(file_obj)
+        except ImportFormatError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        rows = request.data.get("rows") if hasattr(request.data, "get") else None
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            return Response(
+                {"error": "Send a file (.csv/.xlsx/.jsonl) as 'file' or a JSON body {\"rows\": [...]}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        rows = number_rows(rows)
+
+    if not rows:
+        return Response({"error": "File is empty or missing data"}, status=status.HTTP_400_BAD_REQUEST)
+
+    report = CustomerBulkImporter(user=request.user).run(rows, dry_run=dry_run)
+    code = status.HTTP_201_CREATED if report["imported"] else status.HTTP_200_OK
+    if not report["valid_rows"]:
+        code = status.HTTP_400_BAD_REQUEST
+    return Response(report, status=code)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def customer_bulk_import_job(request):
+    """نفس customer_bulk_import (file بس) في الخلفية — 202 + job_id (core.jobs)."""
+    file_obj = request.FILES.get("file")
+    if not file_obj or not file_obj.name.lower().endswith(SUPPORTED_EXTENSIONS):
+        return Response(
+            {"error": f"Send a file ({', '.join(SUPPORTED_EXTENSIONS)}) as 'file'."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    dry_run = str(request.query_params.get("dry_run", "")).lower() in ("1", "true", "yes")
+    job = enqueue("customers", file_obj, user=request.user, options={"dry_run": dry_run})
+    return Response(job_payload(job), status=status.HTTP_202_ACCEPTED)
+
+
+# ======================== Export ========================
 @api_view(["GET"])
-def customer_dashboard_stats(request):
-    total = Customer.objects.filter(is_deleted=False).count()
-
-    last_week = now() - timedelta(days=7)
-    added_recently = Customer.objects.filter(is_deleted=False, created_at__gte=last_week).count()
-    deleted_recently = Customer.objects.filter(is_deleted=True, updated_at__gte=last_week).count()
+@permission_classes([IsAuthenticated])
+def customer_export_xlsx(request):
+    """?columns=code,name_en,...&customer_type=&status= — write-only XLSX (core.exports)."""
+    qs = Customer.objects.filter(is_deleted=False).order_by("code", "id")
+    return export_response(CUSTOMER_EXPORT, qs, request, "customers.xlsx")
 
-    counts_by_type = {
-        "owner": Customer.objects.filter(is_deleted=False, customer_type="owner").count(),
-        "commercial": Customer.objects.filter(is_deleted=False, customer_type="commercial").count(),
-        "consultant": Customer.objects.filter(is_deleted=False, customer_type="consultant").count(),
-    }
 
-    return Response({
-        "total_customers": total,
-        "added_recently": added_recently,
-        "deleted_recently": deleted_recently,
-        "counts_by_type": counts_by_type,
-    })
+# ======================== Dashboard Stats Endpoint ========================
+@api_view(["GET"])
+def customer_dashboard_stats(request):
+    # استعلام aggregate واحد + كاش قصير؛ ?fresh=1 يتخطى الكاش
+    fresh = str(request.query_params.get("fresh", "")).lower() in ("1", "true", "yes")
+    data, hit, elapsed_ms = cached_customer_counts(fresh=fresh)
+    return add_timing_headers(Response(data), elapsed_ms, hit)
@@ -165,6 +165,38 @@ CHANNEL_LAYERS = {
     },
 }
 
+# =========================
+# ✅ Cache
+# =========================
+# CACHE_BACKEND: redis | locmem | file — الافتراضي redis لو REDIS_URL موجود، غير كده locmem (dev/tests)
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if REDIS_URL else 'locmem').strip().lower()
+APP_CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', '300'))
+
+if CACHE_BACKEND == 'redis':
+    _cache_default = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL or 'redis://redis:6379/1',
+    }
+elif CACHE_BACKEND == 'file':
+    _cache_default = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+    }
+else:
+    _cache_default = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'erp-default',
+    }
+
+CACHES = {
+    'default': {
+        **_cache_default,
+        'TIMEOUT': APP_CACHE_DEFAULT_TIMEOUT,
+        'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'erp'),
+    },
+}
+
 # =========================
 # ✅ Database
 # =========================
@@ -208,6 +240,29 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# نفس المحتوى بيتخزن مرة واحدة (core.storage): blobs بالـ sha256 + hard/sym links بأسماء upload_to
+MEDIA_DEDUP = os.environ.get('MEDIA_DEDUP', '1') == '1'
+MEDIA_BLOB_ROOT = os.environ.get('MEDIA_BLOB_ROOT') or (MEDIA_ROOT / '.blobs')
+MEDIA_DEDUP_LINK = os.environ.get('MEDIA_DEDUP_LINK', 'hardlink')  # hardlink | symlink
+if MEDIA_DEDUP:
+    DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+
+# thumbnails للصور الشخصية/اللوجو/الختم (core.images) — بتتعمل في الخلفية وبتتخزن في MEDIA_ROOT/derivatives
+IMAGE_DERIVATIVE_SIZES = {'sm': 64, 'md': 160, 'lg': 480}
+IMAGE_DERIVATIVE_FORMAT = os.environ.get('IMAGE_DERIVATIVE_FORMAT', 'webp')  # webp | jpeg
+IMAGE_DERIVATIVE_QUALITY = int(os.environ.get('IMAGE_DERIVATIVE_QUALITY', 80))
+IMAGE_DERIVATIVE_WORKERS = int(os.environ.get('IMAGE_DERIVATIVE_WORKERS', 2))
+
+# Import jobs في الخلفية (core.jobs): thread = جوّه الـ web process، command = manage.py run_import_jobs
+IMPORT_JOBS_RUNNER = os.environ.get('IMPORT_JOBS_RUNNER', 'thread')
+IMPORT_JOBS_WORKERS = int(os.environ.get('IMPORT_JOBS_WORKERS', 1))
+
+# Outbox للإيميلات (core.outbox): thread = جوّه الـ web process، command = manage.py dispatch_outbox
+EMAIL_OUTBOX_RUNNER = os.environ.get('EMAIL_OUTBOX_RUNNER', 'thread')
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 100))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_BASE = int(os.environ.get('EMAIL_OUTBOX_RETRY_BASE', 60))  # ثواني؛ بتتضاعف مع كل محاولة
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # =========================
@@ -242,3 +297,20 @@ DEFAULT_REMINDER_WINDOWS = [int(x) for x in _as_list(os.environ.get('DEFAULT_REM
     if os.environ.get('DEFAULT_REMINDER_WINDOWS') else [14, 7, 3, 1, 0]
 
 NOTIFY_FALLBACK_EMAILS = _as_list(os.environ.get('NOTIFY_FALLBACK_EMAILS'))
+
+# =========================
+# ✅ Dashboard stats
+# =========================
+# كاش قصير لإحصائيات لوحة التحكم (ثواني)؛ 0 = بدون كاش
+CUSTOMER_STATS_CACHE_TTL = int(os.environ.get('CUSTOMER_STATS_CACHE_TTL', '30'))
+
+# =========================
+# ✅ Code allocator (NameCodeBase.code)
+# =========================
+# auto = PostgreSQL sequence لو متاح، غير كده جدول عدّاد؛ BLOCK_SIZE أرقام بتتحجز مرة واحدة لكل process
+CODE_ALLOCATOR = os.environ.get('CODE_ALLOCATOR', 'auto')
+CODE_ALLOCATOR_BLOCK_SIZE = int(os.environ.get('CODE_ALLOCATOR_BLOCK_SIZE', '20'))
+
+# Tender codes (pre_tender.TenderCounter): 1 = أكواد متتالية؛ أكبر من 1 = حجز block لكل worker (gaps مقبولة)
+TENDER_CODE_ALLOCATOR = os.environ.get('TENDER_CODE_ALLOCATOR', 'auto')
+TENDER_CODE_BLOCK_SIZE = int(os.environ.get('TENDER_CODE_BLOCK_SIZE', '1'))
@@ -20,6 +20,7 @@ urlpatterns = [
     path("api/", include("suppliers.urls")),
     path("api/", include("projects.urls")),
     path("api/files/", include("files.api_urls")),          # ✅ REST API for files app
+    path("api/core/", include("core.api_urls")),            # cache metrics, ...
 
     # ✅ Pre-Tender APIs (التطبيق الجديد)
     # متركبة تحت بادئة ثابتة عشان ما يحصلش تعارض مع باقي الـ apps
@@ -4,7 +4,7 @@ from rest_framework.routers import DefaultRouter
 from .api_views import (
     DocumentViewSet, CategoryViewSet,
     FilesDashboardView,
-    export_csv_api, export_xlsx_api, import_template_api, import_xlsx_api,
+    export_csv_api, export_xlsx_api, import_template_api, import_xlsx_api, import_xlsx_job_api,
 )
 
 router = DefaultRouter()
@@ -21,4 +21,5 @@ urlpatterns = [
     path('export/xlsx/', export_xlsx_api, name='files-export-xlsx'),
     path('import/template/', import_template_api, name='files-import-template'),
     path("import/", import_xlsx_api, name="files-import-xlsx"),
+    path("import/jobs/", import_xlsx_job_api, name="files-import-xlsx-job"),
 ]
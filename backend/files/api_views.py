@@ -1,5 +1,5 @@
 # files/api_views.py
-from datetime import timedelta, date, datetime
+from datetime import timedelta
 from django.utils import timezone
 from django.db.models import Count
 from rest_framework import viewsets, status
@@ -89,62 +89,23 @@ class FilesDashboardView(APIView):
 
 
 # ======= Export / Template (ترجع ملفات للتحميل) =======
-from openpyxl import Workbook, load_workbook
-import csv
+from openpyxl import Workbook
 import io
 
+from .exports import documents_csv_response, documents_xlsx_response
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def export_csv_api(request):
-    resp = HttpResponse(content_type='text/csv; charset=utf-8')
-    resp['Content-Disposition'] = 'attachment; filename="documents.csv"'
-
-    writer = csv.writer(resp)
-    writer.writerow(["Title", "Category", "Expires On",
-                     "Owner Email", "Alert Window Days", "Notes"])
-
-    qs = Document.objects.select_related('category').order_by('expires_on', 'title')
-    for d in qs:
-        writer.writerow([
-            d.title,
-            d.category.name if d.category else '',
-            d.expires_on.isoformat() if d.expires_on else '',
-            d.owner_email or '',
-            d.alert_window_days,
-            (d.notes or '').replace('\r', ' ').replace('\n', ' ').strip(),
-        ])
-    return resp
+    """?category=&expires_after=&expires_before= — streaming (files.exports)."""
+    return documents_csv_response(request)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def export_xlsx_api(request):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Documents"
-    ws.append(["Title", "Category", "Expires On",
-               "Owner Email", "Alert Window Days", "Notes"])
-
-    qs = Document.objects.select_related('category').order_by('expires_on', 'title')
-    for d in qs:
-        ws.append([
-            d.title,
-            d.category.name if d.category else '',
-            d.expires_on.isoformat() if d.expires_on else '',
-            d.owner_email or '',
-            d.alert_window_days,
-            d.notes or '',
-        ])
-
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    resp = HttpResponse(
-        buf.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    resp['Content-Disposition'] = 'attachment; filename="documents.xlsx"'
-    return resp
+    """نفس فلاتر الـ CSV + ?columns= — write-only workbook في ملف مؤقت (core.exports)."""
+    return documents_xlsx_response(request)
 
 
 @api_view(["GET"])
@@ -174,14 +135,20 @@ def import_template_api(request):
 # ======= Import (.xlsx) =======
 from rest_framework.parsers import MultiPartParser, FormParser, FileUploadParser
 
+from core.jobs import enqueue, job_payload
+
+from .importers import DocumentImportError, import_documents
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser, FileUploadParser])
 def import_xlsx_api(request):
     """
-    Import documents from uploaded Excel file.
-    Expected headers (case/space-insensitive): 
+    Import documents from uploaded Excel file (files.importers).
+    Expected headers (case/space-insensitive):
     ["Title", "Category", "Expires On", "Owner Email", "Alert Window Days", "Notes"]
+    - ?dry_run=1 → تحقق فقط بدون كتابة
+    الصفوف السليمة بتتسجل، والصفوف اللي فيها أخطاء بترجع في errors برقم الصف.
     """
     # احصل على الملف من multipart أو من data (في حال FileUploadParser)
     file_obj = request.FILES.get("file") or request.data.get("file")
@@ -196,85 +163,38 @@ def import_xlsx_api(request):
     if fname and not fname.lower().endswith(".xlsx"):
         return Response({"error": "Only .xlsx files are supported"}, status=status.HTTP_400_BAD_REQUEST)
 
+    dry_run = str(request.query_params.get("dry_run", "")).lower() in ("1", "true", "yes")
     try:
-        wb = load_workbook(file_obj, data_only=True)
-        ws = wb.active
-        rows = list(ws.iter_rows(values_only=True))
-
-        if not rows or len(rows) < 2:
-            return Response({"error": "File is empty or missing data"}, status=status.HTTP_400_BAD_REQUEST)
-
-        # مطابقة مرنة للهيدر
-        expected = ["Title", "Category", "Expires On", "Owner Email", "Alert Window Days", "Notes"]
-        header = [(h or "").strip() for h in rows[0]]
+        report = import_documents(file_obj, dry_run=dry_run)
+    except DocumentImportError as e:
+        return Response({"error": str(e), **e.extra}, status=status.HTTP_400_BAD_REQUEST)
 
-        def norm(s):
-            return (s or "").strip().lower()
+    if not report["total_rows"]:
+        return Response({"error": "File is empty or missing data"}, status=status.HTTP_400_BAD_REQUEST)
+    if not report["valid_rows"]:
+        return Response(report, status=status.HTTP_400_BAD_REQUEST)
+    report["message"] = f"Imported {report['imported']} documents"
+    return Response(report, status=status.HTTP_201_CREATED if report["imported"] else status.HTTP_200_OK)
 
-        if [norm(h) for h in header] != [norm(h) for h in expected]:
-            return Response(
-                {"error": "Invalid file format.",
-                 "expected": expected,
-                 "got": header},
-                status=status.HTTP_400_BAD_REQUEST
-            )
 
-        # استيراد الصفوف
-        imported = 0
-        from openpyxl.utils.datetime import from_excel as excel_to_dt
-
-        for row in rows[1:]:
-            if not row or not any(row):
-                continue
-
-            title, category_name, expires_on, owner_email, alert_days, notes = row
-
-            # تحويل التاريخ إن كان رقم Excel أو نص ISO
-            if isinstance(expires_on, (datetime, date)):
-                # ok
-                pass
-            elif isinstance(expires_on, (int, float)):
-                try:
-                    expires_on = excel_to_dt(expires_on)
-                except Exception:
-                    expires_on = None
-            elif isinstance(expires_on, str):
-                try:
-                    # يقبل "YYYY-MM-DD" أو "YYYY-MM-DDTHH:MM:SS"
-                    expires_on = datetime.fromisoformat(expires_on)
-                except Exception:
-                    expires_on = None
-            else:
-                expires_on = None
-
-            # حول datetime إلى date إن لزم
-            if isinstance(expires_on, datetime):
-                expires_on = expires_on.date()
-
-            # alert_days إلى int
-            try:
-                alert_days = int(alert_days) if alert_days is not None else 0
-            except Exception:
-                alert_days = 0
-
-            category = None
-            if category_name:
-                category, _ = Category.objects.get_or_create(name=str(category_name).strip())
-
-            Document.objects.create(
-                title=str(title).strip() if title else "",
-                category=category,
-                expires_on=expires_on,
-                owner_email=(owner_email or "")[:254],
-                alert_window_days=alert_days,
-                notes=notes or "",
-            )
-            imported += 1
-
-        return Response({"message": f"Imported {imported} documents"}, status=status.HTTP_200_OK)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser, FileUploadParser])
+def import_xlsx_job_api(request):
+    """
+    نفس import_xlsx_api بس في الخلفية (core.jobs): بيرجّع 202 + job_id فورًا.
+    المتابعة: GET /api/core/import-jobs/<job_id>/ أو WebSocket (event = import_progress).
+    """
+    file_obj = request.FILES.get("file") or request.data.get("file")
+    if not file_obj:
+        return Response(
+            {"error": "No file uploaded. Send as multipart/form-data with field name 'file'."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    fname = getattr(file_obj, "name", "") or ""
+    if fname and not fname.lower().endswith(".xlsx"):
+        return Response({"error": "Only .xlsx files are supported"}, status=status.HTTP_400_BAD_REQUEST)
 
-    except Exception as e:
-        # سجّل الستاك تريس لتسهيل الديبج
-        import logging, traceback
-        logging.getLogger(__name__).error("Import failed: %s\n%s", e, traceback.format_exc())
-        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    dry_run = str(request.query_params.get("dry_run", "")).lower() in ("1", "true", "yes")
+    job = enqueue("files.documents", file_obj, user=request.user, options={"dry_run": dry_run})
+    return Response(job_payload(job), status=status.HTTP_202_ACCEPTED)
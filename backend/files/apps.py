@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FilesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'files'
+
+    def ready(self):
+        # إيميلات الانتهاء عند الحفظ (بتتكتب في الـ outbox بس)
+        from . import signals  # noqa: F401
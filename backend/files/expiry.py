@@ -0,0 +1,197 @@
+# files/expiry.py
+"""
+فحص الانتهاء الليلي (notify_expiring) — set-based.
+
+- الـ due set بيتحسب في الـ SQL: offset = expires_on - today (DaysUntil) وبيتقارن بالنوافذ هناك،
+  والمستندات اللي اتبلغت قبل كده بنفس (expires_on, offset) بتتشال بـ exclude — مفيش Python لكل مستند.
+- الـ index (expires_on, last_notified_for_expires_on, last_notified_for_offset) بيغطي الفلتر ده
+  (الحد الأدنى لـ expires_on بيشيل كل اللي انتهى من زمان).
+- الإيميل digest واحد لكل مستلم (مش إيميل لكل مستند) عن طريق الـ outbox (core.outbox).
+- الحالة (last_notified_*) بتتحدث بـ UPDATE على دفعات، في نفس الـ transaction بتاعة الـ outbox.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateField, F, Func, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from core.outbox import enqueue_many
+
+from .models import Document
+
+logger = logging.getLogger(__name__)
+
+# تقدر تغيّرها من settings لو حابب
+DEFAULT_WINDOWS = set(getattr(settings, "DEFAULT_REMINDER_WINDOWS", [14, 7, 3, 1, 0]))
+INCLUDE_EXPIRED_DAYS = int(getattr(settings, "INCLUDE_EXPIRED_DAYS", 7))  # ابعت للمنتهي خلال آخر N أيام
+DEFAULT_ALERT_WINDOW = 7  # alert_window_days = 0 → 7 (زي `alert_window_days or 7`)
+CHUNK_SIZE = 2000
+DIGEST_MAX_ITEMS = int(getattr(settings, "EXPIRY_DIGEST_MAX_ITEMS", 200))
+
+
+def site_url():
+    return getattr(settings, "SITE_BASE_URL", "http://localhost:8000").rstrip("/")
+
+
+class DaysUntil(Func):
+    """(expression - day) بالأيام كـ integer جوّه الـ SQL."""
+    template = "(%(expressions)s)"  # PostgreSQL/Oracle: date - date = عدد أيام
+    arg_joiner = " - "
+    output_field = IntegerField()
+
+    def __init__(self, expression, day, **extra):
+        super().__init__(expression, Value(day, output_field=DateField()), **extra)
+
+    def as_sqlite(self, compiler, connection, **extra):
+        return self.as_sql(compiler, connection, template="CAST(julianday(%(expressions)s) AS INTEGER)",
+                           arg_joiner=") - julianday(", **extra)
+
+    def as_mysql(self, compiler, connection, **extra):
+        return self.as_sql(compiler, connection, template="DATEDIFF(%(expressions)s)", arg_joiner=", ", **extra)
+
+
+# ======================== Due set ========================
+def due_documents(today=None, windows=None, include_expired_days=None):
+    """
+    المستندات اللي محتاجة تذكير النهاردة (annotated بـ offset = الأيام الباقية):
+    offset >= -N، وكمان offset <= alert_window_days أو ±offset في النوافذ المعيارية،
+    ومش متبلغ عنها قبل كده بنفس (expires_on, offset).
+    """
+    today = today or timezone.localdate()
+    windows = sorted(DEFAULT_WINDOWS if windows is None else set(windows))
+    if include_expired_days is None:
+        include_expired_days = INCLUDE_EXPIRED_DAYS
+
+    return (
+        Document.objects
+        # نفس الفلتر القديم: المنتهي من أكتر من N يوم مبيتبعتلوش (N=0 → مفيش تنبيهات للمنتهي)
+        .filter(expires_on__gte=today - timedelta(days=include_expired_days))
+        .annotate(
+            offset=DaysUntil("expires_on", today),
+            window=Case(When(alert_window_days=0, then=Value(DEFAULT_ALERT_WINDOW)),
+                        default=F("alert_window_days"), output_field=IntegerField()),
+        )
+        .filter(
+            Q(offset__gte=-include_expired_days, offset__lte=F("window"))
+            # -offset في النوافذ (المنتهي) متغطي بالشرط الأول طالما offset >= -N
+            | Q(offset__in=windows)
+        )
+        .exclude(last_notified_for_expires_on=F("expires_on"), last_notified_for_offset=F("offset"))
+    )
+
+
+def recipients_for(owner_email):
+    to_list = [owner_email.strip()] if (owner_email or "").strip() else []
+    for f in getattr(settings, "NOTIFY_FALLBACK_EMAILS", []) or []:
+        if f and f not in to_list:
+            to_list.append(f)
+    return to_list
+
+
+def _line(row):
+    days = row["offset"]
+    if days > 0:
+        when = f"expires in {days} day(s)"
+    elif days == 0:
+        when = "expires today"
+    else:
+        when = f"expired {-days} day(s) ago"
+    return (
+        f"- {row['title']} [{row['category__name'] or '—'}] — {row['expires_on']} ({when})\n"
+        f"  {site_url()}/app/files/documents/{row['pk']}\n"
+    )
+
+
+class Digest:
+    """المستندات المستحقة لمستلم واحد (أول DIGEST_MAX_ITEMS سطر + العدد الكلي)."""
+
+    def __init__(self):
+        self.lines = []
+        self.count = 0
+        self.expired = 0
+
+    def add(self, row):
+        self.count += 1
+        self.expired += row["offset"] < 0
+        if len(self.lines) < DIGEST_MAX_ITEMS:
+            self.lines.append(_line(row))
+
+    def subject(self):
+        brand = getattr(settings, "BRAND_NAME", "Documents")
+        expired = f", {self.expired} expired" if self.expired else ""
+        return f"[{brand}] Expiry alert: {self.count} document(s){expired}"
+
+    def body(self):
+        more = self.count - len(self.lines)
+        tail = f"\n…and {more} more: {site_url()}/app/files/documents\n" if more > 0 else ""
+        return "The following documents are expiring or have expired:\n\n" + "".join(self.lines) + tail
+
+
+def collect(qs):
+    """يمشي على الـ due set مرة واحدة: ({email: Digest}, [pks])."""
+    digests, pks = defaultdict(Digest), []
+    rows = qs.values("pk", "title", "category__name", "expires_on", "owner_email", "offset")
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        pks.append(row["pk"])
+        for email in recipients_for(row["owner_email"]):
+            digests[email].add(row)
+    return dict(digests), pks
+
+
+def mark_notified(qs, pks, today):
+    """(expires_on, offset) للمستندات دي — UPDATE واحد لكل دفعة، والـ offset بيتحسب في الـ SQL."""
+    updated = 0
+    for start in range(0, len(pks), CHUNK_SIZE):
+        updated += qs.filter(pk__in=pks[start:start + CHUNK_SIZE]).update(
+            last_notified_on=today,
+            last_notified_for_expires_on=F("expires_on"),
+            last_notified_for_offset=DaysUntil("expires_on", today),
+            updated_at=timezone.now(),
+        )
+    return updated
+
+
+def notify_users(digests):
+    """إشعار داخل السيستم (digest) لكل user إيميله من المستلمين."""
+    if not digests:
+        return 0
+    from django.contrib.auth import get_user_model
+
+    from notifications.models import Notification
+
+    created = 0
+    users = get_user_model().objects.filter(email__in=list(digests), is_active=True)
+    for user in users.only("pk", "email").iterator():
+        digest = digests[user.email]
+        try:
+            # create() مش bulk_create: save() هو اللي بيعمل push على الـ WebSocket
+            Notification.objects.create(user=user, title=digest.subject(), body=digest.body())
+            created += 1
+        except Exception as e:  # noqa: BLE001 — الإيميل هو الأساس؛ الـ push اختياري
+            logger.warning(f"Expiry notification for user={user.pk} failed: {e}")
+    return created
+
+
+def run(today=None, windows=None, include_expired_days=None, dry_run=False):
+    """الـ scan كله. يرجّع {"due", "digests", "notifications"} (+ "preview" في dry_run)."""
+    today = today or timezone.localdate()
+    qs = due_documents(today, windows, include_expired_days)
+    digests, pks = collect(qs)
+    report = {"due": len(pks), "digests": len(digests), "notifications": 0}
+    if dry_run:
+        report["preview"] = {email: d.count for email, d in digests.items()}
+        return report
+    if not pks:
+        return report
+
+    with transaction.atomic():
+        enqueue_many([
+            {"subject": d.subject(), "body": d.body(), "to": [email], "ref": "files.expiry"}
+            for email, d in digests.items()
+        ])
+        mark_notified(qs, pks, today)
+    report["notifications"] = notify_users(digests)
+    return report
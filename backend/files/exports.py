@@ -0,0 +1,146 @@
+# files/exports.py
+"""
+تصدير المستندات بالـ streaming.
+
+- الـ rows من values_list(...).iterator(chunk_size) — مفيش model instances ومفيش queryset كامل في الذاكرة.
+- CSV بيتكتب على دفعات (EXPORT_FLUSH_ROWS صف لكل chunk) في StreamingHttpResponse،
+  فأول bytes بتطلع فورًا والذاكرة ثابتة مهما كان عدد المستندات.
+- gzip لو الكلاينت بيقبله (Accept-Encoding) — compress بالـ streaming برضه (?gzip=0 يقفله).
+- XLSX عن طريق core.exports (write-only + ملف مؤقت + FileResponse).
+- الاتنين بيقبلوا ?columns=title,expires_on,... (DOCUMENT_EXPORT).
+"""
+import csv
+import zlib
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+from core.exports import ExportSpec, export_response, iter_rows
+
+from .filters import DocumentExportFilter
+from .models import Document
+
+DOCUMENT_EXPORT = ExportSpec("Documents", [
+    ("title", "Title", "title"),
+    ("category", "Category", "category__name"),
+    ("expires_on", "Expires On", "expires_on"),
+    ("owner_email", "Owner Email", "owner_email"),
+    ("alert_window_days", "Alert Window Days", "alert_window_days"),
+    ("notes", "Notes", "notes"),
+    ("created_at", "Created At", "created_at"),
+], default=["title", "category", "expires_on", "owner_email", "alert_window_days", "notes"])
+
+
+def document_queryset(params=None):
+    qs = Document.objects.order_by("expires_on", "title", "pk")
+    if params:
+        filterset = DocumentExportFilter(params, queryset=qs)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        qs = filterset.qs
+    return qs
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, str):
+        return value.replace("\r", " ").replace("\n", " ").strip()
+    return value
+
+
+class _Lines:
+    """file-like لـ csv.writer: بيجمّع السطور لحد ما الـ generator ياخدها."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, value):
+        self.parts.append(value)
+
+    def take(self):
+        out, self.parts = "".join(self.parts), []
+        return out
+
+
+def iter_csv(header, rows, flush_rows=None):
+    flush_rows = flush_rows or int(getattr(settings, "EXPORT_FLUSH_ROWS", 500))
+    buf = _Lines()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    pending = 1
+    for row in rows:
+        writer.writerow([_csv_value(v) for v in row])
+        pending += 1
+        if pending >= flush_rows:
+            yield buf.take().encode("utf-8")
+            pending = 0
+    tail = buf.take()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # 16+ = gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _encoding_qualities(header):
+    """Accept-Encoding → {coding: q} (الـ q الغلط بيتعامل كـ 0)."""
+    qualities = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+    return qualities
+
+
+def accepts_gzip(request):
+    """gzip;q=0 (أو *;q=0 من غير gzip) = رفض — مش مجرد إن الكلمة موجودة في الهيدر."""
+    if request.GET.get("gzip") in ("0", "false"):
+        return False
+    qualities = _encoding_qualities(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def streaming_csv_response(filename, header, rows, gzip=False):
+    chunks = iter_csv(header, rows)
+    resp = StreamingHttpResponse(gzip_stream(chunks) if gzip else chunks, content_type="text/csv; charset=utf-8")
+    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+    resp["Vary"] = "Accept-Encoding"
+    if gzip:
+        resp["Content-Encoding"] = "gzip"
+    return resp
+
+
+def documents_csv_response(request):
+    qs = document_queryset(request.GET)
+    columns = DOCUMENT_EXPORT.select_from_request(request)
+    header = [title for _, title, _ in columns]
+    return streaming_csv_response(
+        "documents.csv", header, iter_rows(qs, columns), gzip=accepts_gzip(request)
+    )
+
+
+def documents_xlsx_response(request):
+    return export_response(DOCUMENT_EXPORT, document_queryset(request.GET), request, "documents.xlsx")
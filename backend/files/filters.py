@@ -0,0 +1,15 @@
+# files/filters.py
+import django_filters
+
+from .models import Category, Document
+
+
+class DocumentExportFilter(django_filters.FilterSet):
+    """?category=1&category=4&expires_after=2025-01-01&expires_before=2025-12-31"""
+    category = django_filters.ModelMultipleChoiceFilter(queryset=Category.objects.all())
+    expires_after = django_filters.DateFilter(field_name="expires_on", lookup_expr="gte")
+    expires_before = django_filters.DateFilter(field_name="expires_on", lookup_expr="lte")
+
+    class Meta:
+        model = Document
+        fields = ["category"]
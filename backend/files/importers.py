@@ -0,0 +1,223 @@
+# files/importers.py
+"""
+استيراد المستندات من XLSX بالجملة.
+
+- الملف بيتقرا read-only (streaming) — الـ workbook مش بيتحمّل كله في الذاكرة.
+- كل صف بيتحقق لوحده؛ الأخطاء بترجع برقم الصف في الشيت (الصفوف السليمة بتتسجل).
+- الـ categories كلها بتتحل في استعلام واحد (والناقص بيتعمل بـ bulk_create واحد).
+- Document.objects.bulk_create على دفعات — مفيش post_save لكل صف.
+- الإشعارات (اللي كانت بتتبعت من الـ signal لكل صف) بتتكتب مرة واحدة بعد الـ commit
+  (files.notify.send_notifications: bulk INSERT في الـ outbox؛ الإرسال في الخلفية).
+"""
+import logging
+from contextlib import nullcontext
+from datetime import date, datetime
+from zipfile import BadZipFile
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .models import Category, Document
+from .notify import due_on_create, send_notifications
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+EXPECTED_HEADERS = ["Title", "Category", "Expires On", "Owner Email", "Alert Window Days", "Notes"]
+TITLE_MAX = Document._meta.get_field("title").max_length
+CATEGORY_MAX = Category._meta.get_field("name").max_length
+
+
+class DocumentImportError(Exception):
+    """الملف نفسه مش مقروء (امتداد/هيدر) — مش خطأ صف."""
+
+    def __init__(self, message, **extra):
+        super().__init__(message)
+        self.extra = extra
+
+
+def _norm(value):
+    return str(value or "").strip().lower()
+
+
+# ======================== Parsing ========================
+def iter_sheet(file_obj):
+    """(رقم الصف في الشيت, tuple) من أول شيت — read-only streaming، الصفوف الفاضية بتتشال."""
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        wb = load_workbook(file_obj, read_only=True, data_only=True)
+    except (InvalidFileException, BadZipFile, KeyError, OSError, ValueError) as e:
+        raise DocumentImportError(f"Could not read workbook: {e}")
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h or "").strip() for h in next(rows, ())]
+        # ممكن الشيت يبقى فيه أعمدة فاضية زيادة في الآخر
+        while header and not header[-1]:
+            header.pop()
+        if [_norm(h) for h in header] != [_norm(h) for h in EXPECTED_HEADERS]:
+            raise DocumentImportError("Invalid file format.", expected=EXPECTED_HEADERS, got=header)
+        for number, row in enumerate(rows, start=2):
+            if row and any(v not in (None, "") for v in row):
+                yield number, tuple(row[:len(EXPECTED_HEADERS)]) + (None,) * (len(EXPECTED_HEADERS) - len(row))
+    finally:
+        wb.close()
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        from openpyxl.utils.datetime import from_excel
+        try:
+            return _parse_date(from_excel(value))
+        except (ValueError, OverflowError):
+            return None
+    if isinstance(value, str) and value.strip():
+        text = value.strip()
+        try:
+            return datetime.fromisoformat(text).date()
+        except ValueError:
+            pass
+        for fmt in ("%d/%m/%Y", "%d-%m-%Y"):
+            try:
+                return datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+    return None
+
+
+def parse_row(row):
+    """يرجّع (fields, category_name, errors) — errors: {عمود: رسالة}."""
+    title, category_name, expires_on, owner_email, alert_days, notes = row
+    errors = {}
+
+    title = str(title).strip() if title is not None else ""
+    if not title:
+        errors["Title"] = "This field is required."
+    elif len(title) > TITLE_MAX:
+        errors["Title"] = f"Ensure this field has no more than {TITLE_MAX} characters."
+
+    category_name = str(category_name).strip() if category_name not in (None, "") else ""
+    if len(category_name) > CATEGORY_MAX:
+        errors["Category"] = f"Ensure this field has no more than {CATEGORY_MAX} characters."
+
+    parsed_date = _parse_date(expires_on)
+    if parsed_date is None:
+        errors["Expires On"] = "Enter a valid date (YYYY-MM-DD)." if expires_on not in (None, "") \
+            else "This field is required."
+
+    owner_email = str(owner_email).strip() if owner_email not in (None, "") else ""
+    if owner_email:
+        try:
+            validate_email(owner_email)
+        except DjangoValidationError:
+            errors["Owner Email"] = "Enter a valid email address."
+
+    if alert_days in (None, ""):
+        alert_days = 0
+    else:
+        try:
+            alert_days = int(float(alert_days))
+            if alert_days < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors["Alert Window Days"] = "Enter a whole number ≥ 0."
+
+    fields = {
+        "title": title,
+        "expires_on": parsed_date,
+        "owner_email": owner_email,
+        "alert_window_days": alert_days,
+        "notes": "" if notes is None else str(notes),
+    }
+    return fields, category_name, errors
+
+
+# ======================== Import ========================
+def resolve_categories(names):
+    """({name: Category}, عدد اللي اتعمل) — استعلام واحد + bulk_create للناقص."""
+    names = {n for n in names if n}
+    if not names:
+        return {}, 0
+    found = {c.name: c for c in Category.objects.filter(name__in=names)}
+    missing = names - set(found)
+    if missing:
+        Category.objects.bulk_create([Category(name=n) for n in sorted(missing)], ignore_conflicts=True)
+        found.update({c.name: c for c in Category.objects.filter(name__in=missing)})
+    return found, len(missing)
+
+
+def import_documents(file_obj, dry_run=False, notify=True, batch_size=BATCH_SIZE, progress=None, atomic=True):
+    """
+    يرجّع report: {"total_rows", "valid_rows", "imported", "categories_created", "errors": [{"row", "errors"}]}.
+    DocumentImportError لو الملف نفسه مش سليم.
+    progress(stage, processed, total, imported): للـ import jobs (core.jobs).
+    atomic=False: كل دفعة في transaction لوحدها (الـ job يقدر يتابع/يتلغي في النص).
+    """
+    progress = progress or (lambda *args, **kwargs: None)
+    parsed, errors, total = [], [], 0
+    for number, row in iter_sheet(file_obj):
+        total += 1
+        fields, category_name, row_errors = parse_row(row)
+        if row_errors:
+            errors.append({"row": number, "errors": row_errors})
+        else:
+            parsed.append((fields, category_name))
+        if total % batch_size == 0:
+            progress("parsing", processed=total)
+    progress("parsing", processed=total, total=total, force=True)
+
+    report = {
+        "total_rows": total,
+        "valid_rows": len(parsed),
+        "imported": 0,
+        "categories_created": 0,
+        "errors": errors,
+        "dry_run": dry_run,
+    }
+    if dry_run or not parsed:
+        return report
+
+    names = {name for _, name in parsed if name}
+    outer = transaction.atomic() if atomic else nullcontext()
+    batch = nullcontext if atomic else transaction.atomic
+    due = []
+    with outer:
+        with batch():
+            categories, report["categories_created"] = resolve_categories(names)
+
+        for start in range(0, len(parsed), batch_size):
+            docs = [
+                Document(category=categories.get(name), **fields)
+                for fields, name in parsed[start:start + batch_size]
+            ]
+            with batch():
+                created = Document.objects.bulk_create(docs)
+                report["imported"] += len(created)
+                progress("saving", processed=start + len(docs), total=len(parsed), imported=report["imported"])
+            if notify:
+                due += [d for d in created if due_on_create(d)]
+
+        if due:
+            transaction.on_commit(lambda: _notify(due))
+    return report
+
+
+def run_import_job(job, file_obj, progress):
+    """core.jobs: kind = "files.documents"."""
+    return import_documents(
+        file_obj, dry_run=bool(job.options.get("dry_run")), progress=progress, atomic=False,
+    )
+
+
+def _notify(docs):
+    # الاستيراد نفسه اتسجل؛ فشل الإيميل مايرجعش 500
+    try:
+        send_notifications(docs)
+    except Exception:  # noqa: BLE001
+        logger.exception("Post-import notifications failed for %d documents", len(docs))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['expires_on', 'last_notified_for_expires_on', 'last_notified_for_offset'], name='files_doc_expiry_scan_idx'),
+        ),
+    ]
@@ -46,6 +46,13 @@ class Document(models.Model):
 
     class Meta:
         ordering = ['expires_on', 'title']
+        indexes = [
+            # notify_expiring (files.expiry.due_documents): range على expires_on + استبعاد المتبلغ عنه
+            models.Index(
+                fields=['expires_on', 'last_notified_for_expires_on', 'last_notified_for_offset'],
+                name='files_doc_expiry_scan_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -1,8 +1,13 @@
 # files/notify.py
+"""
+إيميلات انتهاء المستندات — بتتكتب في الـ outbox (core.outbox) ومبتتبعتش هنا:
+الـ save/الاستيراد مفيهوش SMTP؛ الإرسال والمحاولات في الـ dispatcher.
+"""
 from django.conf import settings
-from django.core.mail import send_mail
 from django.utils import timezone
 
+from core.outbox import enqueue, enqueue_many
+
 SITE_BASE_URL = getattr(settings, "SITE_BASE_URL", "http://localhost:8000")
 DEFAULT_WINDOWS = getattr(
     settings, "DEFAULT_REMINDER_WINDOWS", [14, 7, 3, 1, 0])
@@ -38,9 +43,13 @@ def _build_subject_body(doc):
     return subject, body
 
 
+def _ref(doc):
+    return f"files.Document:{doc.pk}"
+
+
 def send_notification(doc, *, force=False):
     """
-    يرسل مرة واحدة كحد أقصى في اليوم.
+    يحط الإيميل في الـ outbox مرة واحدة كحد أقصى في اليوم.
     لا يستخدم instance.save() حتى لا يشغّل post_save signal.
     """
     from .models import Document
@@ -59,10 +68,42 @@ def send_notification(doc, *, force=False):
         return False
 
     subject, body = _build_subject_body(doc)
-    send_mail(subject, body, settings.DEFAULT_FROM_EMAIL,
-              recipients, fail_silently=False)
+    enqueue(subject, body, recipients, settings.DEFAULT_FROM_EMAIL, ref=_ref(doc))
 
     # حدّث بدون إشعال signals
     Document.objects.filter(pk=doc.pk).update(last_notified_on=today)
     doc.last_notified_on = today
     return True
+
+
+def due_on_create(doc):
+    """مستند جديد: منتهي أو داخل نافذة التبليغ (نفس شرط post_save عند الإنشاء)."""
+    d = doc.days_to_expiry
+    return d <= 0 or d <= doc.alert_window_days
+
+
+def send_notifications(docs):
+    """
+    send_notification(force=True) لمجموعة مستندات مرة واحدة (بعد import مثلًا):
+    bulk INSERT في الـ outbox + UPDATE واحد لـ last_notified_on. يرجّع عدد الإيميلات.
+    """
+    from .models import Document
+    today = timezone.localdate()
+
+    messages, sent_ids = [], []
+    for doc in docs:
+        if doc.last_notified_on == today:
+            continue
+        recipients = _recipients_for(doc)
+        if not recipients:
+            continue
+        subject, body = _build_subject_body(doc)
+        messages.append({"subject": subject, "body": body, "to": recipients,
+                         "from_email": settings.DEFAULT_FROM_EMAIL, "ref": _ref(doc)})
+        sent_ids.append(doc.pk)
+    if not messages:
+        return 0
+
+    enqueue_many(messages)
+    Document.objects.filter(pk__in=sent_ids).update(last_notified_on=today)
+    return len(messages)
@@ -3,7 +3,7 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from .models import Document
-from .notify import send_notification, should_notify
+from .notify import due_on_create, send_notification, should_notify
 
 
 @receiver(post_save, sender=Document)
@@ -13,7 +13,7 @@ def notify_on_create_or_update(sender, instance: Document, created, **kwargs):
 
     if created:
         # (1) اتضاف منتهي  أو (2) اتضاف داخل نافذة التبليغ
-        if d <= 0 or d <= instance.alert_window_days:
+        if due_on_create(instance):
             send_notification(instance, force=True)
         return
 
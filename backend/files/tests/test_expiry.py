@@ -0,0 +1,89 @@
+import random
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.models import OutboxEmail
+from core.outbox import drain
+from files.expiry import due_documents, run
+from files.models import Document
+from notifications.models import Notification
+
+WINDOWS = {14, 7, 3, 1, 0}
+
+
+def baseline_due(doc, today, include_expired_days):
+    """notify_expiring القديم: الفلتر الأولي + should_notify لكل مستند."""
+    if doc.expires_on < today - timedelta(days=include_expired_days):
+        return False
+    days = (doc.expires_on - today).days
+    win = doc.alert_window_days or 7
+    due = -include_expired_days <= days <= win or days in WINDOWS or -days in WINDOWS
+    if doc.last_notified_for_expires_on == doc.expires_on and doc.last_notified_for_offset == days:
+        return False
+    return due
+
+
+@pytest.fixture
+def documents(db):
+    today = timezone.localdate()
+    rnd = random.Random(25)
+    docs = []
+    for i in range(800):
+        expires_on = today + timedelta(days=rnd.randint(-30, 40))
+        doc = Document(
+            title=f"d{i}", expires_on=expires_on, alert_window_days=rnd.choice([0, 5, 7, 20, 30]),
+            owner_email=rnd.choice(["", "o1@x.com", "o2@x.com", "o3@x.com"]),
+        )
+        if rnd.random() < 0.3:
+            doc.last_notified_for_expires_on = expires_on
+            doc.last_notified_for_offset = (expires_on - today).days + rnd.choice([0, 1])
+        docs.append(doc)
+    # منتهي من 14 يوم بالظبط: في النوافذ (-14) بس برّه INCLUDE_EXPIRED_DAYS
+    docs.append(Document(title="o-14", expires_on=today - timedelta(days=14), alert_window_days=7))
+    return Document.objects.bulk_create(docs)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("include_expired_days", [7, 3, 0])
+def test_due_set_matches_baseline(documents, include_expired_days):
+    today = timezone.localdate()
+    expected = {d.pk for d in Document.objects.all() if baseline_due(d, today, include_expired_days)}
+    got = set(due_documents(today, include_expired_days=include_expired_days).values_list("pk", flat=True))
+    assert expected and got == expected
+    assert not Document.objects.filter(pk__in=got, title="o-14").exists()
+    if include_expired_days == 0:
+        assert not Document.objects.filter(pk__in=got, expires_on__lt=today).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_sends_one_digest_per_recipient(documents, settings, django_assert_max_num_queries):
+    settings.NOTIFY_FALLBACK_EMAILS = []
+    get_user_model().objects.create_user(username="o1", email="o1@x.com", password="x")
+    today = timezone.localdate()
+    due = list(due_documents(today).values_list("pk", "owner_email"))
+
+    with django_assert_max_num_queries(20):
+        report = run(today)
+    recipients = {email for _, email in due if email}
+    assert report["due"] == len(due) and report["digests"] == len(recipients) and report["notifications"] == 1
+    assert not due_documents(today).exists()
+
+    doc = Document.objects.get(pk=due[0][0])
+    assert doc.last_notified_on == today
+    assert doc.last_notified_for_expires_on == doc.expires_on
+    assert doc.last_notified_for_offset == (doc.expires_on - today).days
+
+    drain()
+    assert sorted(m.to[0] for m in mail.outbox) == sorted(recipients)
+    digest = next(m for m in mail.outbox if m.to == ["o1@x.com"])
+    assert f"{sum(1 for _, email in due if email == 'o1@x.com')} document(s)" in digest.subject
+    assert Notification.objects.count() == 1
+
+    # تاني مرة في نفس اليوم: مفيش تكرار
+    call_command("notify_expiring")
+    assert OutboxEmail.objects.count() == len(recipients)
@@ -0,0 +1,46 @@
+import gzip
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from files.exports import accepts_gzip
+
+URL = "/api/files/export/csv/"
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", True),
+    ("deflate;q=1.0, gzip;q=0.5", True),
+    ("x-gzip", True),
+    ("*", True),
+    ("", False),
+    ("identity", False),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, deflate", False),
+    ("gzip;q=0, *;q=1", False),
+    ("*;q=0", False),
+    ("gzip;q=abc", False),
+    ("br;q=1, notgzip", False),
+])
+def test_accepts_gzip_reads_q_values(header, expected):
+    assert accepts_gzip(RequestFactory().get("/", HTTP_ACCEPT_ENCODING=header)) is expected
+
+
+def test_gzip_query_param_opts_out():
+    assert accepts_gzip(RequestFactory().get("/?gzip=0", HTTP_ACCEPT_ENCODING="gzip")) is False
+
+
+@pytest.mark.django_db
+def test_csv_export_is_compressed_only_when_accepted():
+    client = APIClient()
+    client.force_authenticate(get_user_model().objects.create_user(username="u", password="x"))
+
+    plain = client.get(URL, HTTP_ACCEPT_ENCODING="gzip;q=0")
+    assert "Content-Encoding" not in plain
+    header = b"".join(plain.streaming_content)
+
+    packed = client.get(URL, HTTP_ACCEPT_ENCODING="gzip")
+    assert packed["Content-Encoding"] == "gzip"
+    assert gzip.decompress(b"".join(packed.streaming_content)) == header
@@ -0,0 +1,109 @@
+import io
+from datetime import date, timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+
+from core.models import OutboxEmail
+from files.importers import EXPECTED_HEADERS, DocumentImportError, import_documents
+from files.models import Category, Document
+
+pytestmark = pytest.mark.django_db
+
+FAR = date.today() + timedelta(days=365)
+
+
+def workbook(*rows, header=EXPECTED_HEADERS):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return buf
+
+
+def test_bad_header_is_a_file_error():
+    with pytest.raises(DocumentImportError) as exc:
+        import_documents(workbook(header=["Title", "Category"]))
+    assert exc.value.extra["got"] == ["Title", "Category"]
+
+
+def test_row_errors_are_reported_and_valid_rows_are_saved():
+    report = import_documents(workbook(
+        ("Lease", "Contracts", FAR, "a@example.com", 7, "n"),
+        ("", "Contracts", FAR, "", 7, ""),
+        ("Permit", "", "not a date", "nope", -1, ""),
+        ("Insurance", None, FAR.isoformat(), None, None, None),
+    ), notify=False)
+
+    assert report["total_rows"] == 4
+    assert report["valid_rows"] == report["imported"] == 2
+    assert report["errors"] == [
+        {"row": 3, "errors": {"Title": "This field is required."}},
+        {"row": 4, "errors": {
+            "Expires On": "Enter a valid date (YYYY-MM-DD).",
+            "Owner Email": "Enter a valid email address.",
+            "Alert Window Days": "Enter a whole number ≥ 0.",
+        }},
+    ]
+    assert set(Document.objects.values_list("title", flat=True)) == {"Lease", "Insurance"}
+    assert Document.objects.get(title="Insurance").alert_window_days == 0
+
+
+def test_dry_run_saves_nothing():
+    report = import_documents(workbook(("Lease", "Contracts", FAR, "", 7, "")), dry_run=True)
+    assert report["valid_rows"] == 1 and report["imported"] == 0
+    assert not Document.objects.exists() and not Category.objects.exists()
+
+
+def test_categories_are_resolved_once_and_missing_ones_created():
+    existing = Category.objects.create(name="Contracts")
+    rows = [(f"Doc {i}", ("Contracts", "Licenses", "Permits")[i % 3], FAR, "", 7, "") for i in range(9)]
+
+    report = import_documents(workbook(*rows), notify=False)
+
+    assert report["categories_created"] == 2
+    assert Category.objects.count() == 3
+    assert Document.objects.filter(category=existing).count() == 3
+    assert Document.objects.filter(category__name="Licenses").count() == 3
+
+
+def test_documents_are_inserted_in_batches():
+    rows = [(f"Doc {i}", "Contracts", FAR, "", 7, "") for i in range(25)]
+    progress = []
+
+    with CaptureQueriesContext(connection) as ctx:
+        report = import_documents(
+            workbook(*rows), notify=False, batch_size=10,
+            progress=lambda stage, **kw: progress.append((stage, kw)),
+        )
+
+    assert report["imported"] == Document.objects.count() == 25
+    inserts = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "files_document"')]
+    assert len(inserts) == 3
+    assert [kw["imported"] for stage, kw in progress if stage == "saving"] == [10, 20, 25]
+
+
+def test_notifications_are_written_once_after_commit(django_capture_on_commit_callbacks):
+    soon = date.today() + timedelta(days=3)
+    rows = [
+        ("Due 1", "", soon, "a@example.com", 7, ""),
+        ("Due 2", "", soon, "b@example.com", 7, ""),
+        ("Later", "", FAR, "c@example.com", 7, ""),
+        ("No owner", "", soon, "", 7, ""),
+    ]
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        import_documents(workbook(*rows), notify=True)
+    assert len(callbacks) == 1
+    assert not OutboxEmail.objects.exists()
+
+    callbacks[0]()
+    assert sorted(m.to for m in OutboxEmail.objects.all()) == [["a@example.com"], ["b@example.com"]]
+    notified = set(Document.objects.filter(last_notified_on=date.today()).values_list("title", flat=True))
+    assert notified == {"Due 1", "Due 2"}
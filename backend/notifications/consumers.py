@@ -39,3 +39,7 @@ class NotificationConsumer(AsyncJsonWebsocketConsumer):
         }
         await self.send_json(notification)
         print(f"🟢 CONSUMER DEBUG: sent to user {self.scope['user'].username}")
+
+    async def import_progress(self, event):
+        # core.jobs: حالة/تقدم import job بتاع المستخدم ده
+        await self.send_json({"event": "import_progress", **event["job"]})
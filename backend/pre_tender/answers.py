@@ -0,0 +1,135 @@
+# pre_tender/answers.py
+"""
+حفظ إجابات التندر دفعة واحدة (autosave للفورمات الكبيرة).
+
+- الـ validation على Tender.field_index (snapshots.tender_field_index) مش على الـ snapshot كله.
+- bulk_upsert_answers(tender, items): validation لكل الليستة مرة واحدة، وبعدين
+  bulk_create(update_conflicts=True) على (tender, field_key)؛ لو الداتابيز مش بتدعم
+  ON CONFLICT ... DO UPDATE → SELECT واحد + bulk_update + bulk_create.
+- الـ items الغلط بترجع في errors (index/field_key) والسليمة بتتحفظ عادي (autosave جزئي).
+- بعد الحفظ: المعادلات اللي مدخلاتها اتغيرت بس بتتحسب (pre_tender.formulas) و Answer.computed يتكتب بالـ bulk.
+"""
+from django.db import connections, router, transaction
+
+from .models import Answer
+from .formulas import evaluate, template_formula_graph, to_json_number
+from .serializers import AnswerUpsertSerializer
+from .snapshots import tender_field_index
+
+UPSERT_FIELDS = ["value", "label_at_submit", "type_at_submit"]
+
+
+def validate_answers(items, index):
+    """يرجّع (rows, errors) — rows: field_key → (value, entry)، errors: [{index, field_key, errors}]."""
+    rows, errors = {}, []
+    for i, item in enumerate(items):
+        # validation في الذاكرة بس (مفيش queries) — الـ DB بتتلمس مرة واحدة في الآخر
+        ser = AnswerUpsertSerializer(data=item)
+        if not ser.is_valid():
+            raw_key = item.get("field_key") if isinstance(item, dict) else None
+            errors.append({"index": i, "field_key": raw_key, "errors": ser.errors})
+            continue
+        data = ser.validated_data
+        key = data["field_key"]
+        fd = index.get(key)
+        if fd is None or not fd.get("enabled", True):
+            errors.append({"index": i, "field_key": key,
+                           "errors": {"field_key": [f"Unknown field_key '{key}' for this tender."]}})
+            continue
+        rows[key] = (data["value"], fd)  # نفس الـ key مرتين → آخر قيمة
+    return rows, errors
+
+
+def _build(tender, rows):
+    return [
+        Answer(
+            tender=tender, field_key=key, value=value,
+            label_at_submit=(fd.get("label") or "")[:200],
+            type_at_submit=(fd.get("type") or "")[:20],
+        )
+        for key, (value, fd) in rows.items()
+    ]
+
+
+def _write(tender, objs, using, fields=UPSERT_FIELDS):
+    features = connections[using].features
+    if features.supports_update_conflicts_with_target:
+        Answer.objects.using(using).bulk_create(
+            objs, update_conflicts=True,
+            unique_fields=["tender", "field_key"], update_fields=fields,
+        )
+        return
+
+    # Fallback: الموجود يتحدّث والباقي يتعمل
+    existing = dict(
+        Answer.objects.using(using)
+        .filter(tender=tender, field_key__in=[o.field_key for o in objs])
+        .values_list("field_key", "pk")
+    )
+    to_update, to_create = [], []
+    for obj in objs:
+        if obj.field_key in existing:
+            obj.pk = existing[obj.field_key]
+            to_update.append(obj)
+        else:
+            to_create.append(obj)
+    if to_update:
+        Answer.objects.using(using).bulk_update(to_update, fields)
+    if to_create:
+        Answer.objects.using(using).bulk_create(to_create)
+
+
+def recompute_computed(tender, changed=None, values=None, index=None, using=None) -> dict:
+    """
+    يحسب المعادلات اللي اتأثرت بالـ keys دي (None = كلها) ويكتب Answer.computed بالـ bulk.
+    values: القيم اللي لسه متكتبة (مش محتاجين نقراها تاني). يرجّع {key: رقم أو None}.
+    """
+    graph = template_formula_graph(tender.template)
+    affected = graph.affected(changed)
+    if not affected:
+        return {}
+
+    values = dict(values or {})
+    using = using or router.db_for_write(Answer)
+    needed = graph.inputs_for(affected) - set(values) - set(affected)
+    if needed:
+        for key, value, computed in (Answer.objects.using(using)
+                                     .filter(tender=tender, field_key__in=needed)
+                                     .values_list("field_key", "value", "computed")):
+            values[key] = computed if key in graph.formulas else value
+
+    results = {key: to_json_number(v) for key, v in evaluate(graph, changed, values).items()}
+    if index is None:
+        index = tender_field_index(tender)
+    objs = [
+        Answer(
+            tender=tender, field_key=key, computed=value,
+            label_at_submit=(index.get(key, {}).get("label") or "")[:200],
+            type_at_submit=(index.get(key, {}).get("type") or "")[:20],
+        )
+        for key, value in results.items()
+    ]
+    _write(tender, objs, using, fields=["computed"])
+    return results
+
+
+def bulk_upsert_answers(tender, items, index=None):
+    """
+    يرجّع (saved, errors, computed). الـ items السليمة بتتحفظ حتى لو فيه errors في غيرها
+    (الـ autosave ميضيّعش الحقول الصح بسبب حقل واحد غلط).
+    computed: المعادلات اللي اتحسبت من جديد بسبب الإجابات دي بس.
+    """
+    if index is None:
+        index = tender_field_index(tender)
+    rows, errors = validate_answers(items, index)
+    if not rows:
+        return 0, errors, {}
+
+    using = router.db_for_write(Answer)
+    with transaction.atomic(using=using):
+        _write(tender, _build(tender, rows), using)
+        computed = recompute_computed(
+            tender, changed=list(rows), values={k: v for k, (v, _) in rows.items()},
+            index=index, using=using,
+        )
+    return len(rows), errors, computed
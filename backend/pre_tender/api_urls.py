@@ -1,16 +1,22 @@
 from django.urls import path
 from .views import (
-        TenderCreateAPI, TenderListAPI, TenderDetailAPI,
+        TenderCreateAPI, TenderListAPI, TenderDetailAPI, TenderFullDetailAPI, TenderTotalsAPI,
         TenderAnswersAPI, TenderSubmitAPI,
         TenderApproveAPI, TenderRejectAPI,
-        TenderOverridesAPI
+        TenderOverridesAPI,
+        TenderUploadStartAPI, TenderUploadChunkAPI, TenderUploadCompleteAPI,
     )
 
 urlpatterns = [
         path("tenders", TenderCreateAPI.as_view()),                   # POST (create)
         path("tenders/list", TenderListAPI.as_view()),               # GET list
         path("tenders/<int:pk>", TenderDetailAPI.as_view()),         # GET detail
+        path("tenders/<int:pk>/full", TenderFullDetailAPI.as_view()),# GET detail + كل الإجابات/الملفات
+        path("tenders/<int:pk>/totals", TenderTotalsAPI.as_view()),  # GET pricing/fees/funding totals
         path("tenders/<int:pk>/answers", TenderAnswersAPI.as_view()),# POST upsert answers + files
+        path("tenders/<int:pk>/uploads", TenderUploadStartAPI.as_view()),                         # POST start chunked upload
+        path("tenders/<int:pk>/uploads/<uuid:upload_id>", TenderUploadChunkAPI.as_view()),        # GET status / PUT chunk / DELETE
+        path("tenders/<int:pk>/uploads/<uuid:upload_id>/complete", TenderUploadCompleteAPI.as_view()),  # POST finish
         path("tenders/<int:pk>/submit", TenderSubmitAPI.as_view()),  # POST submit
         path("tenders/<int:pk>/approve", TenderApproveAPI.as_view()),# POST approve
         path("tenders/<int:pk>/reject", TenderRejectAPI.as_view()),  # POST reject
@@ -4,3 +4,24 @@ class PreTenderConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pre_tender"
     verbose_name = "Pre-Tender"
+
+    def ready(self):
+        # snapshot القالب متخزن في الكاش؛ أي تعديل في شجرة القالب يبطله
+        from core.cache import invalidate_on_change
+        from pre_tender import models
+        from pre_tender.snapshots import TEMPLATE_TREE_MODELS, TEMPLATES_TAG
+        for name in TEMPLATE_TREE_MODELS:
+            invalidate_on_change(getattr(models, name), TEMPLATES_TAG)
+
+        # أي تعديل في pricing/fees/funding يخلّي الإجماليات المتخزنة قديمة (pre_tender.totals)
+        from django.db.models.signals import post_delete, post_save
+        from pre_tender.totals import bump_answers_version
+
+        def _answers_changed(sender, instance, **kwargs):
+            bump_answers_version([instance.tender_id])
+
+        for model in (models.AnswerPricing, models.AnswerFee, models.AnswerFunding):
+            post_save.connect(_answers_changed, sender=model, weak=False,
+                              dispatch_uid=f"pre_tender.totals:{model.__name__}:save")
+            post_delete.connect(_answers_changed, sender=model, weak=False,
+                                dispatch_uid=f"pre_tender.totals:{model.__name__}:delete")
@@ -0,0 +1,121 @@
+# pre_tender/detail.py
+"""
+تفاصيل التندر كاملة (كل جداول الإجابات + الملفات) في request واحد.
+
+- عدد الاستعلامات ثابت: التندر + prefetch واحد لكل جدول (only() + select_related للـ keys)
+  + استعلام الإجماليات لو المتخزنة قديمة (من غير كتابة).
+- compact=True: كل جدول {"fields": [...], "rows": [[...], ...]} بدل ليستة dicts.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from operator import attrgetter
+
+from django.db.models import Prefetch
+from django.db.models.fields.files import FieldFile
+from django.shortcuts import get_object_or_404
+from rest_framework import serializers
+
+from .models import (
+    Answer, AnswerAreaGrouped, AnswerAreaOverall, AnswerComponent, AnswerFee,
+    AnswerFunding, AnswerPricing, Tender, TenderFile,
+)
+from .serializers import TenderDetailSerializer
+from .totals import tender_totals
+
+
+# related_name → (model, select_related, [(اسم في الـ output, attr path)])
+DETAIL_TABLES = {
+    "answers": (Answer, (), [
+        ("id", "id"), ("field_key", "field_key"), ("value", "value"), ("computed", "computed"),
+        ("label_at_submit", "label_at_submit"), ("type_at_submit", "type_at_submit"),
+        ("submitted_at", "submitted_at"),
+    ]),
+    "answers_area_overall": (AnswerAreaOverall, ("item",), [
+        ("id", "id"), ("item", "item_id"), ("item_key", "item.item_key"),
+        ("quantity", "quantity"), ("unit", "unit_snapshot"),
+    ]),
+    "answers_area_grouped": (AnswerAreaGrouped, ("subarea__group",), [
+        ("id", "id"), ("subarea", "subarea_id"), ("group_key", "subarea.group.group_key"),
+        ("sub_key", "subarea.sub_key"), ("quantity", "quantity"), ("unit", "unit_snapshot"),
+    ]),
+    "answers_components": (AnswerComponent, ("option__group",), [
+        ("id", "id"), ("option", "option_id"), ("group_key", "option.group.group_key"),
+        ("opt_key", "option.opt_key"), ("checked", "checked"),
+    ]),
+    "answers_pricing": (AnswerPricing, ("item__pricing_section",), [
+        ("id", "id"), ("item", "item_id"), ("work_type_key", "item.pricing_section.pr_section_key"),
+        ("item_key", "item.item_key"), ("mode", "mode"), ("amount_total", "amount_total"),
+        ("rate", "rate"), ("unit", "unit"), ("quantity", "quantity"),
+        ("technical_notes", "technical_notes"), ("line_total", "line_total"),
+    ]),
+    "answers_funding": (AnswerFunding, ("source",), [
+        ("id", "id"), ("source", "source_id"), ("source_key", "source.source_key"),
+        ("enabled", "enabled"), ("amount", "amount"), ("payment_details", "payment_details"),
+    ]),
+    "answers_fees": (AnswerFee, ("fee",), [
+        ("id", "id"), ("fee", "fee_id"), ("fee_key", "fee.key"),
+        ("enabled", "enabled"), ("rate", "rate"), ("amount", "amount"),
+    ]),
+    "files": (TenderFile, (), [
+        ("id", "id"), ("field_key", "field_key"), ("type", "type_id"),
+        ("name", "name"), ("file", "file"), ("uploaded_at", "uploaded_at"),
+    ]),
+}
+
+
+def _only_fields(columns, select):
+    """أعمدة only() من الـ attr paths (item.item_key → item__item_key، item_id → item)."""
+    fields = {"tender", *select}
+    for _, path in columns:
+        name = path.replace(".", "__")
+        fields.add(name[:-3] if name.endswith("_id") and "__" not in name else name)
+    return sorted(fields)
+
+
+def _prefetches():
+    out = []
+    for name, (model, select, columns) in DETAIL_TABLES.items():
+        qs = model.objects.select_related(*select).only(*_only_fields(columns, select))
+        out.append(Prefetch(name, queryset=qs.order_by("id")))
+    return out
+
+
+_DATETIME = serializers.DateTimeField()
+_DATE = serializers.DateField()
+
+
+def _plain(value, request=None):
+    # نفس تمثيل DRF: Decimal → string، التواريخ بالـ timezone المحلية (DateTimeField)، الملفات URL
+    if isinstance(value, FieldFile):
+        if not value:
+            return None
+        return request.build_absolute_uri(value.url) if request is not None else value.url
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return _DATETIME.to_representation(value)
+    if isinstance(value, date):
+        return _DATE.to_representation(value)
+    return value
+
+
+def serialize_table(objs, columns, compact=False, request=None):
+    names = [name for name, _ in columns]
+    getters = [attrgetter(path) for _, path in columns]
+    rows = [[_plain(get(obj), request) for get in getters] for obj in objs]
+    if compact:
+        return {"fields": names, "rows": rows}
+    return [dict(zip(names, row)) for row in rows]
+
+
+def tender_full_detail(pk, compact=False, request=None) -> dict:
+    tender = get_object_or_404(
+        Tender.objects.defer("field_index").prefetch_related(*_prefetches()), pk=pk
+    )
+    # GET: الإجماليات القديمة بتتحسب من غير ما تتكتب (زي الليستة)
+    data = {"tender": TenderDetailSerializer(tender).data, "totals": tender_totals(tender, store=False)}
+    for name, (_, _, columns) in DETAIL_TABLES.items():
+        data[name] = serialize_table(getattr(tender, name).all(), columns, compact, request)
+    if compact:
+        data["encoding"] = "compact"
+    return data
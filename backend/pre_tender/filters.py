@@ -0,0 +1,30 @@
+# pre_tender/filters.py
+from datetime import datetime, time, timedelta
+
+import django_filters
+from django.utils import timezone
+
+from .models import Tender, TenderStatus
+
+
+def _start_of(day):
+    """بداية اليوم (aware، بالـ timezone الحالية) — range على created_at نفسه يستخدم الـ index."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class TenderListFilter(django_filters.FilterSet):
+    """?status=draft&status=submitted&created_by=3&created_after=2025-01-01&created_before=2025-12-31"""
+    status = django_filters.MultipleChoiceFilter(choices=TenderStatus.choices)
+    created_after = django_filters.DateFilter(method="filter_created_after")
+    created_before = django_filters.DateFilter(method="filter_created_before")
+
+    class Meta:
+        model = Tender
+        fields = ["status", "created_by", "template"]
+
+    def filter_created_after(self, queryset, name, value):
+        return queryset.filter(created_at__gte=_start_of(value))
+
+    def filter_created_before(self, queryset, name, value):
+        # شامل لليوم كله: أقل من بداية اليوم اللي بعده
+        return queryset.filter(created_at__lt=_start_of(value + timedelta(days=1)))
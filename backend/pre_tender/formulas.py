@@ -0,0 +1,319 @@
+# pre_tender/formulas.py
+"""
+محرك المعادلات (Question.formula → Answer.computed).
+
+- compile_formula(expr): parse بـ ast + whitelist للعمليات (أرقام، + - * / // %، مقارنات،
+  and/or/not، a if c else b، دوال: min/max/abs/round/sum/avg/iif/coalesce) وبعدين compile مرة واحدة.
+  الحقول بالاسم (plot_area) أو بين أقواس لو فيها "-" ({plot-area}). الحسابات كلها Decimal.
+- FormulaGraph: كل معادلات القالب + ترتيب topological + مين بيعتمد على مين (الدوائر بتتسجل كـ errors).
+- template_formula_graph(template_id): الـ graph متخزن في الذاكرة لكل (قالب، نسخة الـ templates tag).
+- evaluate(graph, changed, values): يحسب بس المعادلات اللي مدخلاتها اتغيرت (ومين بيعتمد عليها).
+
+حقل فاضي/مش رقم = 0 (coalesce بس اللي بيفرّق بينه وبين 0 حقيقي)؛ القسمة على صفر أو أي خطأ في الحساب = None.
+iif(c, a, b) بيتحول لـ (a if c else b) — الفرع اللي مش متاخد مش بيتحسب.
+"""
+import ast
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.conf import settings
+
+from core import cache as app_cache
+
+from .snapshots import FieldIndexLRU, TEMPLATES_TAG, field_key_of, template_snapshot
+
+MAX_FORMULA_LENGTH = 1000
+MAX_POWER = 10
+
+
+class FormulaError(ValueError):
+    pass
+
+
+# ======================== Functions ========================
+def _round(value, places=0):
+    exp = Decimal(1).scaleb(-int(places))
+    return Decimal(value).quantize(exp, rounding=ROUND_HALF_UP)
+
+
+def _avg(*values):
+    return sum(values, Decimal(0)) / len(values) if values else Decimal(0)
+
+
+class _Blank(Decimal):
+    """حقل فاضي/مش رقم: 0 في الحساب (Decimal + _Blank = Decimal عادي)، بس coalesce بيعدّيه."""
+
+
+BLANK = _Blank(0)
+
+
+def _coalesce(*values):
+    """أول قيمة موجودة — الـ 0 قيمة (مش بيتعدّى)؛ بيتعدّى بس None والحقول الفاضية."""
+    for value in values:
+        if value is not None and value != "" and not isinstance(value, _Blank):
+            return value
+    return Decimal(0)
+
+
+FUNCTIONS = {
+    "min": min,
+    "max": max,
+    "abs": abs,
+    "round": _round,
+    "sum": lambda *values: sum(values, Decimal(0)),
+    "avg": _avg,
+    "iif": lambda cond, a, b: a if cond else b,
+    "coalesce": _coalesce,
+}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call,
+    ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd, ast.Not,
+    ast.And, ast.Or, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+_BRACED = re.compile(r"\{([A-Za-z0-9_-]+)\}")
+_DECIMAL = "__D"
+
+
+# ======================== Compile ========================
+class _Decimalize(ast.NodeTransformer):
+    """الأرقام الثابتة → Decimal("...") علشان Decimal * float ميطلعش TypeError."""
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            return node
+        return ast.copy_location(
+            ast.Call(func=ast.Name(id=_DECIMAL, ctx=ast.Load()), args=[ast.Constant(repr(node.value))], keywords=[]),
+            node,
+        )
+
+
+class _LazyIif(ast.NodeTransformer):
+    """iif(c, a, b) → (a if c else b): الفرع التاني مبيتحسبش (iif(b == 0, 0, a / b) مثلًا)."""
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if node.func.id != "iif":
+            return node
+        if len(node.args) != 3:
+            raise FormulaError("iif takes exactly 3 arguments.")
+        test, body, orelse = node.args
+        return ast.copy_location(ast.IfExp(test=test, body=body, orelse=orelse), node)
+
+
+class CompiledFormula:
+    __slots__ = ("key", "source", "inputs", "_code", "_names")
+
+    def __init__(self, key, source, inputs, code, names):
+        self.key = key
+        self.source = source
+        self.inputs = inputs        # field keys اللي المعادلة بتقرا منها
+        self._code = code
+        self._names = names         # اسم المتغير في الكود → field key
+
+    def evaluate(self, values):
+        env = {name: _to_decimal(values.get(key), default=BLANK) for name, key in self._names.items()}
+        env.update(FUNCTIONS)
+        env[_DECIMAL] = Decimal
+        try:
+            result = eval(self._code, {"__builtins__": {}}, env)  # noqa: S307 — AST متفلتر في compile_formula
+        except (ArithmeticError, InvalidOperation, TypeError, ValueError):
+            return None
+        return _to_decimal(result, default=None)
+
+
+class _RenameFields(ast.NodeTransformer):
+    """كل اسم (مش دالة) = field key → متغير داخلي __fN؛ كده مفيش اسم يوصل لحاجة غير القيم."""
+
+    def __init__(self, names):
+        self.names = names          # متغير → field key
+        self._vars = {v: k for k, v in names.items()}
+
+    def visit_Call(self, node):
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def visit_Name(self, node):
+        var = node.id if node.id in self.names else self._vars.get(node.id)
+        if var is None:
+            var = f"__f{len(self.names)}"
+            self.names[var] = node.id
+            self._vars[node.id] = var
+        return ast.copy_location(ast.Name(id=var, ctx=ast.Load()), node)
+
+
+def compile_formula(source, key=None) -> CompiledFormula:
+    source = (source or "").strip()
+    if not source:
+        raise FormulaError("Empty formula.")
+    if len(source) > MAX_FORMULA_LENGTH:
+        raise FormulaError("Formula is too long.")
+
+    names = {}
+
+    def _braced(match):
+        var = f"__f{len(names)}"
+        names[var] = match.group(1)
+        return var
+
+    text = _BRACED.sub(_braced, source)
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as exc:
+        raise FormulaError(f"Invalid formula: {exc.msg}") from None
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise FormulaError(f"'{type(node).__name__}' is not allowed in formulas.")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise FormulaError("Only " + "/".join(FUNCTIONS) + " calls are allowed.")
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            exponent = node.right
+            if not (isinstance(exponent, ast.Constant) and type(exponent.value) is int
+                    and abs(exponent.value) <= MAX_POWER):
+                raise FormulaError(f"Exponent must be an integer constant up to {MAX_POWER}.")
+        elif isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, bool)):
+            raise FormulaError("Only numeric constants are allowed.")
+
+    tree = _LazyIif().visit(tree)
+    tree = _RenameFields(names).visit(tree)
+    tree = ast.fix_missing_locations(_Decimalize().visit(tree))
+    code = compile(tree, f"<formula {key or ''}>", "eval")
+    return CompiledFormula(key, source, frozenset(names.values()), code, names)
+
+
+def _to_decimal(value, default=Decimal(0)):
+    if value is None or value == "":
+        return default
+    if isinstance(value, Decimal):
+        return value if value.is_finite() else default
+    if isinstance(value, bool):
+        return Decimal(int(value))
+    if isinstance(value, (int, float)):
+        try:
+            result = Decimal(str(value))
+        except InvalidOperation:
+            return default
+        return result if result.is_finite() else default
+    if isinstance(value, str):
+        try:
+            result = Decimal(value.replace(",", "").strip())
+        except InvalidOperation:
+            return default
+        return result if result.is_finite() else default
+    if isinstance(value, dict):
+        # {"amount": ..} / {"value": ..} من حقول الـ money
+        for k in ("amount", "value"):
+            if k in value:
+                return _to_decimal(value[k], default)
+    return default
+
+
+def to_json_number(value):
+    """Decimal → int/float للـ JSON (None يفضل None)."""
+    if value is None:
+        return None
+    return int(value) if value == value.to_integral_value() else float(value)
+
+
+# ======================== Graph ========================
+class FormulaGraph:
+    def __init__(self, formulas):
+        self.formulas = {}      # key → CompiledFormula
+        self.errors = {}        # key → رسالة
+        for key, source in formulas.items():
+            try:
+                self.formulas[key] = compile_formula(source, key)
+            except FormulaError as exc:
+                self.errors[key] = str(exc)
+
+        self.dependents = {}    # input key → formula keys بتقرا منه مباشرة
+        for key, formula in self.formulas.items():
+            for dep in formula.inputs:
+                self.dependents.setdefault(dep, set()).add(key)
+        self.order = self._topological()
+
+    def _topological(self):
+        order, state = [], {}   # state: visiting | ok | bad
+
+        def visit(key, path):
+            if state.get(key) in ("ok", "bad"):
+                return state[key] == "ok"
+            if state.get(key) == "visiting":
+                cycle = path[path.index(key):]
+                for k in cycle[:-1]:
+                    self.errors[k] = "Circular formula dependency: " + " → ".join(cycle)
+                return False
+            state[key] = "visiting"
+            ok = all([visit(dep, path + [dep]) for dep in sorted(self.formulas[key].inputs) if dep in self.formulas])
+            if not ok and key not in self.errors:
+                self.errors[key] = "Depends on an invalid formula."
+            ok = ok and key not in self.errors
+            state[key] = "ok" if ok else "bad"
+            if ok:
+                order.append(key)
+            return ok
+
+        for key in sorted(self.formulas):
+            visit(key, [key])
+        # المعادلات اللي في دائرة (أو بتعتمد على واحدة فيها) مش بتتحسب
+        return order
+
+    def __bool__(self):
+        return bool(self.order)
+
+    def affected(self, changed):
+        """المعادلات اللي لازم تتحسب لما المدخلات دي تتغير — بالترتيب الصح."""
+        if changed is None:
+            return list(self.order)
+        pending, seen = list(changed), set()
+        while pending:
+            for dependent in self.dependents.get(pending.pop(), ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    pending.append(dependent)
+        return [k for k in self.order if k in seen]
+
+    def inputs_for(self, keys):
+        needed = set()
+        for key in keys:
+            needed |= self.formulas[key].inputs
+        return needed
+
+
+def formulas_from_snapshot(snapshot) -> dict:
+    out = {}
+    for sec in (snapshot or {}).get("sections", []):
+        for fd in sec.get("fields", []):
+            key = field_key_of(fd)
+            if key and (fd.get("formula") or "").strip():
+                out[key] = fd["formula"]
+    return out
+
+
+_graphs = FieldIndexLRU(getattr(settings, "PRE_TENDER_FORMULA_GRAPH_LRU_SIZE", 64))
+
+
+def template_formula_graph(template) -> FormulaGraph:
+    """graph لكل (قالب، نسخة tag القوالب) — أي تعديل في شجرة القالب بيغيّر النسخة."""
+    version = app_cache.tag_versions([TEMPLATES_TAG])[TEMPLATES_TAG]
+    key = (template.pk, template.version, version)
+    graph = _graphs.get(key)
+    if graph is None:
+        graph = FormulaGraph(formulas_from_snapshot(template_snapshot(template)))
+        _graphs.set(key, graph)
+    return graph
+
+
+def evaluate(graph, changed, values) -> dict:
+    """
+    values: field key → قيمة (مدخلات + computed للمعادلات اللي متحسبتش).
+    يرجّع {formula key: Decimal|None} للمعادلات المتأثرة بس.
+    """
+    env = dict(values)
+    results = {}
+    for key in graph.affected(changed):
+        env[key] = results[key] = graph.formulas[key].evaluate(env)
+    return results
@@ -0,0 +1,32 @@
+# pre_tender/management/commands/check_tender_snapshots.py
+from django.core.management.base import BaseCommand
+
+from pre_tender.models import Tender, TenderStatus
+from pre_tender.snapshots import check_snapshot
+
+
+class Command(BaseCommand):
+    help = "Compare stored draft tender snapshots with a full rebuild (template + overrides + custom fields)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Rebuild snapshots that drifted")
+        parser.add_argument("--tender", type=int, action="append", help="Only check these tender ids")
+
+    def handle(self, *args, **opts):
+        qs = Tender.objects.filter(status=TenderStatus.DRAFT).select_related("template").order_by("id")
+        if opts["tender"]:
+            qs = qs.filter(pk__in=opts["tender"])
+
+        total = drifted = 0
+        for tender in qs.iterator(chunk_size=200):
+            total += 1
+            diffs = check_snapshot(tender)
+            if not diffs:
+                continue
+            drifted += 1
+            self.stdout.write(f"[DRIFT] {tender.code}: {', '.join(diffs[:10])}"
+                              + (f" (+{len(diffs) - 10} more)" if len(diffs) > 10 else ""))
+            if opts["fix"]:
+                tender.rebuild_snapshot()
+
+        self.stdout.write(f"Checked: {total} | Drifted: {drifted}" + (" | Rebuilt" if opts["fix"] and drifted else ""))
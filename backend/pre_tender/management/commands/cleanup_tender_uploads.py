@@ -0,0 +1,17 @@
+# pre_tender/management/commands/cleanup_tender_uploads.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from pre_tender.uploads import cleanup_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Abort chunked tender uploads with no activity and delete their staging files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24, help="Inactivity before an upload is aborted")
+
+    def handle(self, *args, **opts):
+        count = cleanup_stale_uploads(timedelta(hours=opts["hours"]))
+        self.stdout.write(f"Aborted: {count}")
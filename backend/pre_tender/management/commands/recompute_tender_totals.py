@@ -0,0 +1,17 @@
+# pre_tender/management/commands/recompute_tender_totals.py
+from django.core.management.base import BaseCommand
+
+from pre_tender.totals import recompute_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute cached pricing/fees/funding totals for tenders (stale ones only unless --all)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Recompute even when the cached totals are current")
+        parser.add_argument("--tender", type=int, action="append", help="Only these tender ids")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        done = recompute_totals(opts["tender"], chunk_size=opts["chunk_size"], stale_only=not opts["all"])
+        self.stdout.write(f"Recomputed: {done}")
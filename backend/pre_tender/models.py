@@ -6,12 +6,15 @@ Pre-Tender – Legacy-named Models with new capabilities
 - Snapshot لكل Tender + توليد كود متسلسل آمن + إجابات منفصلة حسب النوع
 """
 
+import threading
+import uuid
 from decimal import Decimal
-from typing import Any
 
-from django.db import models, transaction, IntegrityError
-from django.db.models import F, Prefetch
+from django.conf import settings
+from django.db import models, router, transaction, IntegrityError
 from django.contrib.auth import get_user_model
+
+from core.codes import build_allocator
 # ======== Master Data (to satisfy admin.py imports) ========
 
 class ProjectType(models.Model):
@@ -341,20 +344,50 @@ class AttachmentType(models.Model):
 # ==========================
 
 class TenderCounter(models.Model):
+    """
+    عدّاد أكواد التندر — الحجز بيتم عن طريق core.codes:
+    - TENDER_CODE_ALLOCATOR = auto | counter | sequence (auto = PostgreSQL sequence لو متاح)
+    - TENDER_CODE_BLOCK_SIZE: كل process بيحجز block أرقام مرة واحدة ويوزّع منها من الذاكرة.
+      1 = من غير حجز (الأكواد متتالية بترتيب الإنشاء)؛ أكبر من 1 = gaps مقبولة
+      (الأرقام اللي متوزعتش بتضيع لما الـ worker يقفل).
+    - في وضع sequence الصف ده مبيتقدمش؛ الرجوع لـ counter بيقدّمه لبعد آخر قيمة في
+      الـ sequence (pre_tender_code_seq_<name>) أول مرة — core.codes. كل الـ workers يتحولوا مع بعض.
+    """
     name = models.CharField(max_length=50, unique=True, default="default")
     value = models.PositiveIntegerField(default=0)
 
+    _allocator = None
+    _allocator_lock = threading.Lock()
+
     class Meta:
         db_table = "pre_tender_tender_counter"
 
+    @classmethod
+    def get_allocator(cls):
+        if cls._allocator is None:
+            with cls._allocator_lock:
+                if cls._allocator is None:
+                    cls._allocator = build_allocator(
+                        getattr(settings, "TENDER_CODE_ALLOCATOR", "auto"),
+                        getattr(settings, "TENDER_CODE_BLOCK_SIZE", 1),
+                        using=router.db_for_write(cls),
+                        counter_model=cls,
+                        sequence_prefix="pre_tender_code_seq_",
+                    )
+        return cls._allocator
+
+    @classmethod
+    def reset_allocator(cls):
+        with cls._allocator_lock:
+            cls._allocator = None
+
+    @classmethod
+    def reserve(cls, count: int, name: str = "default") -> list[int]:
+        return cls.get_allocator().numbers(name, count, router.db_for_write(cls))
+
     @classmethod
     def next(cls) -> int:
-        with transaction.atomic():
-            row, _ = cls.objects.select_for_update().get_or_create(name="default", defaults={"value": 0})
-            row.value = F("value") + 1
-            row.save(update_fields=["value"])
-            row.refresh_from_db(fields=["value"])
-            return row.value
+        return cls.reserve(1)[0]
 
 
 # ==========================
@@ -371,6 +404,10 @@ class Tender(models.Model):
 
     template = models.ForeignKey(FormTemplate, on_delete=models.PROTECT, related_name="tenders")
     schema_snapshot = models.JSONField(default=dict, blank=True)  # الشكل النهائي المعروض
+    field_index = models.JSONField(default=dict, blank=True)      # key → type/label/required/section (من الـ snapshot)
+    snapshot_version = models.PositiveIntegerField(default=0)     # بيزيد مع كل تغيير في الـ snapshot
+    answers_version = models.PositiveIntegerField(default=0)      # بيزيد مع أي تعديل في pricing/fees/funding
+    totals = models.JSONField(default=dict, blank=True)           # cache الإجماليات (pre_tender.totals) + version
     meta = models.JSONField(default=dict, blank=True)
 
     decided_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
@@ -379,6 +416,11 @@ class Tender(models.Model):
 
     class Meta:
         ordering = ["-created_at", "-id"]
+        indexes = [
+            # keyset pagination + فلتر الحالة في TenderListAPI
+            models.Index(fields=["created_at", "id"], name="pre_tender_created_id_idx"),
+            models.Index(fields=["status", "created_at"], name="pre_tender_status_created_idx"),
+        ]
 
     def __str__(self):
         return f"[{self.code}] {self.title}"
@@ -398,109 +440,61 @@ class Tender(models.Model):
             if not tpl:
                 tpl = FormTemplate.objects.create(title="Default Pre-Tender Form", version=1, is_published=True, created_by=user)
 
+        # تندر جديد لسه مالوش overrides/custom fields → snapshot القالب (من الكاش) زي ما هو
+        from .snapshots import template_snapshot
+        snapshot = template_snapshot(tpl)
+
+        # الرقم بيتحجز برّه أي transaction (autocommit) فالعدّاد مش بيتقفل طول مدة بناء الـ snapshot؛
+        # الـ retry بس كحماية لو فيه كود قديم متسجل بنفس الرقم
         for _ in range(5):
             num = TenderCounter.next()
             code = cls._fmt_code(num)
             try:
                 with transaction.atomic():
-                    t = cls.objects.create(code=code, title=title, created_by=user, template=tpl, meta=(meta or {}))
-                    t.rebuild_snapshot()
+                    t = cls(code=code, title=title, created_by=user, template=tpl, meta=(meta or {}))
+                    t.set_snapshot(snapshot)
+                    t.save(force_insert=True)
                     return t
             except IntegrityError:
                 continue
         raise RuntimeError("Failed to allocate unique tender code after retries.")
 
     # -------- Snapshot مطابق للـ Front --------
-    def rebuild_snapshot(self) -> None:
+    def rebuild_snapshot(self, with_layers: bool = True) -> None:
+        """snapshot القالب (من الكاش) + overrides/custom fields الخاصة بالتندر (pre_tender.snapshots)."""
         if self.status != TenderStatus.DRAFT:
             return
 
-        tpl = (FormTemplate.objects
-               .filter(pk=self.template_id)
-               .prefetch_related(
-                   Prefetch("sections", queryset=TemplateSection.objects.order_by("order", "id").prefetch_related(
-                       "area_overall_items",
-                       Prefetch("area_groups", queryset=AreaGroup.objects.order_by("order", "id").prefetch_related(
-                           Prefetch("subareas", queryset=AreaGroupSubArea.objects.order_by("order", "id"))
-                       )),
-                       Prefetch("component_groups", queryset=ComponentGroup.objects.order_by("order", "id").prefetch_related(
-                           Prefetch("options", queryset=ComponentOption.objects.order_by("order", "id"))
-                       )),
-                       Prefetch("pricing_sections", queryset=PricingSection.objects.order_by("order", "id").prefetch_related(
-                           Prefetch("items", queryset=PricingItem.objects.order_by("order", "id"))
-                       )),
-                       "funding_sources", "fees", "attachment_types", "questions",
-                   )),
-                   Prefetch("questions", queryset=Question.objects.order_by("order", "id").prefetch_related("options")),
-               )
-               .first())
-
-        snap: dict[str, Any] = {"template": {"title": tpl.title, "version": tpl.version}, "sections": []}
-
-        basic_by_section = {}
-        for q in tpl.questions.all():
-            basic_by_section.setdefault(q.section_id, []).append(q)
-
-        for sec in tpl.sections.all():
-            block: dict[str, Any] = {
-                "id": sec.id, "kind": sec.kind, "key": sec.section_key,
-                "title": sec.title, "order": sec.order, "ui": sec.ui or {},
-            }
-
-            if sec.kind == SectionKind.BASIC:
-                block["fields"] = [{
-                    "q_key": q.q_key,
-                    "type": q.q_type,
-                    "title": q.title,
-                    "description": q.description,
-                    "required": q.required,
-                    "config": q.config,
-                    "options": [{"value": o.value, "label": o.label} for o in q.options.all()],
-                    "formula": q.formula,
-                    "order": q.order,
-                } for q in basic_by_section.get(sec.id, [])]
-
-            elif sec.kind == SectionKind.AREAS_OVERALL:
-                block["items"] = [{"key": it.item_key, "name": it.name, "unit": it.unit, "order": it.order}
-                                  for it in sec.area_overall_items.all()]
-
-            elif sec.kind == SectionKind.AREAS_GROUPED:
-                block["groups"] = [{
-                    "key": g.group_key, "name": g.name, "unit": g.unit, "order": g.order,
-                    "subareas": [{"key": s.sub_key, "name": s.name, "order": s.order} for s in g.subareas.all()]
-                } for g in sec.area_groups.all()]
-
-            elif sec.kind == SectionKind.COMPONENTS:
-                block["groups"] = [{
-                    "key": g.group_key, "name": g.name, "order": g.order,
-                    "options": [{"key": o.opt_key, "label": o.label, "order": o.order} for o in g.options.all()]
-                } for g in sec.component_groups.all()]
-
-            elif sec.kind == SectionKind.PRICING:
-                block["work_types"] = [{
-                    "key": ps.pr_section_key, "name": ps.name, "order": ps.order,
-                    "sub_works": [{"key": it.item_key, "name": it.name, "unit": it.default_unit, "order": it.order}
-                                  for it in ps.items.all()]
-                } for ps in sec.pricing_sections.all()]
-
-            elif sec.kind == SectionKind.FUNDING:
-                block["sources"] = [{"key": fs.source_key, "name": fs.name, "order": fs.order}
-                                    for fs in sec.funding_sources.all()]
-
-            elif sec.kind == SectionKind.FEES:
-                block["fees"] = [{"key": f.key, "name": f.name, "default_rate": float(f.default_rate),
-                                  "is_optional": f.is_optional, "order": f.order}
-                                 for f in sec.fees.all()]
-
-            elif sec.kind == SectionKind.ATTACH:
-                block["types"] = [{"key": at.key, "name": at.name, "order": at.order, "accept": at.accept}
-                                  for at in sec.attachment_types.all()]
-
-            snap["sections"].append(block)
-
-        snap["sections"].sort(key=lambda s: (s.get("order", 9999), s["title"]))
-        self.schema_snapshot = snap
-        self.save(update_fields=["schema_snapshot"])
+        from .snapshots import build_tender_snapshot
+        with transaction.atomic():
+            # الـ layers بتتقرا بعد القفل — rebuild في نفس الوقت مش هيكتب نسخة أقدم فوق الأحدث
+            Tender.objects.select_for_update().filter(pk=self.pk).values_list("pk").first()
+            self.save_snapshot(build_tender_snapshot(self, with_layers=with_layers))
+
+    def set_snapshot(self, snapshot: dict) -> list[str]:
+        """للتندر الجديد (قبل الـ INSERT): الـ snapshot + الـ field_index + أول نسخة. يرجّع update_fields."""
+        from .snapshots import build_field_index
+        self.schema_snapshot = snapshot
+        self.field_index = build_field_index(snapshot)
+        self.snapshot_version = (self.snapshot_version or 0) + 1
+        return ["schema_snapshot", "field_index", "snapshot_version"]
+
+    def save_snapshot(self, snapshot: dict) -> None:
+        """
+        أي تغيير في snapshot تندر متسجل لازم يعدّي من هنا (والمفروض الصف مقفول).
+        النسخة بتزيد في الـ SQL (F + 1) وبتترجع من الداتابيز — هي مفتاح الـ field_index في
+        الـ LRU (snapshots.tender_field_index)، فكاتبين في نفس الوقت مياخدوش نفس النسخة بمحتوى مختلف.
+        """
+        from .snapshots import build_field_index
+        self.schema_snapshot = snapshot
+        self.field_index = build_field_index(snapshot)
+        qs = Tender.objects.filter(pk=self.pk)
+        with transaction.atomic():
+            qs.update(
+                schema_snapshot=self.schema_snapshot, field_index=self.field_index,
+                snapshot_version=models.F("snapshot_version") + 1,
+            )
+            self.snapshot_version = qs.values_list("snapshot_version", flat=True).get()
 
 
 # ===================================
@@ -624,12 +618,47 @@ class TenderFile(models.Model):
     type = models.ForeignKey(AttachmentType, on_delete=models.PROTECT, null=True, blank=True, related_name="+")
     file = models.FileField(upload_to=tender_upload_path)
     name = models.CharField(max_length=255, blank=True, default="")
+    sha256 = models.CharField(max_length=64, blank=True, default="", db_index=True)  # للـ dedupe
+    size = models.BigIntegerField(null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.tender.code} / {self.name or self.file.name}"
 
 
+class UploadStatus(models.TextChoices):
+    UPLOADING = "uploading", "Uploading"
+    COMPLETE = "complete", "Complete"
+    ABORTED = "aborted", "Aborted"
+
+
+class TenderUpload(models.Model):
+    """
+    جلسة رفع على أجزاء (pre_tender.uploads): الأجزاء بتتكتب في ملف staging على الديسك،
+    والـ TenderFile بيتعمل بس بعد ما الرفع يكمل.
+    """
+    upload_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    tender = models.ForeignKey(Tender, on_delete=models.CASCADE, related_name="uploads")
+    field_key = models.SlugField(max_length=120, blank=True, default="")
+    type = models.ForeignKey(AttachmentType, on_delete=models.PROTECT, null=True, blank=True, related_name="+")
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=120, blank=True, default="")
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, default="")  # اختياري من الكلاينت للتأكد/الـ dedupe
+    status = models.CharField(max_length=12, choices=UploadStatus.choices, default=UploadStatus.UPLOADING)
+    result = models.ForeignKey(TenderFile, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+
+    def __str__(self):
+        return f"{self.tender.code} / {self.filename} ({self.received}/{self.size})"
+
+
 # ==========================
 # 12) توافق اختياري (Overrides/CustomFields)
 # ==========================
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Tender, Answer, TenderFile, TenderFieldOverride, TenderCustomField
+from .models import Tender, Answer, TenderFile, TenderFieldOverride, TenderCustomField, TenderUpload
 
 class TenderCreateSerializer(serializers.Serializer):
     title = serializers.CharField(max_length=255)
@@ -8,7 +8,7 @@ class TenderCreateSerializer(serializers.Serializer):
 class TenderListItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tender
-        fields = ["id", "code", "title", "status", "created_by", "created_at"]
+        fields = ["id", "code", "title", "status", "created_by", "created_at", "totals"]
 
 class TenderDetailSerializer(serializers.ModelSerializer):
     class Meta:
@@ -28,3 +28,23 @@ class CustomFieldSerializer(serializers.ModelSerializer):
     class Meta:
         model = TenderCustomField
         fields = ["section_title", "field_key", "label", "type", "required", "order", "config", "options"]
+
+class TenderFileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TenderFile
+        fields = ["id", "field_key", "type", "name", "file", "sha256", "size", "uploaded_at"]
+
+class UploadStartSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    field_key = serializers.SlugField(max_length=120, required=False, allow_blank=True, default="")
+    type = serializers.CharField(max_length=120, required=False, allow_blank=True, allow_null=True)
+    content_type = serializers.CharField(max_length=120, required=False, allow_blank=True, default="")
+    sha256 = serializers.RegexField(r"^[0-9a-fA-F]{64}$", required=False, allow_blank=True, default="")
+
+class TenderUploadSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source="received", read_only=True)
+
+    class Meta:
+        model = TenderUpload
+        fields = ["upload_id", "field_key", "type", "filename", "size", "offset", "status", "result", "created_at"]
@@ -0,0 +1,371 @@
+# pre_tender/snapshots.py
+"""
+Snapshot التندر = snapshot القالب (مشترك) + طبقة التعديلات الخاصة بكل تندر.
+
+- compile_template_snapshot(template_id): بيلف على شجرة القالب كلها (prefetches) — مكلّف.
+- template_snapshot(template): نفس الناتج من core.cache بمفتاح (id, version, updated_at)
+  وبيتبطل مع أي تعديل في شجرة القالب (tag بيتسجل في PreTenderConfig.ready).
+- apply_override / apply_custom_field: يطبّقوا TenderFieldOverride / TenderCustomField على الـ JSON.
+- build_tender_snapshot(tender): القالب من الكاش + custom fields + overrides.
+- patch_snapshot(tender, overrides, customs): يطبّق التعديلات على الـ snapshot المتخزن مباشرة
+  (full rebuild لو مش آمن)؛ check_snapshot/diff_snapshots للتأكد إن الاتنين متطابقين.
+- build_field_index / tender_field_index: فهرس الحقول (بيتخزن مع الـ snapshot) + LRU في الذاكرة.
+"""
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from django.conf import settings
+
+from django.db.models import Prefetch
+
+from core import cache as app_cache
+
+from .models import (
+    AreaGroup, AreaGroupSubArea, ComponentGroup, ComponentOption, FormTemplate,
+    PricingItem, PricingSection, Question, SectionKind, Tender, TemplateSection,
+)
+
+TEMPLATES_TAG = "pre_tender:templates"
+CUSTOM_SECTION_KEY = "custom_fields"
+
+# الموديلات اللي أي تعديل فيها يغيّر snapshot القالب
+TEMPLATE_TREE_MODELS = (
+    "FormTemplate", "TemplateSection", "Question", "QuestionOption",
+    "AreaOverallItem", "AreaGroup", "AreaGroupSubArea", "ComponentGroup", "ComponentOption",
+    "PricingSection", "PricingItem", "FundingSource", "FeeDefinition", "AttachmentType",
+)
+
+
+# ======================== Template ========================
+def compile_template_snapshot(template_id) -> dict:
+    tpl = (FormTemplate.objects
+           .filter(pk=template_id)
+           .prefetch_related(
+               Prefetch("sections", queryset=TemplateSection.objects.order_by("order", "id").prefetch_related(
+                   "area_overall_items",
+                   Prefetch("area_groups", queryset=AreaGroup.objects.order_by("order", "id").prefetch_related(
+                       Prefetch("subareas", queryset=AreaGroupSubArea.objects.order_by("order", "id"))
+                   )),
+                   Prefetch("component_groups", queryset=ComponentGroup.objects.order_by("order", "id").prefetch_related(
+                       Prefetch("options", queryset=ComponentOption.objects.order_by("order", "id"))
+                   )),
+                   Prefetch("pricing_sections", queryset=PricingSection.objects.order_by("order", "id").prefetch_related(
+                       Prefetch("items", queryset=PricingItem.objects.order_by("order", "id"))
+                   )),
+                   "funding_sources", "fees", "attachment_types",
+               )),
+               Prefetch("questions", queryset=Question.objects.order_by("order", "id").prefetch_related("options")),
+           )
+           .first())
+
+    snap: dict[str, Any] = {"template": {"title": tpl.title, "version": tpl.version}, "sections": []}
+
+    basic_by_section = {}
+    for q in tpl.questions.all():
+        basic_by_section.setdefault(q.section_id, []).append(q)
+
+    for sec in tpl.sections.all():
+        block: dict[str, Any] = {
+            "id": sec.id, "kind": sec.kind, "key": sec.section_key,
+            "title": sec.title, "order": sec.order, "ui": sec.ui or {},
+        }
+
+        if sec.kind == SectionKind.BASIC:
+            block["fields"] = [{
+                "q_key": q.q_key,
+                "type": q.q_type,
+                "title": q.title,
+                "description": q.description,
+                "required": q.required,
+                "config": q.config,
+                "options": [{"value": o.value, "label": o.label} for o in q.options.all()],
+                "formula": q.formula,
+                "order": q.order,
+            } for q in basic_by_section.get(sec.id, [])]
+
+        elif sec.kind == SectionKind.AREAS_OVERALL:
+            block["items"] = [{"key": it.item_key, "name": it.name, "unit": it.unit, "order": it.order}
+                              for it in sec.area_overall_items.all()]
+
+        elif sec.kind == SectionKind.AREAS_GROUPED:
+            block["groups"] = [{
+                "key": g.group_key, "name": g.name, "unit": g.unit, "order": g.order,
+                "subareas": [{"key": s.sub_key, "name": s.name, "order": s.order} for s in g.subareas.all()]
+            } for g in sec.area_groups.all()]
+
+        elif sec.kind == SectionKind.COMPONENTS:
+            block["groups"] = [{
+                "key": g.group_key, "name": g.name, "order": g.order,
+                "options": [{"key": o.opt_key, "label": o.label, "order": o.order} for o in g.options.all()]
+            } for g in sec.component_groups.all()]
+
+        elif sec.kind == SectionKind.PRICING:
+            block["work_types"] = [{
+                "key": ps.pr_section_key, "name": ps.name, "order": ps.order,
+                "sub_works": [{"key": it.item_key, "name": it.name, "unit": it.default_unit, "order": it.order}
+                              for it in ps.items.all()]
+            } for ps in sec.pricing_sections.all()]
+
+        elif sec.kind == SectionKind.FUNDING:
+            block["sources"] = [{"key": fs.source_key, "name": fs.name, "order": fs.order}
+                                for fs in sec.funding_sources.all()]
+
+        elif sec.kind == SectionKind.FEES:
+            block["fees"] = [{"key": f.key, "name": f.name, "default_rate": float(f.default_rate),
+                              "is_optional": f.is_optional, "order": f.order}
+                             for f in sec.fees.all()]
+
+        elif sec.kind == SectionKind.ATTACH:
+            block["types"] = [{"key": at.key, "name": at.name, "order": at.order, "accept": at.accept}
+                              for at in sec.attachment_types.all()]
+
+        snap["sections"].append(block)
+
+    snap["sections"].sort(key=lambda s: (s.get("order", 9999), s["title"]))
+    return snap
+
+
+def template_snapshot(template) -> dict:
+    """نسخة (deepcopy) من snapshot القالب المتخزن — آمنة للتعديل."""
+    updated = template.updated_at.isoformat() if template.updated_at else ""
+    snap, _ = app_cache.cached(
+        "pre-tender-template", template.pk, template.version, updated,
+        compute=lambda: compile_template_snapshot(template.pk),
+        tags=[TEMPLATES_TAG],
+    )
+    return copy.deepcopy(snap)
+
+
+# ======================== Per-tender layers ========================
+def _sort_fields(block):
+    block["fields"].sort(key=lambda f: (f.get("order") or 0))
+
+
+def field_key_of(fd):
+    # الـ snapshot بيكتب q_key/title؛ القديم كان key/label
+    return fd.get("key") or fd.get("q_key")
+
+
+def find_field(snap, field_key):
+    """يرجّع (section block, field) أو (None, None)."""
+    for sec in snap.get("sections", []):
+        for fd in sec.get("fields", []):
+            if field_key_of(fd) == field_key:
+                return sec, fd
+    return None, None
+
+
+def apply_override(snap, override) -> bool:
+    """يطبّق TenderFieldOverride على الحقل بتاعه (القيم None = زي القالب). False لو الحقل مش موجود."""
+    sec, fd = find_field(snap, override.field_key)
+    if fd is None:
+        return False
+    if override.enabled is not None:
+        fd["enabled"] = override.enabled
+    if override.label is not None:
+        fd["title"] = override.label
+    if override.required is not None:
+        fd["required"] = override.required
+    if override.order is not None:
+        fd["order"] = override.order
+    if override.config is not None:
+        fd["config"] = {**(fd.get("config") or {}), **override.config}
+    _sort_fields(sec)
+    return True
+
+
+def _custom_section(snap, custom):
+    """القسم اللي الحقل المخصص يتحط فيه: section → section_title → قسم custom_fields جديد."""
+    sections = snap.setdefault("sections", [])
+    for sec in sections:
+        if custom.section_id and sec.get("id") == custom.section_id:
+            return sec
+    for sec in sections:
+        if custom.section_title and sec.get("title") == custom.section_title:
+            return sec
+    for sec in sections:
+        if sec.get("key") == CUSTOM_SECTION_KEY:
+            return sec
+    sec = {
+        "id": None, "kind": SectionKind.BASIC.value, "key": CUSTOM_SECTION_KEY,
+        "title": custom.section_title or "Custom Fields", "order": 9999, "ui": {},
+    }
+    sections.append(sec)
+    return sec
+
+
+def custom_field_entry(custom) -> dict:
+    return {
+        "q_key": custom.field_key,
+        "type": custom.type,
+        "title": custom.label,
+        "description": "",
+        "required": custom.required,
+        "config": custom.config or {},
+        "options": custom.options or [],
+        "formula": None,
+        "order": custom.order,
+        "custom": True,
+    }
+
+
+def apply_custom_field(snap, custom) -> None:
+    """يضيف/يحدّث حقل مخصص (لو الـ key موجود بيتبدل مكانه)."""
+    sec, fd = find_field(snap, custom.field_key)
+    if fd is not None:
+        sec["fields"].remove(fd)
+    target = _custom_section(snap, custom)
+    target.setdefault("fields", []).append(custom_field_entry(custom))
+    _sort_fields(target)
+
+
+def build_tender_snapshot(tender, with_layers=True) -> dict:
+    """with_layers=False للتندر الجديد (لسه مالوش overrides/custom fields) — يوفّر استعلامين."""
+    snap = template_snapshot(tender.template)
+    if with_layers:
+        # custom fields الأول علشان الـ override يقدر يعدّل عليهم كمان
+        for custom in tender.custom_fields.all():
+            apply_custom_field(snap, custom)
+        for override in tender.field_overrides.all():
+            apply_override(snap, override)
+    return snap
+
+
+# ======================== Incremental patching ========================
+def patch_override(snap, base, override) -> bool:
+    """
+    يرجّع الحقل لأصله في القالب (base) وبعدين يطبّق الـ override — كده القيم اللي رجعت None
+    بترجع زي القالب. False لو الحقل مش من القالب (custom/مش موجود) → full rebuild.
+    """
+    _, base_fd = find_field(base, override.field_key)
+    _, fd = find_field(snap, override.field_key)
+    if base_fd is None or fd is None or fd.get("custom"):
+        return False
+    fd.clear()
+    fd.update(copy.deepcopy(base_fd))
+    return apply_override(snap, override)
+
+
+def patch_snapshot(tender, overrides=(), customs=()) -> bool:
+    """
+    يطبّق الـ deltas على tender.schema_snapshot المتخزن بدل ما يعيد بناءه من القالب.
+    False = الـ patch مش آمن (snapshot فاضي/حقل مش لاقيه) والمفروض full rebuild.
+    """
+    snap = tender.schema_snapshot
+    if not snap or not snap.get("sections"):
+        return False
+    overridden = set(tender.field_overrides.values_list("field_key", flat=True)) if customs else set()
+    for custom in customs:
+        if custom.field_key in overridden:
+            return False  # override على custom field — الترتيب يفرق
+        apply_custom_field(snap, custom)
+    if overrides:
+        base = template_snapshot(tender.template)
+        for override in overrides:
+            if not patch_override(snap, base, override):
+                return False
+    return True
+
+
+# ======================== Field index ========================
+def build_field_index(snap) -> dict:
+    """key → {type, label, required, enabled, section} — بيتخزن في Tender.field_index مع الـ snapshot."""
+    index = {}
+    for sec in (snap or {}).get("sections", []):
+        for fd in sec.get("fields", []):
+            key = field_key_of(fd)
+            if not key:
+                continue
+            index[key] = {
+                "type": fd.get("type") or "",
+                "label": fd.get("label") or fd.get("title") or "",
+                "required": bool(fd.get("required")),
+                "enabled": fd.get("enabled", True) is not False,
+                "section": sec.get("key"),
+            }
+    return index
+
+
+class FieldIndexLRU:
+    """LRU في الذاكرة: (tender id, snapshot_version) → field_index. النسخة في المفتاح = مفيش invalidation."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+field_index_lru = FieldIndexLRU(getattr(settings, "PRE_TENDER_FIELD_INDEX_LRU_SIZE", 256))
+
+
+def tender_field_index(tender) -> dict:
+    """
+    الـ field_index للتندر: LRU → Tender.field_index → (تندرات قديمة) يتبني من الـ snapshot ويتخزن.
+    الـ tender ممكن يكون جاي بـ defer("schema_snapshot", "field_index") — مش هيتحمّلوا إلا لو احتجناهم.
+    """
+    key = (tender.pk, tender.snapshot_version)
+    index = field_index_lru.get(key)
+    if index is not None:
+        return index
+
+    deferred = tender.get_deferred_fields()
+    if "field_index" in deferred:
+        # النسخة بتتقرا مع الـ index في نفس الاستعلام — لو الـ snapshot اتغير بعد ما الـ tender
+        # اتحمّل، الـ index الجديد ميتخزنش في الـ LRU تحت النسخة القديمة
+        row = Tender.objects.filter(pk=tender.pk).values_list("snapshot_version", "field_index").first()
+        if row is not None:
+            tender.snapshot_version, index = row
+            key = (tender.pk, tender.snapshot_version)
+        else:
+            index = None
+    else:
+        index = tender.field_index
+    if not index:
+        index = build_field_index(tender.schema_snapshot)
+        if index:
+            Tender.objects.filter(pk=tender.pk, snapshot_version=tender.snapshot_version).update(field_index=index)
+    field_index_lru.set(key, index)
+    return index
+
+
+def diff_snapshots(stored, expected) -> list[str]:
+    """Consistency checker: paths (section/field) اللي مختلفة بين المتخزن والمتوقع."""
+    def _index(snap):
+        out = {}
+        for sec in (snap or {}).get("sections", []):
+            sec_key = sec.get("key") or sec.get("id")
+            out[f"{sec_key}"] = {k: v for k, v in sec.items() if k != "fields"}
+            for pos, fd in enumerate(sec.get("fields", [])):
+                out[f"{sec_key}/{field_key_of(fd)}"] = {**fd, "_pos": pos}
+        return out
+
+    a, b = _index(stored), _index(expected)
+    diffs = [path for path in sorted(set(a) | set(b)) if a.get(path) != b.get(path)]
+    if (stored or {}).get("template") != (expected or {}).get("template"):
+        diffs.insert(0, "template")
+    return diffs
+
+
+def check_snapshot(tender) -> list[str]:
+    """يقارن snapshot التندر المتخزن بـ full rebuild (من غير ما يحفظ)."""
+    return diff_snapshots(tender.schema_snapshot, build_tender_snapshot(tender))
@@ -0,0 +1,61 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from pre_tender.models import (
+    AnswerFee, AnswerFunding, AnswerPricing, FeeDefinition, FormTemplate, FundingSource, PricingItem,
+    PricingMode, PricingSection, Question, SectionKind, TemplateSection, Tender, TenderCounter,
+)
+
+
+@pytest.fixture(autouse=True)
+def _process_caches():
+    # LRUs في الذاكرة بمفتاح (pk, version) — الـ pks بتتكرر بين الـ tests بعد الـ rollback
+    from pre_tender.formulas import _graphs
+    from pre_tender.snapshots import field_index_lru
+
+    field_index_lru.clear()
+    _graphs.clear()
+
+
+@pytest.fixture
+def user(db):
+    return get_user_model().objects.create(username="owner", is_staff=True, is_superuser=True)
+
+
+@pytest.fixture
+def tender(user):
+    TenderCounter.reset_allocator()
+    tpl = FormTemplate.objects.create(title="T", version=1, is_published=True)
+    sec = TemplateSection.objects.create(template=tpl, title="Basic", section_key="basic", kind=SectionKind.BASIC)
+    for i in range(5):
+        Question.objects.create(template=tpl, section=sec, q_key=f"f{i}", q_type="text", title=f"F{i}", order=i)
+    return Tender.create_with_snapshot(user=user, title="x")
+
+
+@pytest.fixture
+def priced(tender):
+    """civil: 100 (lump sum) + 10 × 5 (detailed) = 150 → VAT 5% = 7.50 → 157.50؛ تمويل 100."""
+    tpl = tender.template
+    pricing = TemplateSection.objects.create(template=tpl, title="Pricing", section_key="pricing",
+                                             kind=SectionKind.PRICING, order=2)
+    civil = PricingSection.objects.create(section=pricing, pr_section_key="civil", name="Civil")
+    lump = PricingItem.objects.create(pricing_section=civil, item_key="lump", name="Lump")
+    detailed = PricingItem.objects.create(pricing_section=civil, item_key="detailed", name="Detailed")
+    fees = TemplateSection.objects.create(template=tpl, title="Fees", section_key="fees", kind=SectionKind.FEES)
+    vat = FeeDefinition.objects.create(section=fees, key="vat", name="VAT", default_rate=Decimal("5"))
+    stamp = FeeDefinition.objects.create(section=fees, key="stamp", name="Stamp")
+    funding = TemplateSection.objects.create(template=tpl, title="Funding", section_key="funding",
+                                             kind=SectionKind.FUNDING)
+    bank = FundingSource.objects.create(section=funding, source_key="bank", name="Bank")
+    own = FundingSource.objects.create(section=funding, source_key="own", name="Own")
+
+    AnswerPricing.objects.create(tender=tender, item=lump, mode=PricingMode.LUMP_SUM, amount_total=Decimal("100"))
+    AnswerPricing.objects.create(tender=tender, item=detailed, mode=PricingMode.DETAILED,
+                                 rate=Decimal("10"), quantity=Decimal("5"))
+    AnswerFee.objects.create(tender=tender, fee=vat)
+    AnswerFee.objects.create(tender=tender, fee=stamp, enabled=False, amount=Decimal("999"))
+    AnswerFunding.objects.create(tender=tender, source=bank, enabled=True, amount=Decimal("100"))
+    AnswerFunding.objects.create(tender=tender, source=own, enabled=False, amount=Decimal("50"))
+    return Tender.objects.get(pk=tender.pk)
@@ -0,0 +1,99 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from pre_tender.answers import bulk_upsert_answers
+from pre_tender.models import Answer, FormTemplate, Question, SectionKind, TemplateSection, Tender, TenderCounter
+
+
+@pytest.fixture
+def big_tender(user):
+    TenderCounter.reset_allocator()
+    tpl = FormTemplate.objects.create(title="Big", version=1, is_published=True)
+    sec = TemplateSection.objects.create(template=tpl, title="Basic", section_key="basic", kind=SectionKind.BASIC)
+    Question.objects.bulk_create([
+        Question(template=tpl, section=sec, q_key=f"q{i}", q_type="number", title=f"Q{i}", order=i)
+        for i in range(60)
+    ] + [
+        Question(template=tpl, section=sec, q_key="total", q_type="number", title="Total", order=99,
+                 formula="q0 * q1"),
+        Question(template=tpl, section=sec, q_key="total_plus", q_type="number", title="Total+", order=100,
+                 formula="total + 1"),
+    ])
+    return Tender.create_with_snapshot(user=user, title="big")
+
+
+def answers(tender):
+    return dict(Answer.objects.filter(tender=tender).values_list("field_key", "value"))
+
+
+@pytest.mark.django_db
+def test_insert_then_update(tender):
+    assert bulk_upsert_answers(tender, [{"field_key": "f0", "value": "a"}, {"field_key": "f1", "value": "b"}])[:2] == (2, [])
+    first_pk = Answer.objects.get(tender=tender, field_key="f0").pk
+
+    saved, errors, _ = bulk_upsert_answers(tender, [{"field_key": "f0", "value": "A"}, {"field_key": "f2", "value": "c"}])
+    assert (saved, errors) == (2, [])
+    assert answers(tender) == {"f0": "A", "f1": "b", "f2": "c"}
+    assert Answer.objects.get(tender=tender, field_key="f0").pk == first_pk
+    assert Answer.objects.get(tender=tender, field_key="f0").label_at_submit == "F0"
+
+
+@pytest.mark.django_db
+def test_bad_items_are_reported_and_good_ones_persist(tender):
+    saved, errors, _ = bulk_upsert_answers(tender, [
+        {"field_key": "f0", "value": 1},
+        {"field_key": "nope", "value": 2},
+        {"value": 3},
+        "not an object",
+        {"field_key": "f1", "value": 4},
+    ])
+    assert saved == 2
+    assert [(e["index"], e["field_key"]) for e in errors] == [(1, "nope"), (2, None), (3, None)]
+    assert "field_key" in errors[1]["errors"]
+    assert answers(tender) == {"f0": 1, "f1": 4}
+
+
+@pytest.mark.django_db
+def test_api_reports_partial_saves_and_rejects_all_bad(user, tender):
+    client = APIClient()
+    client.force_authenticate(user)
+    url = f"/api/pre-tender/tenders/{tender.pk}/answers"
+
+    r = client.post(url, {"answers": [{"field_key": "f0", "value": 1}, {"field_key": "x", "value": 1}]}, format="json")
+    assert r.status_code == 200 and r.data["status"] == "partial" and r.data["saved"] == 1
+    assert [e["index"] for e in r.data["errors"]] == [1]
+
+    r = client.post(url, {"answers": [{"field_key": "x", "value": 1}]}, format="json")
+    assert r.status_code == 400
+    assert answers(tender) == {"f0": 1}
+
+
+@pytest.mark.django_db
+def test_formulas_depending_on_saved_answers_are_recomputed(big_tender):
+    _, _, computed = bulk_upsert_answers(big_tender, [{"field_key": "q0", "value": 3}, {"field_key": "q1", "value": "4"}])
+    assert computed == {"total": 12, "total_plus": 13}
+
+    _, _, computed = bulk_upsert_answers(big_tender, [{"field_key": "q1", "value": 5}])
+    assert computed == {"total": 15, "total_plus": 16}
+    assert dict(Answer.objects.filter(tender=big_tender, field_key__startswith="total")
+                .values_list("field_key", "computed")) == {"total": 15, "total_plus": 16}
+
+    assert bulk_upsert_answers(big_tender, [{"field_key": "q7", "value": 1}])[2] == {}
+
+
+@pytest.mark.django_db
+def test_query_count_does_not_grow_with_the_form(big_tender):
+    def run(keys, value):
+        with CaptureQueriesContext(connection) as ctx:
+            saved, errors, _ = bulk_upsert_answers(big_tender, [{"field_key": k, "value": value} for k in keys])
+        assert (saved, errors) == (len(keys), [])
+        return len(ctx)
+
+    bulk_upsert_answers(big_tender, [{"field_key": "q59", "value": 0}])  # الـ field index/graph في الذاكرة
+    small = run([f"q{i}" for i in range(2, 7)], 1)
+    big = run([f"q{i}" for i in range(2, 60)], 2)  # 5 update + 53 insert
+    assert big == small
+    assert big <= 8
+
@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+
+from pre_tender.models import TenderCounter
+
+postgres_only = pytest.mark.skipif(connection.vendor != "postgresql", reason="sequences need PostgreSQL")
+
+
+@pytest.fixture
+def allocator_mode(settings):
+    def use(mode, block_size=1):
+        settings.TENDER_CODE_ALLOCATOR = mode
+        settings.TENDER_CODE_BLOCK_SIZE = block_size
+        TenderCounter.reset_allocator()
+
+    yield use
+    TenderCounter.reset_allocator()
+
+
+def _drop_sequence():
+    with connection.cursor() as cursor:
+        cursor.execute('DROP SEQUENCE IF EXISTS "pre_tender_code_seq_default"')
+
+
+@pytest.mark.django_db
+def test_counter_reserve_and_next(allocator_mode):
+    allocator_mode("counter")
+    assert TenderCounter.reserve(3) == [1, 2, 3]
+    assert TenderCounter.next() == 4
+    assert TenderCounter.reserve(2, name="other") == [1, 2]
+    assert TenderCounter.objects.get(name="default").value == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_counter_blocks_are_handed_out_in_order(allocator_mode):
+    allocator_mode("counter", block_size=5)
+    assert [TenderCounter.next() for _ in range(3)] == [1, 2, 3]
+    assert TenderCounter.reserve(4) == [4, 5, 6, 7]
+    assert TenderCounter.objects.get(name="default").value == 10
+
+
+@postgres_only
+@pytest.mark.django_db(transaction=True)
+def test_sequence_reserve_and_next_start_after_the_counter(allocator_mode):
+    _drop_sequence()
+    TenderCounter.objects.create(name="default", value=10)
+    allocator_mode("sequence")
+    try:
+        assert TenderCounter.reserve(3) == [11, 12, 13]
+        assert TenderCounter.next() == 14
+    finally:
+        _drop_sequence()
+
+
+@postgres_only
+@pytest.mark.django_db(transaction=True)
+def test_switching_modes_never_reissues_codes(allocator_mode):
+    _drop_sequence()
+    try:
+        allocator_mode("counter")
+        issued = TenderCounter.reserve(2)
+
+        allocator_mode("sequence")
+        issued += TenderCounter.reserve(3)
+
+        # sequence → counter: الصف متقدمش في وضع sequence، بيلحق بيها أول مرة
+        allocator_mode("counter")
+        issued += TenderCounter.reserve(2)
+
+        # counter → sequence تاني: الـ sequence القديمة بتتقدم لبعد العدّاد
+        allocator_mode("sequence")
+        issued.append(TenderCounter.next())
+
+        assert issued == list(range(1, 9))
+    finally:
+        _drop_sequence()
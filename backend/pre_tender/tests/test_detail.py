@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from pre_tender.answers import bulk_upsert_answers
+from pre_tender.detail import DETAIL_TABLES, tender_full_detail
+from pre_tender.models import Answer, Tender
+
+
+def url(tender, compact=False):
+    return f"/api/pre-tender/tenders/{tender.pk}/full" + ("?compact=1" if compact else "")
+
+
+@pytest.fixture
+def answered(priced):
+    bulk_upsert_answers(priced, [{"field_key": f"f{i}", "value": i} for i in range(5)])
+    return Tender.objects.get(pk=priced.pk)
+
+
+@pytest.mark.django_db
+def test_full_detail_reads_stale_totals_without_writing(answered):
+    Tender.objects.filter(pk=answered.pk).update(totals={})
+    data = tender_full_detail(answered.pk)
+    assert data["totals"]["grand_total"] == "157.50"
+    assert Tender.objects.get(pk=answered.pk).totals == {}
+
+
+@pytest.mark.django_db
+def test_query_count_is_fixed(answered):
+    def count():
+        with CaptureQueriesContext(connection) as ctx:
+            tender_full_detail(answered.pk)
+        return len(ctx)
+
+    # التندر + prefetch لكل جدول (+ 1 للإجماليات لو مش متخزنة)
+    assert count() == 1 + len(DETAIL_TABLES) + 1
+    bulk_upsert_answers(answered, [{"field_key": "f0", "value": "more"}])
+    Tender.objects.filter(pk=answered.pk).update(totals={})
+    assert count() == 1 + len(DETAIL_TABLES) + 1
+
+
+@pytest.mark.django_db
+def test_datetimes_match_drf_local_time_in_both_encodings(answered, user):
+    client = APIClient()
+    client.force_authenticate(user)
+    answer = Answer.objects.get(tender=answered, field_key="f1")
+    expected = serializers.DateTimeField().to_representation(answer.submitted_at)
+
+    full = client.get(url(answered)).data
+    row = next(a for a in full["answers"] if a["field_key"] == "f1")
+    assert row["submitted_at"] == expected
+    assert full["tender"]["created_at"] == serializers.DateTimeField().to_representation(
+        Tender.objects.get(pk=answered.pk).created_at)
+
+    compact = client.get(url(answered, compact=True)).data["answers"]
+    rows = [dict(zip(compact["fields"], r)) for r in compact["rows"]]
+    assert rows == full["answers"]
@@ -0,0 +1,124 @@
+from decimal import Decimal
+
+import pytest
+
+from core.cache import invalidate_tags
+from pre_tender.formulas import (
+    FormulaError, FormulaGraph, _graphs, compile_formula, evaluate, template_formula_graph, to_json_number,
+)
+from pre_tender.models import FormTemplate, Question, SectionKind, TemplateSection
+from pre_tender.snapshots import TEMPLATES_TAG
+
+
+def calc(source, **values):
+    return compile_formula(source).evaluate(values)
+
+
+# ======================== Whitelist ========================
+@pytest.mark.parametrize("source", [
+    "a.__class__",
+    "__import__('os')",
+    "(1).real",
+    "open('x')",
+    "eval('1')",
+    "getattr(a, 'b')",
+    "a[0]",
+    "[a, b]",
+    "lambda: 1",
+    "'text'",
+    "min(a, key=b)",
+    "a ** b",
+    "a ** 100",
+    "(x := 1)",
+])
+def test_rejects_anything_outside_the_whitelist(source):
+    with pytest.raises(FormulaError):
+        compile_formula(source)
+
+
+def test_field_names_cannot_reach_python_names():
+    # اسم حقل زي __builtins__ مجرد متغير قيمته من الـ values
+    assert calc("__builtins__ + 1", __builtins__=2) == Decimal(3)
+    assert calc("{plot-area} * 2", **{"plot-area": "1.5"}) == Decimal("3.0")
+
+
+# ======================== Semantics ========================
+def test_decimal_rounding_is_half_up_and_exact():
+    assert calc("0.1 + 0.2") == Decimal("0.3")
+    assert calc("round(a, 2)", a="2.675") == Decimal("2.68")
+    assert calc("round(a)", a="2.5") == Decimal(3)
+    assert calc("round(a * 1.05, 2)", a="150") == Decimal("157.50")
+    assert to_json_number(Decimal("157.50")) == 157.5
+
+
+def test_blank_fields_count_as_zero_and_errors_are_none():
+    assert calc("a + 1") == Decimal(1)
+    assert calc("a / b", a=1, b=0) is None
+
+
+def test_coalesce_keeps_real_zero():
+    assert calc("coalesce(a, b)", a=0, b=5) == Decimal(0)
+    assert calc("coalesce(a, b)", a="", b=5) == Decimal(5)
+    assert calc("coalesce(a, b)", b=5) == Decimal(5)
+    assert calc("coalesce(a, b)") == Decimal(0)
+
+
+def test_iif_only_evaluates_the_branch_taken():
+    assert calc("iif(b == 0, 0, a / b)", a=1, b=0) == Decimal(0)
+    assert calc("iif(b == 0, 0, a / b)", a=1, b=4) == Decimal("0.25")
+    with pytest.raises(FormulaError):
+        compile_formula("iif(a, b)")
+
+
+# ======================== Graph ========================
+def test_cycles_are_reported_and_skipped():
+    graph = FormulaGraph({"x": "y + 1", "y": "x + 1", "z": "x * 2", "ok": "a + 1"})
+    assert "Circular" in graph.errors["x"] and "Circular" in graph.errors["y"]
+    assert graph.errors["z"] == "Depends on an invalid formula."
+    assert graph.order == ["ok"]
+
+
+def test_evaluate_recomputes_only_affected_formulas_in_order():
+    graph = FormulaGraph({"d": "c + 1", "c": "a * b", "e": "f * 2"})
+    assert graph.order.index("c") < graph.order.index("d")
+
+    values = {"a": 2, "b": 3, "f": 1}
+    assert evaluate(graph, None, values) == {"c": Decimal(6), "d": Decimal(7), "e": Decimal(2)}
+
+    values.update(a=5, c=Decimal(6), d=Decimal(7), e=Decimal(2))
+    assert evaluate(graph, {"a"}, values) == {"c": Decimal(15), "d": Decimal(16)}
+    assert evaluate(graph, {"unrelated"}, values) == {}
+
+
+# ======================== Cache ========================
+@pytest.fixture
+def template(db):
+    tpl = FormTemplate.objects.create(title="T", version=1, is_published=True)
+    sec = TemplateSection.objects.create(template=tpl, title="Basic", section_key="basic", kind=SectionKind.BASIC)
+    Question.objects.create(template=tpl, section=sec, q_key="a", q_type="number", title="A", order=0)
+    Question.objects.create(template=tpl, section=sec, q_key="c", q_type="number", title="C", order=1,
+                            formula="a * 2")
+    _graphs.clear()
+    return tpl
+
+
+@pytest.mark.django_db
+def test_graph_is_cached_until_the_template_changes(template):
+    graph = template_formula_graph(template)
+    assert template_formula_graph(template) is graph
+
+    template.version = 2
+    template.save()
+    bumped = template_formula_graph(template)
+    assert bumped is not graph
+
+    invalidate_tags(TEMPLATES_TAG)
+    assert template_formula_graph(template) is not bumped
+
+
+@pytest.mark.django_db
+def test_formula_edit_reaches_the_graph(template):
+    assert evaluate(template_formula_graph(template), None, {"a": 3}) == {"c": Decimal(6)}
+    Question.objects.filter(q_key="c").update(formula="a * 3")  # update() مش بيبعت signals
+    invalidate_tags(TEMPLATES_TAG)
+    assert evaluate(template_formula_graph(template), None, {"a": 3}) == {"c": Decimal(9)}
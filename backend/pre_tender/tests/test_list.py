@@ -0,0 +1,48 @@
+from datetime import datetime, time
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from pre_tender.models import Tender
+
+URL = "/api/pre-tender/tenders/list"
+
+
+def local(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+@pytest.fixture
+def client(user):
+    c = APIClient()
+    c.force_authenticate(user)
+    return c
+
+
+def ids(response):
+    assert response.status_code == 200, response.data
+    return {row["id"] for row in response.data["results"]}
+
+
+@pytest.mark.django_db
+def test_created_range_covers_whole_local_days(client, tender, user):
+    late = tender
+    early = Tender.create_with_snapshot(user=user, title="y")
+    day = datetime(2025, 1, 1).date()
+    Tender.objects.filter(pk=early.pk).update(created_at=local(day, 0, 0))
+    Tender.objects.filter(pk=late.pk).update(created_at=local(day, 23, 59))
+
+    assert ids(client.get(URL, {"created_after": "2025-01-01", "created_before": "2025-01-01"})) == {early.pk, late.pk}
+    assert ids(client.get(URL, {"created_before": "2024-12-31"})) == set()
+    assert ids(client.get(URL, {"created_after": "2025-01-02"})) == set()
+
+
+@pytest.mark.django_db
+def test_list_computes_stale_totals_without_writing(client, tender):
+    Tender.objects.filter(pk=tender.pk).update(totals={})
+
+    response = client.get(URL)
+    assert ids(response) == {tender.pk}
+    assert response.data["results"][0]["totals"]["grand_total"] == "0.00"
+    assert Tender.objects.get(pk=tender.pk).totals == {}
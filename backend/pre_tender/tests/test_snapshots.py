@@ -0,0 +1,110 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from pre_tender.models import Tender
+from pre_tender.snapshots import check_snapshot, find_field
+
+
+def overrides_url(tender):
+    return f"/api/pre-tender/tenders/{tender.pk}/overrides"
+
+
+@pytest.fixture
+def admin(user):
+    c = APIClient()
+    c.force_authenticate(user)
+    return c
+
+
+@pytest.mark.django_db
+def test_override_edits_each_land_in_the_stored_snapshot(admin, tender):
+    for key, label in (("f1", "One"), ("f3", "Three")):
+        r = admin.post(overrides_url(tender), {"overrides": [{"field_key": key, "label": label}]}, format="json")
+        assert r.status_code == 200 and r.data["status"] == "snapshot_patched"
+
+    tender.refresh_from_db()
+    assert find_field(tender.schema_snapshot, "f1")[1]["title"] == "One"
+    assert find_field(tender.schema_snapshot, "f3")[1]["title"] == "Three"
+    assert check_snapshot(tender) == []
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="SELECT ... FOR UPDATE needs a real row lock")
+@pytest.mark.django_db
+def test_override_edit_locks_the_tender_row(admin, tender):
+    with CaptureQueriesContext(connection) as ctx:
+        admin.post(overrides_url(tender), {"overrides": [{"field_key": "f1", "label": "One"}]}, format="json")
+    locks = [q["sql"] for q in ctx.captured_queries if "FOR UPDATE" in q["sql"]]
+    assert locks and Tender._meta.db_table in locks[0]
+
+
+@pytest.mark.django_db
+def test_snapshot_version_is_bumped_in_the_database(tender):
+    first, second = Tender.objects.get(pk=tender.pk), Tender.objects.get(pk=tender.pk)
+    start = first.snapshot_version
+
+    first.save_snapshot(first.schema_snapshot)
+    second.rebuild_snapshot()  # نسخة متحمّلة قبل التعديل الأول
+
+    assert (first.snapshot_version, second.snapshot_version) == (start + 1, start + 2)
+    assert Tender.objects.get(pk=tender.pk).snapshot_version == start + 2
+
+
+@pytest.mark.django_db
+def test_field_index_is_cached_under_the_version_it_was_read_with(tender):
+    from pre_tender.snapshots import field_index_lru, tender_field_index
+
+    field_index_lru.clear()
+    stale = Tender.objects.defer("schema_snapshot", "field_index").get(pk=tender.pk)
+    old_version = stale.snapshot_version
+
+    fresh = Tender.objects.get(pk=tender.pk)
+    snap = fresh.schema_snapshot
+    find_field(snap, "f1")[1]["title"] = "Renamed"
+    fresh.save_snapshot(snap)
+
+    assert tender_field_index(stale)["f1"]["label"] == "Renamed"
+    assert stale.snapshot_version == fresh.snapshot_version
+    assert field_index_lru.get((tender.pk, old_version)) is None
+
+
+# ======================== Template snapshot cache ========================
+@pytest.mark.django_db
+def test_template_snapshot_is_served_from_cache(tender):
+    from pre_tender.snapshots import template_snapshot
+
+    tpl = tender.template
+    template_snapshot(tpl)  # warm
+    with CaptureQueriesContext(connection) as ctx:
+        first = template_snapshot(tpl)
+    assert len(ctx) == 0
+
+    first["sections"][0]["fields"].clear()  # نسخة (deepcopy) — الكاش ميتأثرش
+    assert len(template_snapshot(tpl)["sections"][0]["fields"]) == 5
+
+
+@pytest.mark.django_db
+def test_template_edits_invalidate_the_cached_snapshot(tender, django_capture_on_commit_callbacks):
+    from pre_tender.models import FormTemplate, Question
+    from pre_tender.snapshots import template_snapshot
+
+    tpl = FormTemplate.objects.get(pk=tender.template_id)
+    template_snapshot(tpl)
+
+    # save() على أي موديل في شجرة القالب → TEMPLATES_TAG يتبطل بعد الـ commit
+    q = Question.objects.get(template=tpl, q_key="f0")
+    q.title = "Renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        q.save()
+    with CaptureQueriesContext(connection) as ctx:
+        assert find_field(template_snapshot(tpl), "f0")[1]["title"] == "Renamed"
+    assert len(ctx) > 0
+
+    # نسخة القالب جزء من المفتاح
+    Question.objects.filter(pk=q.pk).update(title="Silent")  # من غير signals
+    tpl.version = 2
+    tpl.save()
+    snap = template_snapshot(tpl)
+    assert snap["template"]["version"] == 2
+    assert find_field(snap, "f0")[1]["title"] == "Silent"
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from pre_tender.models import AnswerFee, AnswerFunding, AnswerPricing, Tender
+from pre_tender.totals import compute_totals, recompute_totals, tender_totals
+
+
+def stored(tender):
+    return Tender.objects.values_list("answers_version", "totals").get(pk=tender.pk)
+
+
+@pytest.mark.django_db
+def test_pricing_fees_and_funding(priced):
+    totals = tender_totals(priced)
+    assert totals["work_types"] == [{"key": "civil", "name": "Civil", "amount": "150.00"}]
+    [fee] = totals["fees"]
+    assert (fee["key"], Decimal(fee["rate"]), fee["amount"]) == ("vat", Decimal(5), "7.50")
+    assert (totals["pricing_total"], totals["fees_total"], totals["grand_total"]) == ("150.00", "7.50", "157.50")
+    assert (totals["funding_total"], totals["funding_gap"]) == ("100.00", "57.50")
+
+    version, cached = stored(priced)
+    assert cached == totals and cached["version"] == version
+
+
+@pytest.mark.django_db
+def test_answer_changes_make_totals_stale_until_recomputed(priced):
+    tender_totals(priced)
+    version, cached = stored(priced)
+
+    AnswerPricing.objects.get(tender=priced, item__item_key="detailed").delete()
+    new_version, still_cached = stored(priced)
+    assert new_version == version + 1 and still_cached == cached  # قديم بس لسه متخزن
+
+    totals = tender_totals(Tender.objects.get(pk=priced.pk))
+    assert (totals["pricing_total"], totals["fees_total"], totals["grand_total"]) == ("100.00", "5.00", "105.00")
+    assert stored(priced) == (new_version, totals)
+
+    fee = AnswerFee.objects.get(tender=priced, fee__key="vat")
+    fee.amount = Decimal("12")
+    fee.save()
+    assert stored(priced)[0] == new_version + 1
+    assert tender_totals(Tender.objects.get(pk=priced.pk))["grand_total"] == "112.00"
+
+
+@pytest.mark.django_db
+def test_recompute_command_only_touches_stale_tenders(priced, user):
+    other = Tender.create_with_snapshot(user=user, title="empty")
+    tender_totals(Tender.objects.get(pk=other.pk))
+
+    call_command("recompute_tender_totals")
+    assert stored(priced)[1]["grand_total"] == "157.50"
+    assert recompute_totals() == 0
+
+    AnswerFunding.objects.filter(tender=priced, source__source_key="bank").update(amount=Decimal("157.50"))
+    assert recompute_totals() == 0  # update() مش بيزوّد النسخة — --all بس
+    call_command("recompute_tender_totals", "--all")
+    assert stored(priced)[1]["funding_gap"] == "0.00"
+
+
+@pytest.mark.django_db
+def test_one_query_for_many_tenders(priced, user):
+    others = [Tender.create_with_snapshot(user=user, title=str(i)) for i in range(3)]
+    with CaptureQueriesContext(connection) as ctx:
+        results = compute_totals({t.pk: t.answers_version for t in [priced, *others]})
+    assert len(ctx) == 1
+    assert results[priced.pk]["grand_total"] == "157.50"
+    assert results[others[0].pk]["grand_total"] == "0.00"
@@ -0,0 +1,89 @@
+import hashlib
+import io
+import os
+
+import pytest
+from rest_framework.test import APIClient
+
+from pre_tender.models import AttachmentType, TemplateSection, TenderFile, TenderUpload
+from pre_tender.uploads import UploadError, staging_path, start_upload, write_chunk
+
+
+@pytest.fixture
+def client(tender):
+    c = APIClient()
+    c.force_authenticate(tender.created_by)
+    return c
+
+
+def put(client, url, data, offset):
+    return client.put(url, data, content_type="application/octet-stream", HTTP_UPLOAD_OFFSET=str(offset))
+
+
+@pytest.mark.django_db
+def test_resume_after_interruption(client, tender):
+    sec = TemplateSection.objects.create(template=tender.template, title="A", section_key="att", kind="attachments")
+    AttachmentType.objects.create(section=sec, key="boq", name="BOQ", accept=".pdf,application/pdf")
+    base = f"/api/pre-tender/tenders/{tender.pk}/uploads"
+    data = os.urandom(300_000)
+
+    assert client.post(base, {"filename": "a.exe", "size": 10, "type": "boq"}, format="json").status_code == 400
+    r = client.post(base, {"filename": "boq.pdf", "size": len(data), "type": "boq"}, format="json")
+    assert r.status_code == 201, r.data
+    url = f"{base}/{r.data['upload_id']}"
+
+    assert put(client, url, data[:100_000], 0).data["offset"] == 100_000
+    # الكلاينت فقد الاتصال: يسأل عن الـ offset ويكمّل من عنده
+    assert client.get(url).data["offset"] == 100_000
+    r = put(client, url, data[:10], 5)
+    assert r.status_code == 409 and r.data["offset"] == 100_000
+    assert client.post(url + "/complete").status_code == 409
+    assert put(client, url, data[100_000:], 100_000).data["offset"] == len(data)
+
+    r = client.post(url + "/complete")
+    assert r.status_code == 201 and r.data["sha256"] == hashlib.sha256(data).hexdigest()
+    tender_file = TenderFile.objects.get()
+    assert tender_file.file.read() == data and tender_file.field_key == "boq"
+    assert os.listdir(os.path.dirname(staging_path(TenderUpload.objects.get()))) == []
+
+
+@pytest.mark.django_db
+def test_duplicate_chunk_does_not_touch_staging(tender):
+    upload = start_upload(tender, filename="a.bin", size=8)
+    stale = TenderUpload.objects.get(pk=upload.pk)  # retry شايف نفس received=0
+
+    assert write_chunk(upload, 0, io.BytesIO(b"AAAA")) == 4
+    with pytest.raises(UploadError) as exc:
+        write_chunk(stale, 0, io.BytesIO(b"BBBBBBBB"))
+    assert exc.value.status_code == 409 and exc.value.extra["offset"] == 4
+    with open(staging_path(upload), "rb") as fh:
+        assert fh.read() == b"AAAA"
+    # مفيش ملفات مؤقتة فاضلة
+    assert sorted(os.listdir(os.path.dirname(staging_path(upload)))) == [os.path.basename(staging_path(upload))]
+
+    assert write_chunk(upload, 4, io.BytesIO(b"CCCC")) == 8
+    with open(staging_path(upload), "rb") as fh:
+        assert fh.read() == b"AAAACCCC"
+
+
+@pytest.mark.django_db
+def test_chunk_past_declared_size(tender):
+    upload = start_upload(tender, filename="a.bin", size=5)
+    with pytest.raises(UploadError) as exc:
+        write_chunk(upload, 0, io.BytesIO(b"0123456789"))
+    assert exc.value.status_code == 413
+    upload.refresh_from_db()
+    assert upload.received == 0 and os.path.getsize(staging_path(upload)) == 0
+
+
+@pytest.mark.django_db
+def test_claimed_offset_without_bytes_is_recovered(tender):
+    upload = start_upload(tender, filename="a.bin", size=8)
+    write_chunk(upload, 0, io.BytesIO(b"AAAA"))
+    # request حجز 4..8 ووقع قبل ما يكتب في الـ staging
+    TenderUpload.objects.filter(pk=upload.pk).update(received=8)
+    upload.refresh_from_db()
+    with pytest.raises(UploadError) as exc:
+        write_chunk(upload, 8, io.BytesIO(b""))
+    assert exc.value.extra["offset"] == 4
+    assert write_chunk(upload, 4, io.BytesIO(b"CCCC")) == 8
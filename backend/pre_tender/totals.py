@@ -0,0 +1,182 @@
+# pre_tender/totals.py
+"""
+إجماليات التندر (pricing + fees + funding) من استعلام واحد.
+
+- الاستعلام: UNION ALL لتلات جداول (pricing مجمّعة per work type، الرسوم، التمويل المفعّل)
+  لكل التندرات المطلوبة مرة واحدة — مفيش N+1 في الليستات.
+- النتيجة بتتخزن في Tender.totals مع answers_version؛ أي تعديل في الإجابات بيزوّد النسخة
+  (signals في PreTenderConfig.ready) فالـ cache القديم بيتحسب من جديد أول ما يتطلب.
+- recompute_totals(ids) للتحديث بالجملة (management command: recompute_tender_totals).
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import models
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import AnswerFee, AnswerFunding, AnswerPricing, Tender
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+_MONEY = DecimalField(max_digits=18, decimal_places=4)
+
+
+def _money(value) -> Decimal:
+    return Decimal(value or 0).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def bump_answers_version(tender_ids) -> None:
+    """الـ cache بتاع الإجماليات بيبقى قديم (بيتحسب تاني عند الطلب)."""
+    ids = {pk for pk in tender_ids if pk}
+    if ids:
+        Tender.objects.filter(pk__in=ids).update(answers_version=F("answers_version") + 1)
+
+
+# ======================== Query ========================
+def _rows(tender_ids):
+    """(tender_id, kind, key, name, amount, rate) — استعلام SQL واحد (UNION ALL)."""
+    pricing = (
+        AnswerPricing.objects.filter(tender_id__in=tender_ids)
+        .values("tender_id")
+        .annotate(
+            kind=Value("pricing", output_field=models.CharField()),
+            key=F("item__pricing_section__pr_section_key"),
+            name=F("item__pricing_section__name"),
+            amount=Sum("line_total", output_field=_MONEY),
+            rate=Value(None, output_field=_MONEY),
+        )
+        .values_list("tender_id", "kind", "key", "name", "amount", "rate")
+        .order_by()
+    )
+    fees = (
+        AnswerFee.objects.filter(tender_id__in=tender_ids, enabled=True)
+        .annotate(
+            kind=Value("fee", output_field=models.CharField()),
+            key=F("fee__key"),
+            name=F("fee__name"),
+            fee_amount=F("amount"),
+            fee_rate=Coalesce("rate", "fee__default_rate", output_field=_MONEY),
+        )
+        .values_list("tender_id", "kind", "key", "name", "fee_amount", "fee_rate")
+        .order_by()
+    )
+    funding = (
+        AnswerFunding.objects.filter(tender_id__in=tender_ids, enabled=True)
+        .annotate(
+            kind=Value("funding", output_field=models.CharField()),
+            key=F("source__source_key"),
+            name=F("source__name"),
+            fund_amount=Coalesce("amount", Value(ZERO), output_field=_MONEY),
+            fund_rate=Value(None, output_field=_MONEY),
+        )
+        .values_list("tender_id", "kind", "key", "name", "fund_amount", "fund_rate")
+        .order_by()
+    )
+    return pricing.union(fees, funding, all=True)
+
+
+def _empty():
+    return {"work_types": [], "fees": [], "funding": []}
+
+
+def _finish(version, parts) -> dict:
+    pricing_total = _money(sum((Decimal(w["amount"]) for w in parts["work_types"]), ZERO))
+    fees_total = ZERO
+    for fee in parts["fees"]:
+        if fee["amount"] is None:
+            # مفيش مبلغ ثابت → نسبة (%) من إجمالي الـ pricing
+            fee["amount"] = _money(pricing_total * Decimal(fee["rate"] or 0) / 100)
+        fee["amount"] = _money(fee["amount"])
+        fees_total += fee["amount"]
+    funding_total = _money(sum((Decimal(f["amount"]) for f in parts["funding"]), ZERO))
+    grand_total = pricing_total + fees_total
+
+    def _str(items):
+        return [{k: (str(v) if isinstance(v, Decimal) else v) for k, v in item.items()} for item in items]
+
+    return {
+        "version": version,
+        "work_types": _str(sorted(parts["work_types"], key=lambda w: w["key"] or "")),
+        "pricing_total": str(pricing_total),
+        "fees": _str(sorted(parts["fees"], key=lambda f: f["key"] or "")),
+        "fees_total": str(_money(fees_total)),
+        "grand_total": str(_money(grand_total)),
+        "funding": _str(sorted(parts["funding"], key=lambda f: f["key"] or "")),
+        "funding_total": str(funding_total),
+        "funding_gap": str(_money(grand_total - funding_total)),
+    }
+
+
+def compute_totals(versions) -> dict:
+    """versions: {tender_id: answers_version} → {tender_id: totals} (استعلام واحد)."""
+    parts = {pk: _empty() for pk in versions}
+    if not parts:
+        return {}
+    for tender_id, kind, key, name, amount, rate in _rows(list(parts)):
+        bucket = parts[tender_id]
+        if kind == "pricing":
+            bucket["work_types"].append({"key": key, "name": name, "amount": _money(amount)})
+        elif kind == "fee":
+            bucket["fees"].append({"key": key, "name": name, "rate": None if rate is None else str(rate),
+                                   "amount": amount})
+        else:
+            bucket["funding"].append({"key": key, "name": name, "amount": _money(amount)})
+    return {pk: _finish(versions[pk], bucket) for pk, bucket in parts.items()}
+
+
+# ======================== Cache on Tender ========================
+def _is_fresh(tender) -> bool:
+    return bool(tender.totals) and tender.totals.get("version") == tender.answers_version
+
+
+def _store(results):
+    for pk, totals in results.items():
+        # لو حد زوّد النسخة واحنا بنحسب، مش هنكتب فوقها (الـ version مش هيطابق)
+        Tender.objects.filter(pk=pk, answers_version=totals["version"]).update(totals=totals)
+
+
+def ensure_totals(tenders, store=True) -> None:
+    """
+    يحسب الإجماليات القديمة بس (كلها في استعلام واحد) ويحطها على الـ objects.
+    store=False (الليستات): قراءة بس — الـ cache بيتكتب من recompute_tender_totals أو من الـ detail.
+    """
+    stale = {t.pk: t for t in tenders if not _is_fresh(t)}
+    if not stale:
+        return
+    results = compute_totals({pk: t.answers_version for pk, t in stale.items()})
+    if store:
+        _store(results)
+    for pk, totals in results.items():
+        stale[pk].totals = totals
+
+
+def tender_totals(tender, store=True) -> dict:
+    ensure_totals([tender], store=store)
+    return tender.totals
+
+
+def recompute_totals(tender_ids=None, chunk_size=500, stale_only=True) -> int:
+    """تحديث بالجملة — None = كل التندرات. يرجّع عدد اللي اتحسب."""
+    qs = Tender.objects.order_by("pk").only("pk", "answers_version", "totals")
+    if tender_ids is not None:
+        qs = qs.filter(pk__in=tender_ids)
+    done = 0
+    batch = []
+    for tender in qs.iterator(chunk_size=chunk_size):
+        if stale_only and _is_fresh(tender):
+            continue
+        batch.append(tender)
+        if len(batch) >= chunk_size:
+            done += _recompute_batch(batch)
+            batch = []
+    if batch:
+        done += _recompute_batch(batch)
+    return done
+
+
+def _recompute_batch(batch) -> int:
+    results = compute_totals({t.pk: t.answers_version for t in batch})
+    for tender in batch:
+        tender.totals = results[tender.pk]
+    Tender.objects.bulk_update(batch, ["totals"], batch_size=len(batch))
+    return len(batch)
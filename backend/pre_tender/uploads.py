@@ -0,0 +1,282 @@
+# pre_tender/uploads.py
+"""
+رفع مرفقات التندر على أجزاء (resumable) من غير ما الملف كله يتحمّل في الذاكرة.
+
+1) start_upload(): validation (الحجم + accept بتاع AttachmentType) + جلسة TenderUpload.
+   لو الكلاينت بعت sha256 وفيه ملف بنفس المحتوى في التندر → بيكمل فورًا (dedupe).
+2) write_chunk(): الجزء بيتكتب من الـ request stream في ملف مؤقت، وبعد ما الـ offset يتحجز
+   بيتضاف لملف الـ staging على الديسك (offset لازم يساوي اللي اتستلم — كده الكلاينت يقدر
+   يكمّل من آخر نقطة بعد أي انقطاع).
+3) complete_upload(): sha256 بالـ streaming، dedupe، نقل الملف للـ storage، وبعدين بس
+   الـ TenderFile بيتعمل في transaction قصيرة.
+
+الإعدادات: TENDER_UPLOAD_DIR (staging؛ لازم يبقى مشترك بين الـ workers)،
+TENDER_UPLOAD_CHUNK_SIZE، TENDER_UPLOAD_MAX_SIZE.
+"""
+import glob
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AttachmentType, TenderFile, TenderUpload, UploadStatus
+
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, detail, status_code=400, **extra):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.extra = extra
+
+    def as_dict(self):
+        return {"detail": self.detail, **self.extra}
+
+
+def staging_dir():
+    return str(getattr(settings, "TENDER_UPLOAD_DIR", os.path.join(settings.MEDIA_ROOT, "chunked_uploads")))
+
+
+def chunk_size():
+    return int(getattr(settings, "TENDER_UPLOAD_CHUNK_SIZE", 5 * 1024 * 1024))
+
+
+def max_size():
+    return int(getattr(settings, "TENDER_UPLOAD_MAX_SIZE", 2 * 1024 * 1024 * 1024))
+
+
+def staging_path(upload):
+    return os.path.join(staging_dir(), f"{upload.upload_id}.part")
+
+
+class _StagedFile(File):
+    """FileSystemStorage بينقل الملف (move) بدل ما ينسخه لو فيه temporary_file_path."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+# ======================== Validation ========================
+def accepts(accept, filename, content_type="") -> bool:
+    """accept بنفس صيغة <input accept>: ".pdf,.dwg,image/*,application/pdf" (فاضي = أي حاجة)."""
+    tokens = [t.strip().lower() for t in (accept or "").split(",") if t.strip()]
+    if not tokens:
+        return True
+    ext = os.path.splitext(filename or "")[1].lower()
+    content_type = (content_type or "").lower()
+    for token in tokens:
+        if token.startswith("."):
+            if ext == token:
+                return True
+        elif token.endswith("/*"):
+            if content_type.startswith(token[:-1]):
+                return True
+        elif "/" in token:
+            if content_type == token:
+                return True
+        elif ext == "." + token:
+            return True
+    return False
+
+
+def resolve_type(tender, value):
+    """AttachmentType بالـ id أو الـ key جوّه قالب التندر."""
+    if value in (None, ""):
+        return None
+    qs = AttachmentType.objects.filter(section__template_id=tender.template_id)
+    lookup = Q(key=str(value))
+    if str(value).isdigit():
+        lookup |= Q(pk=int(value))
+    att_type = qs.filter(lookup).first()
+    if att_type is None:
+        raise UploadError(f"Unknown attachment type '{value}' for this tender.")
+    return att_type
+
+
+def find_duplicate(tender, sha256, size=None):
+    if not sha256:
+        return None
+    qs = TenderFile.objects.filter(tender=tender, sha256=sha256)
+    if size is not None:
+        qs = qs.filter(size=size)
+    return qs.order_by("id").first()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ======================== Flow ========================
+def start_upload(tender, *, filename, size, user=None, field_key="", type=None,
+                 content_type="", sha256=""):
+    """يرجّع TenderUpload (status=complete + result لو اتعمل dedupe)."""
+    if not 0 < size <= max_size():
+        raise UploadError(f"File size must be between 1 and {max_size()} bytes.")
+    att_type = resolve_type(tender, type)
+    if att_type is not None and not accepts(att_type.accept, filename, content_type):
+        raise UploadError(f"'{filename}' is not accepted for {att_type.name} ({att_type.accept}).")
+
+    upload = TenderUpload(
+        tender=tender, field_key=field_key or (att_type.key if att_type else ""), type=att_type,
+        filename=os.path.basename(filename), content_type=content_type, size=size,
+        sha256=(sha256 or "").lower(), created_by=user if getattr(user, "is_authenticated", False) else None,
+    )
+    duplicate = find_duplicate(tender, upload.sha256, size)
+    if duplicate is not None:
+        upload.status, upload.received, upload.result = UploadStatus.COMPLETE, size, duplicate
+        upload.save()
+        return upload
+
+    upload.save()
+    os.makedirs(staging_dir(), exist_ok=True)
+    open(staging_path(upload), "wb").close()
+    return upload
+
+
+def write_chunk(upload, offset, stream) -> int:
+    """
+    يكتب من stream (request.stream) عند offset؛ يرجّع عدد الـ bytes المستلمة لحد دلوقتي.
+
+    الجزء بيتكتب الأول في ملف مؤقت خاص بالـ request، وبعدين الـ offset بيتحجز بـ UPDATE مشروط
+    (received=offset)، واللي كسب بس هو اللي بيضيف الجزء لملف الـ staging — request تاني على
+    نفس الـ offset (retry أو متوازي) بياخد 409 ومبيلمسش الملف.
+    """
+    if upload.status != UploadStatus.UPLOADING:
+        raise UploadError(f"Upload is {upload.status}.", status_code=409, offset=upload.received)
+
+    path = staging_path(upload)
+    _recover(upload, path)
+    if offset != upload.received:
+        raise UploadError("Offset does not match received bytes.", status_code=409, offset=upload.received)
+
+    received = offset
+    tmp = f"{path}.{uuid.uuid4().hex}.chunk"
+    try:
+        with open(tmp, "wb") as out:
+            while True:
+                block = stream.read(READ_SIZE)
+                if not block:
+                    break
+                received += len(block)
+                if received > upload.size:
+                    raise UploadError("Chunk goes past the declared file size.", status_code=413, offset=offset)
+                out.write(block)
+        if received == offset:
+            return received
+
+        if not TenderUpload.objects.filter(pk=upload.pk, received=offset, status=UploadStatus.UPLOADING).update(
+            received=received, updated_at=timezone.now()
+        ):
+            upload.refresh_from_db(fields=["received", "status"])
+            raise UploadError("Concurrent write for the same offset.", status_code=409, offset=upload.received)
+
+        # الـ range ده بقى بتاعنا لوحدنا
+        with open(tmp, "rb") as src, open(path, "r+b") as fh:
+            fh.seek(offset)
+            shutil.copyfileobj(src, fh, READ_SIZE)
+    finally:
+        _remove(tmp)
+    upload.received = received
+    return received
+
+
+def _recover(upload, path):
+    """
+    request كسب الـ offset ووقع قبل ما يكتب في الـ staging → الملف أقصر من received:
+    نرجّع received لحجم الملف الفعلي والكلاينت يكمّل من هناك.
+    """
+    try:
+        actual = os.path.getsize(path)
+    except FileNotFoundError:
+        actual = 0
+    if actual >= upload.received:
+        return
+    TenderUpload.objects.filter(pk=upload.pk, received=upload.received, status=UploadStatus.UPLOADING).update(
+        received=actual, updated_at=timezone.now()
+    )
+    upload.refresh_from_db(fields=["received", "status"])
+
+
+def complete_upload(upload):
+    """يرجّع (TenderFile, deduped)."""
+    if upload.status == UploadStatus.COMPLETE and upload.result_id:
+        return upload.result, True
+    if upload.status != UploadStatus.UPLOADING:
+        raise UploadError(f"Upload is {upload.status}.", status_code=409)
+    _recover(upload, staging_path(upload))
+    if upload.received != upload.size:
+        raise UploadError("Upload is not finished.", status_code=409, offset=upload.received)
+
+    path = staging_path(upload)
+    digest = file_sha256(path)
+    if upload.sha256 and upload.sha256 != digest:
+        abort_upload(upload)
+        raise UploadError("sha256 mismatch — upload discarded.", sha256=digest)
+
+    duplicate = find_duplicate(upload.tender, digest, upload.size)
+    if duplicate is not None:
+        _finish(upload, duplicate, digest)
+        _remove(path)
+        return duplicate, True
+
+    tender_file = TenderFile(
+        tender=upload.tender, field_key=upload.field_key, type=upload.type,
+        name=upload.filename, sha256=digest, size=upload.size,
+    )
+    # النقل للـ storage برّه أي transaction؛ الـ row بيتكتب بعد ما الملف يبقى في مكانه
+    with open(path, "rb") as fh:
+        staged = _StagedFile(fh, name=path)
+        staged.sha256 = digest  # core.storage مش هيحسبه تاني
+        tender_file.file.save(upload.filename, staged, save=False)
+    with transaction.atomic():
+        tender_file.save()
+        _finish(upload, tender_file, digest)
+    _remove(path)
+    return tender_file, False
+
+
+def _finish(upload, tender_file, digest):
+    upload.status, upload.result, upload.sha256 = UploadStatus.COMPLETE, tender_file, digest
+    upload.save(update_fields=["status", "result", "sha256", "updated_at"])
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def abort_upload(upload):
+    upload.status = UploadStatus.ABORTED
+    upload.save(update_fields=["status", "updated_at"])
+    path = staging_path(upload)
+    _remove(path)
+    # أجزاء requests وقعت في النص
+    for leftover in glob.glob(f"{path}.*.chunk"):
+        _remove(leftover)
+
+
+def cleanup_stale_uploads(older_than=timedelta(hours=24)) -> int:
+    """الجلسات اللي مكملتش ومفيش عليها نشاط → aborted + مسح ملف الـ staging."""
+    stale = TenderUpload.objects.filter(
+        status=UploadStatus.UPLOADING, updated_at__lt=timezone.now() - older_than
+    )
+    count = 0
+    for upload in stale.iterator():
+        abort_upload(upload)
+        count += 1
+    return count
@@ -1,13 +1,23 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions
+from rest_framework import filters, generics, status, permissions
+from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.db import transaction
-from .models import Tender, Answer, TenderFile, TenderFieldOverride, TenderCustomField
+
+from core.pagination import KeysetPagination
+from .models import Tender, TenderFile, TenderFieldOverride, TenderCustomField, TenderUpload
 from .serializers import (
     TenderCreateSerializer, TenderListItemSerializer, TenderDetailSerializer,
-    AnswerUpsertSerializer, OverrideSerializer, CustomFieldSerializer
+    OverrideSerializer, CustomFieldSerializer,
+    TenderFileSerializer, TenderUploadSerializer, UploadStartSerializer,
 )
+from .answers import bulk_upsert_answers
+from .detail import tender_full_detail
+from .filters import TenderListFilter
+from .snapshots import patch_snapshot
+from .totals import ensure_totals, tender_totals
+from . import uploads
 
 class IsStaffOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -31,13 +41,34 @@ class TenderCreateAPI(APIView):
         return Response(TenderDetailSerializer(tender).data, status=status.HTTP_201_CREATED)
 
 # 2) قائمة/تفاصيل
-class TenderListAPI(APIView):
+class TenderKeysetPagination(KeysetPagination):
+    orderings = {
+        "created": ("-created_at", "-id"),
+        "created_asc": ("created_at", "id"),
+        "code": ("code",),
+    }
+
+
+class TenderListAPI(generics.ListAPIView):
+    """
+    Cursor pagination + فلاتر (status/created_by/template/created_after/created_before) + ?search= على code/title.
+    الـ JSON الكبيرة (schema_snapshot/meta/field_index) مش بتتحمّل خالص.
+    """
     permission_classes = [IsStaffOrReadOnly]
+    serializer_class = TenderListItemSerializer
+    pagination_class = TenderKeysetPagination
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_class = TenderListFilter
+    search_fields = ["^code", "title"]
 
-    def get(self, request):
-        qs = Tender.objects.order_by("-created_at")
-        data = TenderListItemSerializer(qs, many=True).data
-        return Response(data)
+    def get_queryset(self):
+        return Tender.objects.only(*TenderListItemSerializer.Meta.fields, "answers_version")
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # الإجماليات القديمة في الصفحة بتتحسب كلها في استعلام واحد (من غير كتابة في GET)
+        ensure_totals(page if page is not None else queryset, store=False)
+        return page
 
 class TenderDetailAPI(APIView):
     permission_classes = [IsStaffOrReadOnly]
@@ -46,6 +77,22 @@ class TenderDetailAPI(APIView):
         tender = get_object_or_404(Tender, pk=pk)
         return Response(TenderDetailSerializer(tender).data)
 
+class TenderFullDetailAPI(APIView):
+    """التندر + كل جداول الإجابات + الملفات (عدد استعلامات ثابت). ?compact=1 → fields/rows لكل جدول."""
+    permission_classes = [IsStaffOrReadOnly]
+
+    def get(self, request, pk):
+        compact = str(request.query_params.get("compact", "")).lower() in ("1", "true", "yes")
+        return Response(tender_full_detail(pk, compact=compact, request=request))
+
+class TenderTotalsAPI(APIView):
+    """إجماليات pricing/fees/funding (من الـ cache على التندر لو الإجابات ماتغيرتش)."""
+    permission_classes = [IsStaffOrReadOnly]
+
+    def get(self, request, pk):
+        tender = get_object_or_404(Tender.objects.only("pk", "answers_version", "totals"), pk=pk)
+        return Response(tender_totals(tender))
+
 # 3) كتابة إجابات + ملفات
 class TenderAnswersAPI(APIView):
     permission_classes = [IsStaffOrReadOnly]
@@ -59,7 +106,8 @@ class TenderAnswersAPI(APIView):
         }
         وملفات via multipart بنفس أسماء field_key (يدعم متعددة)
         """
-        tender = get_object_or_404(Tender, pk=pk)
+        # الـ snapshot مش محتاجينه هنا — الـ validation على field_index (LRU)
+        tender = get_object_or_404(Tender.objects.select_related("template").defer("schema_snapshot", "field_index"), pk=pk)
         if tender.status not in ("draft", "submitted"):
             return Response({"detail": "Tender is locked."}, status=400)
 
@@ -67,29 +115,10 @@ class TenderAnswersAPI(APIView):
         if not isinstance(answers, list):
             return Response({"detail": "answers must be a list."}, status=400)
 
-        # Index snapshot
-        snap_index = {}
-        for sec in tender.schema_snapshot.get("sections", []):
-            for fd in sec.get("fields", []):
-                if fd.get("enabled", True):
-                    snap_index[fd["key"]] = fd
-
-        for item in answers:
-            ser = AnswerUpsertSerializer(data=item)
-            ser.is_valid(raise_exception=True)
-            key = ser.validated_data["field_key"]
-            val = ser.validated_data["value"]
-            fd = snap_index.get(key)
-            if not fd:
-                return Response({"detail": f"Unknown field_key '{key}' for this tender."}, status=400)
-            Answer.objects.update_or_create(
-                tender=tender, field_key=key,
-                defaults={
-                    "value": val,
-                    "label_at_submit": fd["label"],
-                    "type_at_submit": fd["type"],
-                }
-            )
+        # validation للّيستة كلها مرة واحدة + upsert بالـ bulk
+        saved, errors, computed = bulk_upsert_answers(tender, answers)
+        if errors and not saved:
+            return Response({"detail": "Invalid answers.", "errors": errors}, status=400)
 
         for field_key in request.FILES:
             for f in request.FILES.getlist(field_key):
@@ -100,7 +129,91 @@ class TenderAnswersAPI(APIView):
                     name=f.name
                 )
 
-        return Response({"status": "ok"})
+        if errors:
+            # السليم اتحفظ؛ الغلط راجع بالـ index/field_key بتاعه
+            return Response({"status": "partial", "saved": saved, "computed": computed, "errors": errors})
+        return Response({"status": "ok", "saved": saved, "computed": computed})
+
+# 3b) رفع مرفقات كبيرة على أجزاء (resumable) — pre_tender.uploads
+class TenderUploadStartAPI(APIView):
+    """
+    POST {filename, size, field_key?, type?, content_type?, sha256?}
+    → 201 {upload_id, offset, chunk_size, ...} أو 200 لو الملف موجود بالفعل (dedupe بالـ sha256).
+    """
+    permission_classes = [IsStaffOrReadOnly]
+
+    def post(self, request, pk):
+        tender = get_object_or_404(Tender.objects.only("id", "code", "status", "template_id"), pk=pk)
+        if tender.status not in ("draft", "submitted"):
+            return Response({"detail": "Tender is locked."}, status=400)
+        ser = UploadStartSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        try:
+            upload = uploads.start_upload(tender, user=request.user, **ser.validated_data)
+        except uploads.UploadError as exc:
+            return Response(exc.as_dict(), status=exc.status_code)
+
+        data = TenderUploadSerializer(upload).data
+        if upload.result_id:
+            data["file"] = TenderFileSerializer(upload.result, context={"request": request}).data
+            return Response(data, status=status.HTTP_200_OK)
+        data["chunk_size"] = uploads.chunk_size()
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class TenderUploadChunkAPI(APIView):
+    """
+    GET → الحالة + offset (للاستكمال)
+    PUT (body = bytes خام، header Upload-Offset أو ?offset=) → {offset}
+    DELETE → إلغاء
+    """
+    permission_classes = [IsStaffOrReadOnly]
+
+    def _get(self, pk, upload_id):
+        return get_object_or_404(TenderUpload.objects.select_related("tender"), tender_id=pk, upload_id=upload_id)
+
+    def get(self, request, pk, upload_id):
+        return Response(TenderUploadSerializer(self._get(pk, upload_id)).data)
+
+    def put(self, request, pk, upload_id):
+        upload = self._get(pk, upload_id)
+        raw = request.headers.get("Upload-Offset", request.query_params.get("offset"))
+        try:
+            offset = int(raw)
+        except (TypeError, ValueError):
+            return Response({"detail": "Upload-Offset header is required.", "offset": upload.received}, status=400)
+        try:
+            # request.stream مباشرة — الـ body مش بيتقري في الذاكرة ولا بيتعمله parse
+            received = uploads.write_chunk(upload, offset, request.stream)
+        except uploads.UploadError as exc:
+            return Response(exc.as_dict(), status=exc.status_code)
+        response = Response({"offset": received, "size": upload.size})
+        response["Upload-Offset"] = str(received)
+        return response
+
+    patch = put
+
+    def delete(self, request, pk, upload_id):
+        upload = self._get(pk, upload_id)
+        if upload.status == "uploading":
+            uploads.abort_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TenderUploadCompleteAPI(APIView):
+    permission_classes = [IsStaffOrReadOnly]
+
+    def post(self, request, pk, upload_id):
+        upload = get_object_or_404(
+            TenderUpload.objects.select_related("tender", "type", "result"), tender_id=pk, upload_id=upload_id
+        )
+        try:
+            tender_file, deduped = uploads.complete_upload(upload)
+        except uploads.UploadError as exc:
+            return Response(exc.as_dict(), status=exc.status_code)
+        data = TenderFileSerializer(tender_file, context={"request": request}).data
+        data["deduped"] = deduped
+        return Response(data, status=status.HTTP_200_OK if deduped else status.HTTP_201_CREATED)
 
 # 4) Submit
 class TenderSubmitAPI(APIView):
@@ -139,28 +252,44 @@ class TenderOverridesAPI(APIView):
 
     @transaction.atomic
     def post(self, request, pk):
-        tender = get_object_or_404(Tender, pk=pk)
+        """
+        التعديلات بتتطبق على الـ snapshot المتخزن مباشرة (patch_snapshot)؛
+        full rebuild لو الـ patch مش آمن أو ?rebuild=1.
+        الصف بيتقفل (select_for_update) قبل ما الـ snapshot يتقرا — طلبين في نفس الوقت
+        مش هيـpatchوا نفس النسخة القديمة وواحد فيهم يضيع تعديل التاني.
+        """
+        tender = get_object_or_404(
+            Tender.objects.select_for_update(of=("self",)).select_related("template"), pk=pk
+        )
         if tender.status != "draft":
             return Response({"detail": "Cannot change overrides on non-draft."}, status=400)
 
         overrides = request.data.get("overrides", [])
         customs = request.data.get("custom_fields", [])
 
+        changed_overrides, changed_customs = [], []
         for item in overrides:
             ser = OverrideSerializer(data=item)
             ser.is_valid(raise_exception=True)
-            TenderFieldOverride.objects.update_or_create(
+            obj, _ = TenderFieldOverride.objects.update_or_create(
                 tender=tender, field_key=ser.validated_data["field_key"],
                 defaults={k: v for k, v in ser.validated_data.items() if k != "field_key"}
             )
+            changed_overrides.append(obj)
 
         for item in customs:
             ser = CustomFieldSerializer(data=item)
             ser.is_valid(raise_exception=True)
-            TenderCustomField.objects.update_or_create(
+            obj, _ = TenderCustomField.objects.update_or_create(
                 tender=tender, field_key=ser.validated_data["field_key"],
                 defaults={k: v for k, v in ser.validated_data.items() if k != "field_key"}
             )
+            changed_customs.append(obj)
+
+        force = str(request.query_params.get("rebuild", "")).lower() in ("1", "true", "yes")
+        if not force and patch_snapshot(tender, changed_overrides, changed_customs):
+            tender.save_snapshot(tender.schema_snapshot)
+            return Response({"status": "snapshot_patched", "schema_snapshot": tender.schema_snapshot})
 
         tender.rebuild_snapshot()
         return Response({"status": "snapshot_rebuilt", "schema_snapshot": tender.schema_snapshot})
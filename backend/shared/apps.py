@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class SharedConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shared'
+
+    def ready(self):
+        # الـ lookups متخزنة في الكاش (CachedLookupMixin)؛ أي تعديل يبطل الموديل بتاعه بس
+        from core.cache import invalidate_on_change
+        from shared import models
+        from shared.mixins import lookup_tag
+        for model in (
+            models.Country, models.City, models.Area, models.Nationality, models.Gender,
+            models.Classification, models.Currency, models.CommunicationMethod,
+            models.Billing, models.Language, models.Bank,
+        ):
+            invalidate_on_change(model, lookup_tag(model))
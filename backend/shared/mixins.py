@@ -0,0 +1,78 @@
+# shared/mixins.py
+"""
+Lookups (dropdowns) من الكاش + ETag/Last-Modified + 304.
+
+- الـ list response بيتخزن في core.cache بمفتاح فيه كل الـ query params،
+  وبيتبطل مع أي save/delete للموديل (tag بيتسجل في SharedConfig.ready).
+- ?all=1 يرجّع كل الصفوف بدون pagination (للـ dropdowns).
+- If-None-Match / If-Modified-Since → 304 بدون body.
+"""
+import hashlib
+import json
+
+from django.db.models import Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from core import cache as app_cache
+
+
+def lookup_tag(model):
+    return f"lookup:{model._meta.label_lower}"
+
+
+class CachedLookupMixin:
+    all_query_param = "all"
+    cache_timeout = None  # None = APP_CACHE_DEFAULT_TIMEOUT
+
+    def _wants_all(self):
+        return str(self.request.query_params.get(self.all_query_param, "")).lower() in ("1", "true", "yes")
+
+    def paginate_queryset(self, queryset):
+        if self._wants_all():
+            return None
+        return super().paginate_queryset(queryset)
+
+    def _build_payload(self, request, *args, **kwargs):
+        data = super().list(request, *args, **kwargs).data
+        body = json.dumps(data, cls=JSONEncoder, separators=(",", ":"))
+        last_modified = (
+            self.filter_queryset(self.get_queryset()).aggregate(m=Max("updated_at"))["m"]
+        )
+        return {
+            # json round-trip: بيانات خام قابلة للتخزين (ReturnList شايلة الـ serializer)
+            "data": json.loads(body),
+            "etag": '"%s"' % hashlib.sha1(body.encode("utf-8")).hexdigest(),
+            "last_modified": last_modified.timestamp() if last_modified else None,
+        }
+
+    def _not_modified(self, request, payload):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return "*" in etags or payload["etag"] in etags
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since") or "")
+        return bool(since and payload["last_modified"] and int(payload["last_modified"]) <= since)
+
+    def list(self, request, *args, **kwargs):
+        model = self.get_queryset().model
+        params = sorted((k, sorted(v)) for k, v in request.query_params.lists())
+        payload, hit = app_cache.cached(
+            "lookups", model._meta.label_lower, request.get_host(), params,
+            compute=lambda: self._build_payload(request, *args, **kwargs),
+            tags=[lookup_tag(model)], timeout=self.cache_timeout,
+        )
+
+        if self._not_modified(request, payload):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(payload["data"])
+        response["ETag"] = payload["etag"]
+        if payload["last_modified"]:
+            response["Last-Modified"] = http_date(payload["last_modified"])
+        # الكلاينت يحتفظ بالنسخة بس يسأل كل مرة (revalidate → 304 غالبًا)
+        response["Cache-Control"] = "private, no-cache"
+        response["X-Cache"] = "HIT" if hit else "MISS"
+        return response
@@ -0,0 +1,106 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from shared.models import Bank, Country
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api():
+    return APIClient()
+
+
+@pytest.fixture
+def countries():
+    return [
+        Country.objects.create(name_en="Egypt", name_ar="مصر"),
+        Country.objects.create(name_en="Jordan", name_ar="الأردن"),
+    ]
+
+
+# ===== CachedLookupMixin =====
+
+def test_warm_lookup_list_makes_no_queries(api, countries):
+    first = api.get("/api/shared/countries/", {"all": 1})
+    assert first.status_code == 200
+    assert first["X-Cache"] == "MISS"
+    assert {row["name_en"] for row in first.json()} == {"Egypt", "Jordan"}
+
+    with CaptureQueriesContext(connection) as ctx:
+        warm = api.get("/api/shared/countries/", {"all": 1})
+    assert len(ctx.captured_queries) == 0
+    assert warm["X-Cache"] == "HIT"
+    assert warm.json() == first.json()
+    assert warm["ETag"] == first["ETag"]
+    assert warm["Cache-Control"] == "private, no-cache"
+
+
+def test_lookup_list_revalidates_with_etag(api, countries):
+    etag = api.get("/api/shared/countries/", {"all": 1})["ETag"]
+
+    response = api.get("/api/shared/countries/", {"all": 1}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert not response.content
+    assert response["ETag"] == etag
+
+    # query params مختلفة = مفتاح مختلف → etag مختلف
+    assert api.get("/api/shared/countries/", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_lookup_create_invalidates_only_its_model(api, countries, django_capture_on_commit_callbacks):
+    before = api.get("/api/shared/countries/", {"all": 1})
+    api.get("/api/shared/banks/", {"all": 1})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Country.objects.create(name_en="Oman", name_ar="عمان")
+
+    after = api.get("/api/shared/countries/", {"all": 1}, HTTP_IF_NONE_MATCH=before["ETag"])
+    assert after.status_code == 200
+    assert after["X-Cache"] == "MISS"
+    assert after["ETag"] != before["ETag"]
+    assert "Oman" in {row["name_en"] for row in after.json()}
+    assert api.get("/api/shared/banks/", {"all": 1})["X-Cache"] == "HIT"
+
+
+# ===== lookups_bootstrap =====
+
+def test_bootstrap_is_cached_and_revalidates(api, countries):
+    first = api.get("/api/shared/bootstrap/")
+    assert first.status_code == 200
+    assert first["X-Cache"] == "MISS"
+    payload = first.json()
+    assert payload["tables"]["countries"]["fields"] == ["id", "code", "name_en", "name_ar"]
+    assert len(payload["tables"]["countries"]["rows"]) == 2
+    assert first["ETag"] == '"%s"' % payload["version"]
+    assert first["Cache-Control"] == "private, no-cache"
+
+    with CaptureQueriesContext(connection) as ctx:
+        warm = api.get("/api/shared/bootstrap/", HTTP_IF_NONE_MATCH=first["ETag"])
+    assert len(ctx.captured_queries) == 0
+    assert warm.status_code == 304
+    assert warm["X-Cache"] == "HIT"
+
+
+def test_bootstrap_versioned_url_is_immutable(api, countries):
+    version = api.get("/api/shared/bootstrap/").json()["version"]
+
+    pinned = api.get("/api/shared/bootstrap/", {"v": version})
+    assert pinned["Cache-Control"] == "public, max-age=31536000, immutable"
+
+    stale = api.get("/api/shared/bootstrap/", {"v": "0" * 16})
+    assert stale["Cache-Control"] == "private, no-cache"
+
+
+def test_bootstrap_changes_version_when_any_lookup_changes(api, countries, django_capture_on_commit_callbacks):
+    before = api.get("/api/shared/bootstrap/").json()["version"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Bank.objects.create(name_en="NBE", name_ar="البنك الأهلي")
+
+    after = api.get("/api/shared/bootstrap/")
+    assert after["X-Cache"] == "MISS"
+    assert after.json()["version"] != before
+    assert after.json()["tables"]["banks"]["rows"][0][2] == "NBE"
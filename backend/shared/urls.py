@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 from shared.views import (
     CountryViewSet, CityViewSet, AreaViewSet,
     NationalityViewSet, GenderViewSet, ClassificationViewSet,
-    CurrencyViewSet, CommunicationMethodViewSet, BillingViewSet,LanguageViewSet, BankViewSet
+    CurrencyViewSet, CommunicationMethodViewSet, BillingViewSet,LanguageViewSet, BankViewSet,
+    lookups_bootstrap,
 )
 
 router = DefaultRouter()
@@ -21,4 +22,6 @@ router.register("languages", LanguageViewSet)
 router.register("banks", BankViewSet)
 
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = [
+    path("bootstrap/", lookups_bootstrap, name="shared-lookups-bootstrap"),
+] + router.urls
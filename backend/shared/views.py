@@ -1,4 +1,14 @@
-from rest_framework import viewsets
+import hashlib
+import json
+
+from django.utils.http import parse_etags
+from rest_framework import viewsets, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from core import cache as app_cache
+from shared.mixins import CachedLookupMixin, lookup_tag
 from shared.models import (
     Country, City, Area, Nationality, Gender, Classification,
     Currency, CommunicationMethod, Billing, Language, Bank
@@ -9,53 +19,108 @@ from shared.serializers import (
     CommunicationMethodSerializer, BillingSerializer,LanguageSerializer, BankSerializer
 )
 
-class CountryViewSet(viewsets.ReadOnlyModelViewSet):
+class CountryViewSet(CachedLookupMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Country.objects.filter(is_active=True)
     serializer_class = CountrySerializer
 
 from django_filters.rest_framework import DjangoFilterBackend  # ⬅️ فوق لو مش مضاف
 
-class CityViewSet(viewsets.ReadOnlyModelViewSet):
+class CityViewSet(CachedLookupMixin, viewsets.ReadOnlyModelViewSet):
     queryset = City.objects.filter(is_active=True)
     serializer_class = CitySerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['country']  # ← هنا بنفعل الفلترة بالبلد
 
-class AreaViewSet(viewsets.ReadOnlyModelViewSet):
+class AreaViewSet(CachedLookupMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Area.objects.filter(is_active=True)
     serializer_class = AreaSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['city']  # ← هنا بنفعل الفلترة بالمدينة
 
 
-class NationalityViewSet(viewsets.ReadOnlyModelViewSet):
+class NationalityViewSet(CachedLookupMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Nationality.objects.filter(is_active=True)
     serializer_class = NationalitySerializer
 
-class GenderViewSet(viewsets.ReadOnlyModelViewSet):
+class GenderViewSet(CachedLookupMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Gender.objects.filter(is_active=True)
     serializer_class = GenderSerializer
 
-class ClassificationViewSet(viewsets.ReadOnlyModelViewSet):
+class ClassificationViewSet(CachedLookupMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Classification.objects.filter(is_active=True)
     serializer_class = ClassificationSerializer
 
-class CurrencyViewSet(viewsets.ReadOnlyModelViewSet):
+class CurrencyViewSet(CachedLookupMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Currency.objects.filter(is_active=True)
     serializer_class = CurrencySerializer
 
-class CommunicationMethodViewSet(viewsets.ReadOnlyModelViewSet):
+class CommunicationMethodViewSet(CachedLookupMixin, viewsets.ReadOnlyModelViewSet):
     queryset = CommunicationMethod.objects.filter(is_active=True)
     serializer_class = CommunicationMethodSerializer
 
-class BillingViewSet(viewsets.ReadOnlyModelViewSet):
+class BillingViewSet(CachedLookupMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Billing.objects.filter(is_active=True)
     serializer_class = BillingSerializer
-class LanguageViewSet(viewsets.ReadOnlyModelViewSet):
+class LanguageViewSet(CachedLookupMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Language.objects.filter(is_active=True)
     serializer_class = LanguageSerializer
 
-class BankViewSet(viewsets.ReadOnlyModelViewSet):
+class BankViewSet(CachedLookupMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Bank.objects.filter(is_active=True)
     serializer_class = BankSerializer
-    
\ No newline at end of file
+
+
+# ======================== Bootstrap (كل الـ lookups في response واحد) ========================
+# اسم الجدول في الـ payload → (الموديل، الأعمدة)
+BOOTSTRAP_TABLES = {
+    "countries": (Country, ["id", "code", "name_en", "name_ar"]),
+    "cities": (City, ["id", "code", "name_en", "name_ar", "country_id"]),
+    "areas": (Area, ["id", "code", "name_en", "name_ar", "city_id"]),
+    "nationalities": (Nationality, ["id", "code", "name_en", "name_ar"]),
+    "genders": (Gender, ["id", "code", "name_en", "name_ar"]),
+    "classifications": (Classification, ["id", "code", "name_en", "name_ar"]),
+    "currencies": (Currency, ["id", "code", "name_en", "name_ar"]),
+    "communication_methods": (CommunicationMethod, ["id", "code", "name_en", "name_ar"]),
+    "billing_methods": (Billing, ["id", "code", "name_en", "name_ar"]),
+    "languages": (Language, ["id", "code", "name_en", "name_ar"]),
+    "banks": (Bank, ["id", "code", "name_en", "name_ar"]),
+}
+
+
+def _build_bootstrap():
+    tables = {}
+    for name, (model, fields) in BOOTSTRAP_TABLES.items():
+        rows = model.objects.filter(is_active=True).order_by("id").values_list(*fields)
+        tables[name] = {"fields": fields, "rows": [list(r) for r in rows]}
+    body = json.dumps(tables, separators=(",", ":"), ensure_ascii=False)
+    version = hashlib.sha1(body.encode("utf-8")).hexdigest()[:16]
+    return {"version": version, "tables": tables}
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def lookups_bootstrap(request):
+    """
+    كل جداول الـ dropdowns في طلب واحد: {"version", "tables": {name: {"fields", "rows"}}}.
+    version = hash المحتوى؛ لو الكلاينت طلب ?v=<version> الحالي يقدر يخزنها للأبد.
+    """
+    payload, hit = app_cache.cached(
+        "lookups-bootstrap",
+        compute=_build_bootstrap,
+        tags=[lookup_tag(model) for model, _ in BOOTSTRAP_TABLES.values()],
+    )
+    etag = '"%s"' % payload["version"]
+
+    if etag in parse_etags(request.headers.get("If-None-Match") or ""):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(payload)
+
+    response["ETag"] = etag
+    if request.query_params.get("v") == payload["version"]:
+        # URL متنسخ بالـ version: المحتوى مش هيتغير تحت نفس الرابط
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        response["Cache-Control"] = "private, no-cache"
+    response["X-Cache"] = "HIT" if hit else "MISS"
+    return response
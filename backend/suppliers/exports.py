@@ -0,0 +1,29 @@
+# suppliers/exports.py
+from core.exports import ExportSpec
+
+SUPPLIER_EXPORT = ExportSpec("Suppliers", [
+    ("code", "Code", "code"),
+    ("name_ar", "Name (AR)", "name_ar"),
+    ("name_en", "Name (EN)", "name_en"),
+    ("supplier_type", "Type", "supplier_type"),
+    ("supplier_history", "History", "supplier_history"),
+    ("legal_structure", "Legal Structure", "legal_structure"),
+    ("scope_of_work", "Scope of Work", "scope_of_work__name_en"),
+    ("classification", "Classification", "classification__name_en"),
+    ("trade_license_number", "Trade License", "trade_license_number"),
+    ("trade_license_expiry_date", "Trade License Expiry", "trade_license_expiry_date"),
+    ("trn_number", "TRN", "trn_number"),
+    ("email", "Email", "email"),
+    ("telephone_number", "Telephone", "telephone_number"),
+    ("landline_number", "Landline", "landline_number"),
+    ("country", "Country", "country__name_en"),
+    ("city", "City", "city__name_en"),
+    ("branch_address", "Branch", "branch_address"),
+    ("bank", "Bank", "bank__name_en"),
+    ("iban_number", "IBAN", "iban_number"),
+    ("is_active", "Active", "is_active"),
+    ("created_at", "Created At", "created_at"),
+], default=[
+    "code", "name_ar", "name_en", "supplier_type", "scope_of_work", "trn_number",
+    "email", "telephone_number", "country", "city", "is_active",
+], filters=("supplier_type", "is_active"))  # ?supplier_type=subcontract&is_active=true
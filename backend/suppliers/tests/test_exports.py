@@ -0,0 +1,42 @@
+import io
+
+import pytest
+from django.contrib.auth import get_user_model
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from suppliers.models import Supplier
+
+URL = "/api/suppliers/export/xlsx/"
+
+
+@pytest.fixture
+def client(db):
+    c = APIClient()
+    c.force_authenticate(get_user_model().objects.create_user(username="u", password="x"))
+    Supplier.objects.create(name_ar="أ", name_en="Active", is_active=True)
+    Supplier.objects.create(name_ar="ب", name_en="Inactive", is_active=False, supplier_type="subcontract")
+    return c
+
+
+def names(response):
+    assert response.status_code == 200, getattr(response, "data", None)
+    wb = load_workbook(io.BytesIO(b"".join(response.streaming_content)), read_only=True)
+    return [row[0] for row in wb.active.iter_rows(min_row=2, values_only=True)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("value, expected", [
+    ("true", ["Active"]), ("True", ["Active"]), ("1", ["Active"]),
+    ("false", ["Inactive"]), ("0", ["Inactive"]), ("", ["Active", "Inactive"]),
+])
+def test_boolean_filter_accepts_list_endpoint_values(client, value, expected):
+    r = client.get(URL, {"is_active": value, "columns": "name_en"})
+    assert sorted(names(r)) == expected
+
+
+@pytest.mark.django_db
+def test_invalid_choice_is_a_400(client):
+    r = client.get(URL, {"supplier_type": "nope"})
+    assert r.status_code == 400 and "supplier_type" in r.data
+    assert names(client.get(URL, {"supplier_type": "subcontract", "columns": "name_en"})) == ["Inactive"]
@@ -1,7 +1,9 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import (
     SupplierViewSet, SupplierGroupViewSet, ScopeOfWorkViewSet,
-    SupplierContactPersonViewSet, SupplierLegalPersonViewSet
+    SupplierContactPersonViewSet, SupplierLegalPersonViewSet,
+    supplier_export_xlsx,
 )
 
 router = DefaultRouter()
@@ -11,4 +13,6 @@ router.register(r"scopes-of-work", ScopeOfWorkViewSet, basename="scope-of-work")
 router.register(r"supplier-contact-people", SupplierContactPersonViewSet, basename="supplier-contact-person")
 router.register(r"supplier-legal-person", SupplierLegalPersonViewSet, basename="supplier-legal-person")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("suppliers/export/xlsx/", supplier_export_xlsx, name="suppliers-export-xlsx"),
+] + router.urls
@@ -2,10 +2,14 @@ from django.shortcuts import render
 
 # Create your views here.
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import api_view, permission_classes
+
+from core.exports import export_response
 from .models import (
     Supplier, SupplierGroup, ScopeOfWork,
     SupplierContactPerson, SupplierLegalPerson
 )
+from .exports import SUPPLIER_EXPORT
 from .serializers import (
     SupplierSerializer, SupplierGroupSerializer, ScopeOfWorkSerializer,
     SupplierContactPersonSerializer, SupplierLegalPersonSerializer
@@ -37,3 +41,11 @@ class SupplierLegalPersonViewSet(viewsets.ModelViewSet):
     queryset = SupplierLegalPerson.objects.select_related("supplier")
     serializer_class = SupplierLegalPersonSerializer
     permission_classes = [permissions.IsAuthenticated]
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def supplier_export_xlsx(request):
+    """?columns=code,name_en,...&supplier_type=&is_active= — write-only XLSX (core.exports)."""
+    qs = Supplier.objects.order_by("code", "id")
+    return export_response(SUPPLIER_EXPORT, qs, request, "suppliers.xlsx")